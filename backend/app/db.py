@@ -1,6 +1,5 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
 
 MYSQL_USER = os.getenv("MYSQL_USER", "eoex")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD", "eoex")
@@ -10,5 +9,132 @@ MYSQL_DB = os.getenv("MYSQL_DB", "eoex_travel")
 # Use PyMySQL driver to avoid native build dependencies
 DATABASE_URL = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DB}"
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# DB_ASYNC=1 runs the read-only routes on SQLAlchemy's asyncio extension (aiomysql) instead of
+# blocking PyMySQL calls in the threadpool; writes and scripts always use the sync engine
+DB_ASYNC = os.getenv("DB_ASYNC", "0") == "1"
+ASYNC_DATABASE_URL = f"mysql+aiomysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DB}"
+
+# LOAD DATA LOCAL INFILE (optional fast path for geo seeding) must be enabled client-side
+MYSQL_LOCAL_INFILE = os.getenv("MYSQL_LOCAL_INFILE", "0") == "1"
+
+# Pool sizing, per worker process: at most POOL_SIZE + MAX_OVERFLOW connections, checkouts wait
+# up to POOL_TIMEOUT seconds before failing. RECYCLE must stay below MySQL's wait_timeout so the
+# server never drops a pooled connection first; that is also why pre-ping (one extra round trip
+# per checkout) is off by default. Size them with scripts/load_test_db.py and /api/admin/metrics.
+MYSQL_POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", "10"))
+MYSQL_MAX_OVERFLOW = int(os.getenv("MYSQL_MAX_OVERFLOW", "20"))
+MYSQL_POOL_RECYCLE = int(os.getenv("MYSQL_POOL_RECYCLE", "1800"))
+MYSQL_POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", "10"))
+MYSQL_POOL_PRE_PING = os.getenv("MYSQL_POOL_PRE_PING", "0") == "1"
+
+# Created on first use: building the engine imports the dialect and PyMySQL (and its crypto),
+# which importing the app or a script that never queries should not pay for
+_engine = None
+_async_engine = None
+_session_factory = None
+_lock = threading.Lock()
+
+
+def _pool_options() -> dict:
+    return dict(
+        pool_size=MYSQL_POOL_SIZE,
+        max_overflow=MYSQL_MAX_OVERFLOW,
+        pool_recycle=MYSQL_POOL_RECYCLE,
+        pool_timeout=MYSQL_POOL_TIMEOUT,
+        pool_pre_ping=MYSQL_POOL_PRE_PING,
+    )
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                from sqlalchemy import create_engine
+
+                from .utils.pool_metrics import InstrumentedQueuePool
+
+                _engine = create_engine(
+                    DATABASE_URL,
+                    poolclass=InstrumentedQueuePool,
+                    **_pool_options(),
+                    connect_args={"local_infile": True} if MYSQL_LOCAL_INFILE else {},
+                )
+    return _engine
+
+
+def get_async_engine():
+    """The asyncio engine (aiomysql), created on first use with the same pool settings as the
+    sync one; each process then holds up to two pools."""
+    global _async_engine
+    if _async_engine is None:
+        with _lock:
+            if _async_engine is None:
+                from sqlalchemy.ext.asyncio import create_async_engine
+
+                from .utils.pool_metrics import InstrumentedAsyncQueuePool
+
+                _async_engine = create_async_engine(
+                    ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **_pool_options()
+                )
+    return _async_engine
+
+
+def set_engine(engine) -> None:
+    global _engine, _session_factory
+    _engine = engine
+    _session_factory = None
+
+
+def set_async_engine(engine) -> None:
+    global _async_engine
+    _async_engine = engine
+
+
+def _fetch_all(statement, params) -> list:
+    with get_engine().connect() as conn:
+        return [dict(r) for r in conn.execute(statement, params).mappings()]
+
+
+async def fetch_all(statement, params: dict | None = None) -> list:
+    """Rows of a read query as dicts: on the async engine with DB_ASYNC=1, otherwise on the sync
+    engine in the threadpool. Both modes run the same statement."""
+    params = params or {}
+    if DB_ASYNC:
+        async with get_async_engine().connect() as conn:
+            result = await conn.execute(statement, params)
+            return [dict(r) for r in result.mappings()]
+    from starlette.concurrency import run_in_threadpool
+
+    return await run_in_threadpool(_fetch_all, statement, params)
+
+
+def __getattr__(name):
+    # `from backend.app.db import engine` / `SessionLocal` still work and create them on access
+    global _session_factory
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        if _session_factory is None:
+            from sqlalchemy.orm import sessionmaker
+
+            _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+        return _session_factory
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def pool_stats(engine=None) -> dict:
+    """Sizing and checkout metrics of this worker's pool; nothing is created just to report."""
+    engine = engine or _engine
+    if engine is None:
+        return {"created": False}
+    pool = engine.pool
+    stats = pool.stats() if hasattr(pool, "stats") else {"status": pool.status()}
+    return {"created": True, "pool_class": type(pool).__name__, **stats}
+
+
+def ping() -> None:
+    from sqlalchemy import text
+
+    with get_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
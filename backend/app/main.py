@@ -1,13 +1,29 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+import asyncio
+import logging
 from pathlib import Path
-from .routes import users, admin, journeys, amadeus_api, geo
-from dotenv import load_dotenv
-import os
 
-load_dotenv(dotenv_path=os.path.join(Path(__file__).resolve().parents[2], ".env"), override=False)
+# .env is applied before anything else is imported: modules read their settings at import.
+# python-dotenv is only imported when there is a file to load.
+_ENV_FILE = Path(__file__).resolve().parents[2] / ".env"
+if _ENV_FILE.is_file():
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=_ENV_FILE, override=False)
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from fastapi.staticfiles import StaticFiles  # noqa: E402
+from fastapi.responses import HTMLResponse  # noqa: E402
+from fastapi.concurrency import run_in_threadpool  # noqa: E402
+from .routes import users, admin, journeys, amadeus_api, geo, health  # noqa: E402
+from .db import ping as ping_database  # noqa: E402
+from .utils.amadeus_gateway import close_gateway, get_gateway  # noqa: E402
+from .utils.geo_seed import GEO_SEED_ON_STARTUP  # noqa: E402
+from .utils.lifecycle import LIFECYCLE  # noqa: E402
+from .utils.prefetch import (  # noqa: E402
+    PREFETCH_ENABLED, publish_forever, run_in_process as run_prefetcher,
+)
+
 app = FastAPI(title="EOEX AI Travel Agent", version="0.1.0")
 
 app.add_middleware(
@@ -23,13 +39,14 @@ app.include_router(journeys.router, prefix="/api/journeys", tags=["journeys"])
 app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 app.include_router(amadeus_api.router, prefix="/api/amadeus", tags=["amadeus"])
 app.include_router(geo.router, prefix="/api/geo", tags=["geo"])
-
+app.include_router(health.router, tags=["health"])
 
 
 # Serve frontend static files
 frontend_dir = Path(__file__).resolve().parents[2] / "frontend"
 app.mount("/", StaticFiles(directory=str(frontend_dir), html=True), name="static")
 
+
 @app.get("/index.html", response_class=HTMLResponse)
 def index_html():
     try:
@@ -37,11 +54,47 @@ def index_html():
     except Exception:
         return HTMLResponse(content="<h1>Frontend not found</h1>", status_code=404)
 
-# Auto-seed geography data on startup
+
+async def wait_for_database():
+    # Retried until MySQL answers; the worker is not ready before that
+    delay = 0.5
+    while True:
+        try:
+            await run_in_threadpool(ping_database)
+            return {"status": "ok"}
+        except Exception as e:
+            logging.getLogger("lifecycle").warning("database not reachable yet: %s", e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 10)
+
+
+async def seed_geography():
+    await LIFECYCLE.wait("database")
+    return await geo.seed_geo_on_startup()
+
+
+# Startup work runs in the background: the worker is live at once and ready once the database
+# answers and the geo index is built; seeding (skipped when the dataset is unchanged) is not
+# needed for readiness
 @app.on_event("startup")
-def seed_geography_on_startup():
-    try:
-        geo.seed_geo()
-    except Exception:
-        # Ignore errors during startup seeding to avoid blocking app
-        pass
+async def start_background_startup():
+    LIFECYCLE.start("database", wait_for_database)
+    LIFECYCLE.start("geo_index", geo.warm_geo_index)
+    if GEO_SEED_ON_STARTUP:
+        LIFECYCLE.start("geo_seed", seed_geography, required=False)
+    if PREFETCH_ENABLED:
+        # Runs until shutdown, refreshing seed and hot keys before they expire
+        LIFECYCLE.start("prefetch", lambda: run_prefetcher(get_gateway()), required=False)
+    else:
+        # Hot keys for a prefetch_cache.py process sharing the cache backend
+        LIFECYCLE.start("prefetch_publish", publish_forever, required=False)
+
+
+@app.on_event("shutdown")
+async def close_amadeus_gateway():
+    await close_gateway()
+
+
+@app.on_event("shutdown")
+async def stop_background_startup():
+    await LIFECYCLE.shutdown()
@@ -1,25 +1,46 @@
-from fastapi import APIRouter, Query
-from sqlalchemy import text
-from ..db import engine
+from fastapi import APIRouter, HTTPException, Query, Response
+from .. import db
+from ..db import fetch_all, pool_stats
+from ..utils.cache import cache_stats
+from ..utils.dashboard import (
+    DASHBOARD_LIMIT, DASHBOARD_MAX_LIMIT, dashboard_query, decode_dashboard_cursor, page,
+)
+from ..utils.prefetch import prefetch_stats
+from ..utils.singleflight import SINGLE_FLIGHT
+from ..utils.swr import swr_stats
 
 router = APIRouter()
 
+
 @router.get("/dashboard")
-def admin_dashboard(
+async def admin_dashboard(
+    response: Response,
     user: str | None = Query(None),
     destination: str | None = Query(None),
     budget: float | None = Query(None),
+    after: str | None = Query(None,
+                              description="Cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(DASHBOARD_LIMIT, ge=1, le=DASHBOARD_MAX_LIMIT),
 ):
-    query = """
-        SELECT j.id, u.username, j.destination_country, j.destination_city, j.budget, j.created_at
-        FROM journeys j
-        JOIN users u ON u.id = j.user_id
-        WHERE ( :user IS NULL OR u.username = :user )
-          AND ( :destination IS NULL OR j.destination_city = :destination OR j.destination_country = :destination )
-          AND ( :budget IS NULL OR j.budget <= :budget )
-        ORDER BY j.created_at DESC
-        LIMIT 100
-    """
-    with engine.connect() as conn:
-        rows = conn.execute(text(query), {"user": user, "destination": destination, "budget": budget}).mappings().all()
-        return [dict(r) for r in rows]
+    # Still a plain array; the cursor of the next page (if any) comes in X-Next-Cursor
+    try:
+        cursor = decode_dashboard_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    statement, params = dashboard_query(user, destination, budget, after=cursor, limit=limit)
+    rows, next_cursor = page(await fetch_all(statement, params), limit)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
+@router.get("/cache-stats")
+def admin_cache_stats():
+    return {**cache_stats(), "singleflight": SINGLE_FLIGHT.stats(), "swr": swr_stats(),
+            "prefetch": prefetch_stats()}
+
+
+@router.get("/metrics")
+def admin_metrics():
+    # Per worker: with several uvicorn workers each one reports its own pool
+    return {"db_pool": pool_stats(), "db_pool_async": pool_stats(db._async_engine)}
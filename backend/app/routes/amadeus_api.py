@@ -1,45 +1,59 @@
 import os
 import logging
-from fastapi import APIRouter, HTTPException, Query
-from amadeus import Client, ResponseError
-import time
-from ..db import engine
-from ..utils.cache import get_cache, set_cache
-from sqlalchemy import text
-
-router = APIRouter()
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from ..db import get_engine
+from ..utils.amadeus_gateway import (
+    CircuitOpen, DeadlineExceeded, ResponseError, get_gateway, is_retriable,
+)
+from ..utils.cache import DEFAULT_TTL, aget_cache, aset_cache
+from ..utils.fanout import first_non_empty, gather_limited
+from ..utils.iata_resolver import IataResolver, resolver_stats
+from ..utils.journey_store import insert_journey
+from ..utils.jsoncodec import loads
+from ..utils.prefetch import ENDPOINTS, HOT_KEYS
+from ..utils.rate_limit import get_rate_limits
+from ..utils.resilience import (
+    REQUEST_DEADLINE, RETRY_BASE, RETRY_MAX, RETRY_STATS, get_breakers, retry, set_deadline,
+)
+from ..utils.swr import CachePolicy, swr_fetch
+
+
+async def request_deadline():
+    # Every upstream call (and retry) made for one request shares a single time budget
+    set_deadline(REQUEST_DEADLINE)
+
+
+router = APIRouter(dependencies=[Depends(request_deadline)])
 
 logger = logging.getLogger("amadeus_logger")
 logger.setLevel(logging.DEBUG)
 
+# Max concurrent upstream calls per flight-offers-by-cities request
+SEARCH_CONCURRENCY = int(os.getenv("AMADEUS_SEARCH_CONCURRENCY", "4"))
+
+
 def get_client():
-    client_id = os.getenv("AMADEUS_CLIENT_ID", "")
-    client_secret = os.getenv("AMADEUS_CLIENT_SECRET", "")
-    host_env = os.getenv("AMADEUS_HOST", "test").lower()
-    host_param = None
-    if host_env in ("production", "prod"):
-        host_param = 'production'
-    if not client_id or not client_secret:
-        raise HTTPException(status_code=500, detail="Amadeus credentials not configured")
-    if host_param:
-        return Client(client_id=client_id, client_secret=client_secret, logger=logger, host=host_param)
-    return Client(client_id=client_id, client_secret=client_secret, logger=logger)
+    return get_gateway()
+
 
 # Default origin airport handling (prefer verified CDG)
 DEFAULT_ORIGIN_IATA = None
 
-def get_default_origin_iata():
+
+async def get_default_origin_iata():
     global DEFAULT_ORIGIN_IATA
     if DEFAULT_ORIGIN_IATA:
         return DEFAULT_ORIGIN_IATA
-    cached = get_cache("default_origin_iata", ttl=86400)
+    cached = await aget_cache("default_origin_iata")
     if cached:
         DEFAULT_ORIGIN_IATA = cached
         return DEFAULT_ORIGIN_IATA
     amadeus = get_client()
     iata = None
     try:
-        resp = amadeus.reference_data.locations.get(keyword="CDG", subType="AIRPORT")
+        resp = await amadeus.get('/v1/reference-data/locations', keyword="CDG", subType="AIRPORT")
         data = resp.data if isinstance(resp.data, list) else []
         for item in data:
             code = item.get("iataCode") or (item.get("address") or {}).get("iataCode")
@@ -49,9 +63,10 @@ def get_default_origin_iata():
     except ResponseError:
         iata = None
     DEFAULT_ORIGIN_IATA = iata or "CDG"
-    set_cache("default_origin_iata", DEFAULT_ORIGIN_IATA)
+    await aset_cache("default_origin_iata", DEFAULT_ORIGIN_IATA, ttl=86400)
     return DEFAULT_ORIGIN_IATA
 
+
 def _raise_http_error(error: ResponseError):
     detail = getattr(error, 'response', None)
     corr = None
@@ -64,121 +79,128 @@ def _raise_http_error(error: ResponseError):
     message = body or str(error)
     if corr:
         message = f"{message} [correlation_id={corr}]"
-    raise HTTPException(status_code=500, detail=message)
+    # Refused by the breaker or out of time: say so instead of a generic upstream error
+    refused = isinstance(error, (CircuitOpen, DeadlineExceeded))
+    status = error.response.status_code if refused else 500
+    raise HTTPException(status_code=status, detail=message)
+
+
+async def retry_call(fn, max_retries: int = RETRY_MAX, backoff_sec: float = RETRY_BASE):
+    # Network errors and 5xx are retried with full-jitter backoff within the request's deadline
+    try:
+        return await retry(fn, is_retriable, max_retries=max_retries, base=backoff_sec)
+    except ResponseError as err:
+        _raise_http_error(err)
+
+
+async def cached_fetch(cache_key: str, do_get, ttl: int = DEFAULT_TTL,
+                       policy: CachePolicy | None = None) -> bytes:
+    # Concurrent misses on the same key share one upstream call and its result (or error);
+    # endpoints with a policy also serve stale payloads while refreshing or when upstream fails.
+    # The payload comes back as the encoded JSON stored in the cache.
+    async def fetch():
+        response = await retry_call(do_get)
+        return response.data
+
+    return await swr_fetch(cache_key, fetch, policy or CachePolicy(ttl))
+
+
+async def cached_endpoint(name: str, **params) -> bytes:
+    # A cached endpoint from the prefetch registry; every request is counted for the hot-key
+    # lists, as a hit unless it had to wait for its own upstream call
+    endpoint = ENDPOINTS[name]
+    amadeus = get_client()
+    cache_key = endpoint.cache_key(params)
+    fetched = False
+
+    async def do_get():
+        nonlocal fetched
+        fetched = True
+        return await amadeus.get(endpoint.path, **params)
+
+    try:
+        return await cached_fetch(cache_key, do_get, policy=endpoint.policy)
+    finally:
+        HOT_KEYS.record(cache_key, hit=not fetched, endpoint=name, params=params)
+
+
+def json_bytes_response(raw: bytes, as_list: bool = True) -> Response:
+    # Cache hits are sent as stored, skipping decode, jsonable_encoder and re-encode
+    if as_list and raw.lstrip()[:1] != b"[":
+        raw = b"[" + raw + b"]"
+    return Response(content=raw, media_type="application/json")
 
-def retry_call(fn, max_retries: int = 3, backoff_sec: float = 0.8):
-    last_err = None
-    for attempt in range(max_retries):
-        try:
-            return fn()
-        except ResponseError as err:
-            last_err = err
-            resp = getattr(err, 'response', None)
-            status = getattr(resp, 'status_code', None)
-            if status and int(status) >= 500 and attempt < max_retries - 1:
-                time.sleep(backoff_sec * (2 ** attempt))
-                continue
-            break
-    _raise_http_error(last_err)
 
 @router.get("/health")
-def health():
+async def health():
+    # Breakers per upstream path: closed, open (failing fast) or half_open (probing)
+    upstream = {"breakers": get_breakers().stats(), "retries": dict(RETRY_STATS),
+                "iata_resolver": resolver_stats()}
     try:
         _ = get_client()
-        return {"status": "ok", "credentials": True}
     except HTTPException as e:
-        return {"status": "error", "credentials": False, "detail": e.detail}
+        return {"status": "error", "credentials": False, "detail": e.detail, **upstream}
+    tripped = any(b["state"] != "closed" for b in upstream["breakers"].values())
+    status = "degraded" if tripped else "ok"
+    return {"status": status, "credentials": True, **upstream}
+
+
+@router.get("/quota")
+async def quota():
+    # Per-family buckets, 429s seen and calls against the monthly budget (this process, or all
+    # workers with AMADEUS_RATE_SHARED=1)
+    return get_rate_limits().stats()
+
 
 @router.get("/test")
-def test_api(
+async def test_api(
     origin: str = Query("CDG"),
     destination: str = Query("ATH"),
     departure: str = Query("2026-01-15"),
     adults: int = Query(1),
 ):
-    amadeus = get_client()
-    cache_key = f"flight_offers_search_{origin}_{destination}_{departure}_{adults}"
-    cached = get_cache(cache_key, ttl=600)
-    if cached is not None:
-        return cached
-    def do_get():
-        return amadeus.shopping.flight_offers_search.get(
-            originLocationCode=origin,
-            destinationLocationCode=destination,
-            departureDate=departure,
-            adults=adults,
-        )
-    response = retry_call(do_get)
-    set_cache(cache_key, response.data)
-    return response.data
+    raw = await cached_endpoint(
+        "flight_offers_search",
+        originLocationCode=origin,
+        destinationLocationCode=destination,
+        departureDate=departure,
+        adults=adults,
+    )
+    return json_bytes_response(raw, as_list=False)
+
 
 @router.get("/checkin-links")
-def checkin_links(airlineCode: str = Query("BA")):
-    amadeus = get_client()
-    cache_key = f"checkin_links_{airlineCode}"
-    cached = get_cache(cache_key)
-    if cached is not None:
-        return cached
-    def do_get():
-        return amadeus.reference_data.urls.checkin_links.get(airlineCode=airlineCode)
-    response = retry_call(do_get)
-    set_cache(cache_key, response.data)
-    return response.data
+async def checkin_links(airlineCode: str = Query("BA")):
+    raw = await cached_endpoint("checkin_links", airlineCode=airlineCode)
+    return json_bytes_response(raw, as_list=False)
+
 
 @router.get("/locations")
-def locations(keyword: str = Query("Athens"), subType: str = Query("CITY")):
-    amadeus = get_client()
-    cache_key = f"locations_{keyword}_{subType}"
-    cached = get_cache(cache_key)
-    if cached is not None:
-        return cached
-    def do_get():
-        return amadeus.get('/v1/reference-data/locations', keyword=keyword, subType=subType)
-    response = retry_call(do_get)
-    set_cache(cache_key, response.data)
-    return response.data if isinstance(response.data, list) else [response.data]
+async def locations(keyword: str = Query("Athens"), subType: str = Query("CITY")):
+    raw = await cached_endpoint("locations", keyword=keyword, subType=subType)
+    return json_bytes_response(raw)
+
 
 @router.get("/flight-destinations")
-def flight_destinations(origin: str = Query("CDG")):
-    amadeus = get_client()
-    cache_key = f"flight_destinations_{origin}"
-    cached = get_cache(cache_key)
-    if cached is not None:
-        return cached
-    def do_get():
-        return amadeus.shopping.flight_destinations.get(origin=origin)
-    response = retry_call(do_get)
-    set_cache(cache_key, response.data)
-    return response.data if isinstance(response.data, list) else [response.data]
+async def flight_destinations(origin: str = Query("CDG")):
+    raw = await cached_endpoint("flight_destinations", origin=origin)
+    return json_bytes_response(raw)
+
 
 @router.get("/flight-dates")
-def flight_dates(origin: str = Query("CDG"), destination: str = Query("MUC")):
-    amadeus = get_client()
-    cache_key = f"flight_dates_{origin}_{destination}"
-    cached = get_cache(cache_key)
-    if cached is not None:
-        return cached
-    def do_get():
-        return amadeus.shopping.flight_dates.get(origin=origin, destination=destination)
-    response = retry_call(do_get)
-    set_cache(cache_key, response.data)
-    return response.data if isinstance(response.data, list) else [response.data]
+async def flight_dates(origin: str = Query("CDG"), destination: str = Query("MUC")):
+    raw = await cached_endpoint("flight_dates", origin=origin, destination=destination)
+    return json_bytes_response(raw)
+
 
 @router.get("/hotel-offers")
-def hotel_offers(hotelIds: str = Query("ADPAR001"), adults: int = Query(2)):
-    amadeus = get_client()
-    cache_key = f"hotel_offers_{hotelIds}_{adults}"
-    cached = get_cache(cache_key)
-    if cached is not None:
-        return cached
-    def do_get():
-        return amadeus.shopping.hotel_offers_search.get(hotelIds=hotelIds, adults=str(adults))
-    response = retry_call(do_get)
-    set_cache(cache_key, response.data)
-    return response.data if isinstance(response.data, list) else [response.data]
+async def hotel_offers(hotelIds: str = Query("ADPAR001"), adults: int = Query(2)):
+    raw = await cached_endpoint("hotel_offers", hotelIds=hotelIds, adults=adults)
+    return json_bytes_response(raw)
+
 
 @router.post("/seed-from-flight-offers")
-def seed_from_flight_offers(
+async def seed_from_flight_offers(
     origin: str = Query("CDG"),
     destination: str = Query("ATH"),
     departure: str = Query("2026-01-15"),
@@ -187,248 +209,249 @@ def seed_from_flight_offers(
     budget: float = Query(2000.0),
 ):
     amadeus = get_client()
+
     def do_get():
-        return amadeus.shopping.flight_offers_search.get(
+        return amadeus.get(
+            '/v2/shopping/flight-offers',
             originLocationCode=origin,
             destinationLocationCode=destination,
             departureDate=departure,
             adults=adults,
         )
-    response = retry_call(do_get)
+
+    response = await retry_call(do_get)
     offers = response.data if isinstance(response.data, list) else []
-    with engine.begin() as conn:
-        res = conn.execute(text(
-            "INSERT INTO journeys (user_id, destination_country, destination_city, budget) VALUES (:user_id, :destination_country, :destination_city, :budget)"
-        ), {
-            "user_id": user_id,
-            "destination_country": destination,
-            "destination_city": destination,
-            "budget": budget
-        })
-        journey_id = res.lastrowid
-        for off in offers[:10]:
-            price = None
-            try:
-                price = float(off.get('price', {}).get('total'))
-            except Exception:
-                price = None
-            segments = (off.get('itineraries', [{}])[0].get('segments', []) if off else [])
-            origin_city = segments[0]['departure']['iataCode'] if segments else origin
-            dest_city = segments[-1]['arrival']['iataCode'] if segments else destination
-            conn.execute(text(
-                "INSERT INTO flights (journey_id, airline, origin_city, destination_city, departure_date, arrival_date, price) VALUES (:journey_id, :airline, :origin_city, :destination_city, :departure_date, :arrival_date, :price)"
-            ), {
-                "journey_id": journey_id,
-                "airline": (segments[0].get('carrierCode') if segments else None),
-                "origin_city": origin_city,
-                "destination_city": dest_city,
-                "departure_date": departure,
-                "arrival_date": departure,
-                "price": price
-            })
-        # Seed hotel offers if a warmed cache exists (robust parsing)
+
+    # Hotel offers only come from the cache; the prefetch seed list keeps ADPAR001 (the test
+    # environment's example hotel) warm
+    hotel_data = None
+    for k in (f"hotel_offers_ADPAR001_{adults}", f"hotel_offers_{destination}_{adults}"):
+        hotel_data = await aget_cache(k)
+        if hotel_data:
+            break
+
+    # Activities use the city geocode if available; prefer warmed cache, else fetch live
+    acts_data = []
+    lat = None
+    lon = None
+    try:
+        loc_resp = await retry_call(lambda: amadeus.get(
+            '/v1/reference-data/locations', keyword=destination, subType='CITY'))
+        locs = loc_resp.data if isinstance(loc_resp.data, list) else []
+        if locs:
+            geo = (locs[0].get('geoCode') or {})
+            lat = geo.get('latitude')
+            lon = geo.get('longitude')
+    except Exception:
+        pass
+    if lat is not None and lon is not None:
         try:
-            # Attempt known warmed key example (ADPAR001 for Athens), else skip silently
-            possible_keys = [
-                f"hotel_offers_ADPAR001_{adults}",
-                f"hotel_offers_{destination}_{adults}",
-            ]
-            hotel_data = None
-            for k in possible_keys:
-                hotel_data = get_cache(k)
-                if hotel_data:
-                    break
-            for h in (hotel_data or [])[:5]:
-                name = (h.get('hotel', {}) or {}).get('name')
-                address_lines = ((h.get('hotel', {}) or {}).get('address', {}) or {}).get('lines', [])
-                address = address_lines[0] if address_lines else None
-                offers = h.get('offers') or []
-                price = None
-                if offers:
-                    try:
-                        price = float((offers[0].get('price') or {}).get('total'))
-                    except Exception:
-                        price = None
-                conn.execute(text(
-                    "INSERT INTO accommodations (journey_id, name, address, city, price_per_night) VALUES (:journey_id, :name, :address, :city, :price_per_night)"
-                ), {
-                    "journey_id": journey_id,
-                    "name": name,
-                    "address": address,
-                    "city": destination,
-                    "price_per_night": price,
-                })
+            raw = await cached_endpoint("activities_geo", latitude=lat, longitude=lon)
+            acts_data = loads(raw) or []
         except Exception:
-            pass
+            acts_data = []
+
+    # Upstream calls are done; the blocking DB writes run off the event loop
+    journey_id = await run_in_threadpool(
+        _persist_seeded_journey, offers, hotel_data, acts_data,
+        origin, destination, departure, user_id, budget,
+    )
+    return {"journey_id": journey_id, "flights_seeded": min(len(offers), 10)}
+
 
-        # Seed activities using city geocode if available; prefer warmed cache, else fetch live
+def _persist_seeded_journey(offers, hotel_data, acts_data, origin, destination, departure,
+                            user_id, budget):
+    flights = []
+    for off in offers[:10]:
+        price = None
         try:
-            lat = None
-            lon = None
-            try:
-                loc_resp = retry_call(lambda: amadeus.get('/v1/reference-data/locations', keyword=destination, subType='CITY'))
-                locs = loc_resp.data if isinstance(loc_resp.data, list) else []
-                if locs:
-                    geo = (locs[0].get('geoCode') or {})
-                    lat = geo.get('latitude')
-                    lon = geo.get('longitude')
-            except Exception:
-                pass
-            acts_data = []
-            if lat is not None and lon is not None:
-                cache_key = f"activities_geo_{lat}_{lon}"
-                acts_data = get_cache(cache_key) or []
-                if not acts_data:
-                    try:
-                        acts_resp = retry_call(lambda: amadeus.shopping.activities.get(latitude=lat, longitude=lon))
-                        acts_data = acts_resp.data
-                        set_cache(cache_key, acts_data)
-                    except Exception:
-                        acts_data = []
-            for a in acts_data[:5]:
-                conn.execute(text(
-                    "INSERT INTO places_to_visit (journey_id, place_name, category, description) VALUES (:journey_id, :place_name, :category, :description)"
-                ), {
-                    "journey_id": journey_id,
-                    "place_name": a.get('name'),
-                    "category": a.get('type'),
-                    "description": a.get('shortDescription')
-                })
+            price = float(off.get('price', {}).get('total'))
         except Exception:
-            pass
-    return {"journey_id": journey_id, "flights_seeded": min(len(offers), 10)}
+            price = None
+        segments = (off.get('itineraries', [{}])[0].get('segments', []) if off else [])
+        flights.append({
+            "airline": (segments[0].get('carrierCode') if segments else None),
+            "origin_city": segments[0]['departure']['iataCode'] if segments else origin,
+            "destination_city": segments[-1]['arrival']['iataCode'] if segments else destination,
+            "departure_date": departure,
+            "arrival_date": departure,
+            "price": price,
+        })
+    # Hotel offers (robust parsing)
+    accommodations = []
+    try:
+        for h in (hotel_data or [])[:5]:
+            name = (h.get('hotel', {}) or {}).get('name')
+            address_lines = ((h.get('hotel', {}) or {}).get('address', {}) or {}).get('lines', [])
+            room_offers = h.get('offers') or []
+            price = None
+            if room_offers:
+                try:
+                    price = float((room_offers[0].get('price') or {}).get('total'))
+                except Exception:
+                    price = None
+            accommodations.append({
+                "name": name,
+                "address": address_lines[0] if address_lines else None,
+                "city": destination,
+                "price_per_night": price,
+            })
+    except Exception:
+        pass
+    places = []
+    try:
+        for a in acts_data[:5]:
+            places.append({"place_name": a.get('name'), "category": a.get('type'),
+                           "description": a.get('shortDescription')})
+    except Exception:
+        pass
+    journey = {
+        "user_id": user_id,
+        "destination_country": destination,
+        "destination_city": destination,
+        "budget": budget,
+        "flights": flights,
+        "accommodations": accommodations,
+        "places_to_visit": places,
+    }
+    # One INSERT per child table rather than one per row
+    with get_engine().begin() as conn:
+        return insert_journey(conn, journey, with_defaults=False)
+
 
 # Additional endpoints
 @router.get("/airlines")
-def airlines(airlineCodes: str = Query("BA")):
+async def airlines(airlineCodes: str = Query("BA")):
     amadeus = get_client()
+
     def do_get():
-        return amadeus.reference_data.airlines.get(airlineCodes=airlineCodes)
-    response = retry_call(do_get)
+        return amadeus.get('/v1/reference-data/airlines', airlineCodes=airlineCodes)
+
+    response = await retry_call(do_get)
     return response.data if isinstance(response.data, list) else [response.data]
 
+
 @router.get("/locations-any")
-def locations_any(keyword: str = Query("LON")):
+async def locations_any(keyword: str = Query("LON")):
     amadeus = get_client()
+
     def do_get():
-        return amadeus.reference_data.locations.get(keyword=keyword, subType="ANY")
-    response = retry_call(do_get)
+        return amadeus.get('/v1/reference-data/locations', keyword=keyword, subType="ANY")
+
+    response = await retry_call(do_get)
     return response.data if isinstance(response.data, list) else [response.data]
 
+
 @router.get("/locations-city")
-def locations_city(keyword: str = Query("PAR")):
+async def locations_city(keyword: str = Query("PAR")):
     amadeus = get_client()
+
     def do_get():
-        return amadeus.reference_data.locations.cities.get(keyword=keyword)
-    response = retry_call(do_get)
+        return amadeus.get('/v1/reference-data/locations/cities', keyword=keyword)
+
+    response = await retry_call(do_get)
     return response.data if isinstance(response.data, list) else [response.data]
 
+
 @router.get("/locations-airports")
-def locations_airports(longitude: float = Query(0.1278), latitude: float = Query(51.5074)):
+async def locations_airports(longitude: float = Query(0.1278), latitude: float = Query(51.5074)):
     amadeus = get_client()
+
     def do_get():
-        return amadeus.reference_data.locations.airports.get(longitude=longitude, latitude=latitude)
-    response = retry_call(do_get)
+        return amadeus.get('/v1/reference-data/locations/airports',
+                           longitude=longitude, latitude=latitude)
+
+    response = await retry_call(do_get)
     return response.data if isinstance(response.data, list) else [response.data]
 
+
 @router.get("/air-traffic-booked")
-def air_traffic_booked(originCityCode: str = Query("MAD"), period: str = Query("2017-08")):
+async def air_traffic_booked(originCityCode: str = Query("MAD"), period: str = Query("2017-08")):
     amadeus = get_client()
+
     def do_get():
-        return amadeus.travel.analytics.air_traffic.booked.get(originCityCode=originCityCode, period=period)
-    response = retry_call(do_get)
+        return amadeus.get('/v1/travel/analytics/air-traffic/booked',
+                           originCityCode=originCityCode, period=period)
+
+    response = await retry_call(do_get)
     return response.data if isinstance(response.data, list) else [response.data]
 
+
 @router.get("/air-traffic-traveled")
-def air_traffic_traveled(originCityCode: str = Query("MAD"), period: str = Query("2017-01")):
+async def air_traffic_traveled(originCityCode: str = Query("MAD"), period: str = Query("2017-01")):
     amadeus = get_client()
+
     def do_get():
-        return amadeus.travel.analytics.air_traffic.traveled.get(originCityCode=originCityCode, period=period)
-    response = retry_call(do_get)
+        return amadeus.get('/v1/travel/analytics/air-traffic/traveled',
+                           originCityCode=originCityCode, period=period)
+
+    response = await retry_call(do_get)
     return response.data if isinstance(response.data, list) else [response.data]
 
+
 @router.get("/air-traffic-busiest")
-def air_traffic_busiest(cityCode: str = Query("MAD"), period: str = Query("2017"), direction: str = Query("ARRIVING")):
+async def air_traffic_busiest(cityCode: str = Query("MAD"), period: str = Query("2017"),
+                              direction: str = Query("ARRIVING")):
     amadeus = get_client()
+
     def do_get():
-        return amadeus.travel.analytics.air_traffic.busiest_period.get(cityCode=cityCode, period=period, direction=direction)
-    response = retry_call(do_get)
+        return amadeus.get('/v1/travel/analytics/air-traffic/busiest-period',
+                           cityCode=cityCode, period=period, direction=direction)
+
+    response = await retry_call(do_get)
     return response.data if isinstance(response.data, list) else [response.data]
 
+
 @router.get("/activities-by-geo")
-def activities_by_geo(latitude: float = Query(40.41436995), longitude: float = Query(-3.69170868)):
-    amadeus = get_client()
-    cache_key = f"activities_geo_{latitude}_{longitude}"
-    cached = get_cache(cache_key, ttl=900)
-    if cached is not None:
-        return cached
-    def do_get():
-        return amadeus.shopping.activities.get(latitude=latitude, longitude=longitude)
-    response = retry_call(do_get)
-    set_cache(cache_key, response.data)
-    return response.data if isinstance(response.data, list) else [response.data]
+async def activities_by_geo(latitude: float = Query(40.41436995),
+                            longitude: float = Query(-3.69170868)):
+    raw = await cached_endpoint("activities_geo", latitude=latitude, longitude=longitude)
+    return json_bytes_response(raw)
+
 
 @router.get("/activities-by-square")
-def activities_by_square(north: float = Query(41.397158), west: float = Query(2.160873), south: float = Query(41.394582), east: float = Query(2.177181)):
-    amadeus = get_client()
-    cache_key = f"activities_square_{north}_{west}_{south}_{east}"
-    cached = get_cache(cache_key, ttl=900)
-    if cached is not None:
-        return cached
-    def do_get():
-        return amadeus.shopping.activities.by_square.get(north=north, west=west, south=south, east=east)
-    response = retry_call(do_get)
-    set_cache(cache_key, response.data)
-    return response.data if isinstance(response.data, list) else [response.data]
+async def activities_by_square(north: float = Query(41.397158), west: float = Query(2.160873),
+                               south: float = Query(41.394582), east: float = Query(2.177181)):
+    raw = await cached_endpoint("activities_square", north=north, west=west, south=south,
+                                east=east)
+    return json_bytes_response(raw)
+
 
 @router.get("/flight-offers-by-cities")
-def flight_offers_by_cities(
+async def flight_offers_by_cities(
     originCity: str = Query("Paris"),
     destinationCity: str = Query("Athens"),
     departure: str = Query("2026-01-15"),
     adults: int = Query(1),
     includeMeta: bool = Query(False),
+    parallel: bool = Query(True),
+    concurrency: int = Query(SEARCH_CONCURRENCY, ge=1, le=16),
 ):
     amadeus = get_client()
-    # Resolve IATA codes from city names: prefer CITY code, also gather AIRPORT codes for fallback
-    def resolve_codes(city_name: str):
-        city_code = None
-        airport_codes = []
-        try:
-            resp_city = amadeus.reference_data.locations.cities.get(keyword=city_name)
-            data_city = resp_city.data if isinstance(resp_city.data, list) else []
-            if data_city:
-                city_code = data_city[0].get('iataCode')
-        except ResponseError:
-            pass
-        try:
-            resp_air = amadeus.reference_data.locations.get(keyword=city_name, subType="AIRPORT")
-            data_air = resp_air.data if isinstance(resp_air.data, list) else []
-            for item in data_air:
-                code = item.get('iataCode') or (item.get('address') or {}).get('iataCode')
-                if code:
-                    airport_codes.append(code)
-        except ResponseError:
-            pass
-        return city_code, airport_codes
-
-    def try_offers(o_code: str, d_code: str, date_str: str):
+    # With parallel=false every upstream call runs one after another and the date fallback
+    # handles one pair at a time (the original behaviour)
+    limit = concurrency if parallel else 1
+
+    async def try_offers(o_code: str, d_code: str, date_str: str):
         def do_get():
-            return amadeus.shopping.flight_offers_search.get(
+            return amadeus.get(
+                '/v2/shopping/flight-offers',
                 originLocationCode=o_code,
                 destinationLocationCode=d_code,
                 departureDate=date_str,
                 adults=adults,
             )
+
         try:
-            resp = retry_call(do_get, max_retries=2, backoff_sec=0.6)
+            resp = await retry_call(do_get, max_retries=2)
             return resp.data if isinstance(resp.data, list) else []
         except HTTPException:
             return []
 
-    def suggested_dates(o_code: str, d_code: str):
+    async def suggested_dates(o_code: str, d_code: str):
         try:
-            resp = retry_call(lambda: amadeus.shopping.flight_dates.get(origin=o_code, destination=d_code), max_retries=2, backoff_sec=0.6)
+            resp = await retry_call(lambda: amadeus.get(
+                '/v1/shopping/flight-dates', origin=o_code, destination=d_code), max_retries=2)
             arr = resp.data if isinstance(resp.data, list) else []
             out = []
             for item in arr:
@@ -439,8 +462,14 @@ def flight_offers_by_cities(
         except HTTPException:
             return []
 
-    origin_city_code, origin_airports = resolve_codes(originCity)
-    dest_city_code, dest_airports = resolve_codes(destinationCity)
+    # Resolve IATA codes from city names: prefer CITY code, also gather AIRPORT codes for
+    # fallback.
+    # Names the resolver index already knows cost no upstream call.
+    resolver = IataResolver(amadeus)
+    (origin_city_code, origin_airports), (dest_city_code, dest_airports) = await gather_limited([
+        lambda: resolver.resolve(originCity),
+        lambda: resolver.resolve(destinationCity),
+    ], limit)
 
     # Build attempt pairs: city→city, airport→airport (first), airport combos
     attempts = []
@@ -453,28 +482,50 @@ def flight_offers_by_cities(
     if origin_airports and dest_city_code:
         attempts.append((origin_airports[0], dest_city_code))
 
-    # First try requested date
-    for o_code, d_code in attempts:
-        data = try_offers(o_code, d_code, departure)
+    # First try requested date on every pair; the earliest pair with offers wins
+    idx, data = await first_non_empty(
+        [lambda o=o, d=d: try_offers(o, d, departure) for o, d in attempts], limit
+    )
+    if data:
+        o_code, d_code = attempts[idx]
+        meta = {"origin": o_code, "dest": d_code, "date": departure, "fallback": False}
+        return {"data": data, "meta": meta} if includeMeta else data
+
+    # Fallback to suggested dates near requested, still in pair order then date proximity.
+    # parallel=false walks one pair at a time and stops at the first offers, as before
+    if not parallel:
+        for o_code, d_code in attempts:
+            for d in _sort_by_proximity(await suggested_dates(o_code, d_code), departure)[:3]:
+                data = await try_offers(o_code, d_code, d)
+                if data:
+                    meta = {"origin": o_code, "dest": d_code, "date": d, "fallback": True}
+                    return {"data": data, "meta": meta} if includeMeta else data
+    else:
+        suggestions = await gather_limited(
+            [lambda o=o, d=d: suggested_dates(o, d) for o, d in attempts], limit
+        )
+        candidates = []
+        for (o_code, d_code), dates in zip(attempts, suggestions):
+            for d in _sort_by_proximity(dates, departure)[:3]:
+                candidates.append((o_code, d_code, d))
+        idx, data = await first_non_empty(
+            [lambda o=o, d=d, day=day: try_offers(o, d, day) for o, d, day in candidates], limit
+        )
         if data:
-            return ({"data": data, "meta": {"origin": o_code, "dest": d_code, "date": departure, "fallback": False}} if includeMeta else data)
-
-    # Fallback to suggested dates near requested
-    for o_code, d_code in attempts:
-        dates = suggested_dates(o_code, d_code)
-        if not dates:
-            continue
-        # sort by proximity to requested
-        try:
-            from datetime import datetime
-            req_dt = datetime.strptime(departure, "%Y-%m-%d")
-            dates = sorted(dates, key=lambda s: abs((datetime.strptime(s, "%Y-%m-%d") - req_dt).days))
-        except Exception:
-            pass
-        for d in dates[:3]:
-            data = try_offers(o_code, d_code, d)
-            if data:
-                return ({"data": data, "meta": {"origin": o_code, "dest": d_code, "date": d, "fallback": True}} if includeMeta else data)
+            o_code, d_code, d = candidates[idx]
+            meta = {"origin": o_code, "dest": d_code, "date": d, "fallback": True}
+            return {"data": data, "meta": meta} if includeMeta else data
 
     # If all attempts failed or returned empty, surface empty list for UX
-    return ({"data": [], "meta": {"origin": attempts[0][0] if attempts else None, "dest": attempts[0][1] if attempts else None, "date": departure, "fallback": True}} if includeMeta else [])
+    o_code, d_code = attempts[0] if attempts else (None, None)
+    meta = {"origin": o_code, "dest": d_code, "date": departure, "fallback": True}
+    return {"data": [], "meta": meta} if includeMeta else []
+
+
+def _sort_by_proximity(dates, departure: str):
+    try:
+        req_dt = datetime.strptime(departure, "%Y-%m-%d")
+        return sorted(dates,
+                      key=lambda s: abs((datetime.strptime(s, "%Y-%m-%d") - req_dt).days))
+    except Exception:
+        return dates
@@ -1,97 +1,183 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import text
-from ..db import engine
-import os, json, csv
+from .. import db
+from ..db import fetch_all, get_engine
+from ..utils import geo_tree
+from ..utils.geo_dump import (
+    GEO_DUMP_MAX_LIMIT, aiter_dump, cached_geo_version, decode_cursor, etag_matches, geo_version,
+    geo_version_async, iter_dump,
+)
+from ..utils.geo_index import get_geo_index
+from ..utils.geo_seed import seed_geo
+from ..utils.geo_suggest import SUGGEST_LIMIT_MAX, get_suggest_index
+from ..utils.jsoncodec import dumps
+from ..utils.geo_loader import GEO_BATCH_SIZE, iter_csv_rows, region_for_file
+import logging
+
+logger = logging.getLogger("geo_loader")
 
 router = APIRouter()
 
 REGION_FILES = [
-    "africa.json","america.json","asia.json","pacific.json","indian.json",
-    "europe.json","atlantic.json","australia.json","arctic.json"
+    "africa.json", "america.json", "asia.json", "pacific.json", "indian.json",
+    "europe.json", "atlantic.json", "australia.json", "arctic.json"
 ]
 
-def _fit(s: str, n: int = 255) -> str:
-    return (s or "")[:n]
+
+def _region_names():
+    return [region_for_file(rf) for rf in REGION_FILES]
+
 
 @router.post("/seed-regions")
+def seed_regions(
+    dirPath: str = Query("/app/doc/"),
+    source: str = Query("dataset", pattern="^(dataset|csv)$"),
+    batchSize: int = Query(GEO_BATCH_SIZE, ge=1, le=100000),
+    loadData: bool = Query(False),
+):
+    # Rows come from the compiled dataset (or the raw CSVs in dirPath) and go out as multi-row
+    # INSERTs or LOAD DATA LOCAL INFILE, in one transaction
+    regions = _region_names()
+    rows = iter_csv_rows(dirPath, regions) if source == "csv" else None
+    result = seed_geo(get_engine(), regions, rows=rows, force=True, batch_size=batchSize,
+                      use_load_data=loadData)
+    if result["status"] != "seeded":
+        raise HTTPException(status_code=409, detail="Geo seeding already in progress")
+    logger.info("geo seed finished: %s", result)
+    return {**result, "source": source}
+
 
+REGIONS_SQL = text("SELECT id, name FROM regions ORDER BY name")
+COUNTRIES_SQL = text("SELECT id, name FROM countries WHERE region_id = :rid ORDER BY name")
+CITIES_SQL = text(
+    "SELECT id, name, is_capital FROM cities WHERE country_id = :cid ORDER BY is_capital DESC, name"
+)
 
-def seed_regions(dirPath: str = Query("/app/doc/")):
-    with engine.begin() as conn:
-        # Clear existing data
-        conn.execute(text("DELETE FROM cities"))
-        conn.execute(text("DELETE FROM countries"))
-        conn.execute(text("DELETE FROM regions"))
-        # Insert regions from list
-        regions_map = {}
-        for rf in REGION_FILES:
-            name = rf.split(".")[0].capitalize() if rf != 'america.json' else 'America'
-            conn.execute(text("INSERT INTO regions (name) VALUES (:n)"), {"n": name})
-        rows = conn.execute(text("SELECT id,name FROM regions")).mappings().all()
-        regions_map = {r['name']: r['id'] for r in rows}
-
-        # For each region file, parse and insert countries/cities
-        for rf in os.listdir(dirPath):
-            if not rf.endswith('.csv'):
-                continue
-            region_name = rf.split(".")[0].capitalize() if rf != 'america.csv' else 'America'
-            rid = regions_map.get(region_name)
-            if not rid:
-                continue
-            path = os.path.join(dirPath, rf)
-            if not os.path.exists(path):
-                continue
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f, delimiter=';')
-                    debug_rows = []
-                    for i, row in enumerate(reader):
-                        if i < 5:
-                            debug_rows.append(dict(row))
-                        country_name = _fit(row.get('Country name EN') or row.get('country') or row.get('Country') or region_name)
-                        city_name = _fit(row.get('Name') or row.get('name'))
-                        if not country_name or not city_name:
-                            continue
-                        conn.execute(text("INSERT IGNORE INTO countries (region_id, name) VALUES (:rid, :n)"), {"rid": rid, "n": country_name})
-                        crow = conn.execute(text("SELECT id FROM countries WHERE region_id=:rid AND name=:n"), {"rid": rid, "n": country_name}).fetchone()
-                        if not crow:
-                            continue
-                        country_id = int(crow[0])
-                        conn.execute(text("INSERT IGNORE INTO cities (country_id, name, is_capital) VALUES (:cid, :n, 0)"), {"cid": country_id, "n": city_name})
-                    print(f"[DEBUG] First 5 rows from {rf}: {debug_rows}")
-            except Exception as e:
-                print(f"[ERROR] Failed to parse {rf}: {e}")
-    return {"status": "seeded"}
+
+async def _geo_tree():
+    # The loaded tree costs nothing to check; loading one runs in the threadpool
+    tree = geo_tree.peek_geo_tree()
+    if tree is None and geo_tree.GEO_TREE_CACHE:
+        tree = await run_in_threadpool(geo_tree.get_geo_tree, get_engine())
+    return tree
 
 
 @router.get("/regions")
-def list_regions():
-    with engine.connect() as conn:
-        rows = conn.execute(text("SELECT id, name FROM regions ORDER BY name")).mappings().all()
-        return [{"id": r['id'], "name": r['name']} for r in rows]
+async def list_regions():
+    tree = await _geo_tree()
+    if tree is not None:
+        return Response(content=tree.regions, media_type="application/json")
+    rows = await fetch_all(REGIONS_SQL)
+    return [{"id": r['id'], "name": r['name']} for r in rows]
 
 
 @router.get("/countries")
-def list_countries(region_id: int = Query(...)):
-    with engine.connect() as conn:
-        rows = conn.execute(text("SELECT id, name FROM countries WHERE region_id = :rid ORDER BY name"), {"rid": region_id}).mappings().all()
-        return [{"id": r['id'], "name": r['name']} for r in rows]
+async def list_countries(region_id: int = Query(...)):
+    tree = await _geo_tree()
+    if tree is not None:
+        return Response(content=tree.countries.get(region_id, b"[]"), media_type="application/json")
+    rows = await fetch_all(COUNTRIES_SQL, {"rid": region_id})
+    return [{"id": r['id'], "name": r['name']} for r in rows]
 
 
 @router.get("/cities")
-def list_cities(country_id: int = Query(...)):
-    with engine.connect() as conn:
-        rows = conn.execute(text("SELECT id, name, is_capital FROM cities WHERE country_id = :cid ORDER BY is_capital DESC, name"), {"cid": country_id}).mappings().all()
-        return [{"id": r['id'], "name": r['name'], "is_capital": int(r['is_capital'])} for r in rows]
+async def list_cities(country_id: int = Query(...)):
+    tree = await _geo_tree()
+    if tree is not None:
+        return Response(content=tree.cities.get(country_id, b"[]"), media_type="application/json")
+    rows = await fetch_all(CITIES_SQL, {"cid": country_id})
+    return [{"id": r['id'], "name": r['name'], "is_capital": int(r['is_capital'])} for r in rows]
+
 
 @router.get("/dump")
-def dump_geo():
-    with engine.connect() as conn:
-        regions = conn.execute(text("SELECT id, name FROM regions ORDER BY name")).mappings().all()
-        countries = conn.execute(text("SELECT id, region_id, name FROM countries ORDER BY name")).mappings().all()
-        cities = conn.execute(text("SELECT id, country_id, name, is_capital FROM cities ORDER BY name")).mappings().all()
-        return {
-            "regions": [{"id": r["id"], "name": r["name"]} for r in regions],
-            "countries": [{"id": c["id"], "region_id": c["region_id"], "name": c["name"]} for c in countries],
-            "cities": [{"id": c["id"], "country_id": c["country_id"], "name": c["name"], "is_capital": int(c["is_capital"]) } for c in cities],
-        }
+async def dump_geo(
+    request: Request,
+    region_id: int | None = Query(None),
+    country_id: int | None = Query(None),
+    after: str | None = Query(None, description="Cursor from the previous page's \"next\""),
+    limit: int | None = Query(None, ge=1, le=GEO_DUMP_MAX_LIMIT),
+    fmt: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+):
+    # Repeat loads revalidate against the cached dataset version and get a 304 without a query
+    version = cached_geo_version()
+    if version is None:
+        if db.DB_ASYNC:
+            version = await geo_version_async(db.get_async_engine())
+        else:
+            version = await run_in_threadpool(geo_version, get_engine())
+    etag = f'"geo-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    try:
+        cursor = decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    ndjson = fmt == "ndjson"
+    options = dict(region_id=region_id, country_id=country_id, after=cursor, limit=limit,
+                   ndjson=ndjson)
+    # A sync generator is iterated in the threadpool by StreamingResponse, an async one on the loop
+    if db.DB_ASYNC:
+        body = aiter_dump(db.get_async_engine(), **options)
+    else:
+        body = iter_dump(get_engine(), **options)
+    return StreamingResponse(
+        body,
+        media_type="application/x-ndjson" if ndjson else "application/json",
+        headers=headers,
+    )
+
+
+@router.get("/nearest")
+async def nearest_cities(
+    latitude: float = Query(40.41436995, ge=-90, le=90),
+    longitude: float = Query(-3.69170868, ge=-180, le=180),
+    k: int = Query(10, ge=1, le=500),
+):
+    # A cold index is built in the threadpool, not on the event loop
+    index = await run_in_threadpool(get_geo_index)
+    places = [index.place(row, distance_km=d) for d, row in index.nearest(latitude, longitude, k)]
+    return Response(content=dumps(places), media_type="application/json")
+
+
+@router.get("/within")
+async def cities_within(
+    north: float = Query(41.397158, ge=-90, le=90),
+    west: float = Query(2.160873, ge=-180, le=180),
+    south: float = Query(41.394582, ge=-90, le=90),
+    east: float = Query(2.177181, ge=-180, le=180),
+    limit: int = Query(100, ge=1, le=5000),
+):
+    # A cold index is built in the threadpool, not on the event loop
+    index = await run_in_threadpool(get_geo_index)
+    places = [index.place(row) for row in index.within(north, west, south, east, limit)]
+    return Response(content=dumps(places), media_type="application/json")
+
+
+@router.get("/suggest")
+async def suggest_places(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=SUGGEST_LIMIT_MAX),
+):
+    # A cold index is built in the threadpool, not on the event loop
+    index = await run_in_threadpool(get_suggest_index)
+    hits, fuzzy = index.suggest(q, limit)
+    match = "fuzzy" if fuzzy else "prefix"
+    places = [{**index.describe(entity), "match": match} for entity in hits]
+    return Response(content=dumps(places), media_type="application/json")
+
+
+async def seed_geo_on_startup():
+    # Skips itself when the recorded checksum matches the dataset or another worker is seeding
+    result = await run_in_threadpool(seed_geo, get_engine(), _region_names())
+    logger.info("startup geo seed: %s", result)
+    keys = ("status", "reason", "digest", "cities", "seconds")
+    return {k: result[k] for k in keys if k in result}
+
+
+async def warm_geo_index():
+    # Built off the event loop; compiles the dataset first if it is missing
+    await run_in_threadpool(get_geo_index)
+    await run_in_threadpool(get_suggest_index)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from ..utils.lifecycle import LIFECYCLE
+
+router = APIRouter()
+
+
+@router.get("/health")
+def health():
+    # Full report: liveness, readiness and the state of every startup component
+    return LIFECYCLE.report()
+
+
+@router.get("/health/live")
+def liveness():
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+def readiness():
+    report = LIFECYCLE.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
@@ -0,0 +1,312 @@
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Dict
+
+from fastapi import HTTPException
+
+from .rate_limit import (
+    RETRY_429, RETRY_429_BACKOFF, RETRY_AFTER_MAX, RateLimits, get_rate_limits, retry_after_seconds,
+)
+from .resilience import Breakers, get_breakers, time_left
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger("amadeus_logger")
+
+HOSTS = {
+    "test": "https://test.api.amadeus.com",
+    "production": "https://api.amadeus.com",
+}
+TOKEN_PATH = "/v1/security/oauth2/token"
+
+# Refresh the shared token this many seconds before Amadeus expires it
+TOKEN_REFRESH_MARGIN = int(os.getenv("AMADEUS_TOKEN_REFRESH_MARGIN", "60"))
+POOL_SIZE = int(os.getenv("AMADEUS_POOL_SIZE", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("AMADEUS_KEEPALIVE_EXPIRY", "30"))
+TIMEOUT = float(os.getenv("AMADEUS_TIMEOUT", "15"))
+
+
+class GatewayResponse:
+    def __init__(self, status_code: int | None, headers: Dict[str, str] | None = None,
+                 body: str | None = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.body = body
+        self.result: Any = None
+        self.data: Any = None
+        if body:
+            try:
+                self.result = json.loads(body)
+            except ValueError:
+                self.result = None
+        if isinstance(self.result, dict) and "data" in self.result:
+            self.data = self.result["data"]
+        else:
+            self.data = self.result
+
+
+class ResponseError(Exception):
+    # Mirrors amadeus.ResponseError: the failed response is kept on `.response`
+    def __init__(self, response: GatewayResponse):
+        self.response = response
+        super().__init__(f"[{response.status_code}] {response.body}")
+
+
+class NetworkError(ResponseError):
+    pass
+
+
+class CircuitOpen(ResponseError):
+    # The endpoint's breaker is open: refused without calling upstream
+    pass
+
+
+class DeadlineExceeded(ResponseError):
+    # The request's deadline ran out before or during the call
+    pass
+
+
+def is_retriable(err: Exception) -> bool:
+    """Worth another attempt: network failures and 5xx, but not a refusal by the breaker or
+    the deadline."""
+    if isinstance(err, (CircuitOpen, DeadlineExceeded)) or not isinstance(err, ResponseError):
+        return False
+    if isinstance(err, NetworkError):
+        return True
+    status = err.response.status_code
+    return status is not None and int(status) >= 500
+
+
+class AmadeusGateway:
+    """Async Amadeus client: one pooled keep-alive session and one OAuth token per process."""
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        base_url: str,
+        pool_size: int = POOL_SIZE,
+        timeout: float = TIMEOUT,
+        transport: "httpx.AsyncBaseTransport | None" = None,
+        limits: RateLimits | None = None,
+        breakers: Breakers | None = None,
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._transport = transport
+        # Per-family rate limits; None sends calls as fast as they come (tests, benchmarks)
+        self.limits = limits
+        # Per-endpoint circuit breakers; None never refuses a call
+        self.breakers = breakers
+        self._client: "httpx.AsyncClient | None" = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._closing: set = set()
+        self._token_lock: asyncio.Lock | None = None
+        self._token: str | None = None
+        self._token_expires_at = 0.0
+        self.token_fetches = 0
+        self.throttled = 0
+
+    def _http(self) -> "httpx.AsyncClient":
+        # httpx is imported on the first upstream call rather than with the app (~50 ms).
+        # Pooled connections belong to the loop that opened them; under uvicorn there is a
+        # single loop, but test clients may spin up a fresh one per request.
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            if self._client is not None:
+                self._retire(self._client, self._loop, loop)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+                transport=self._transport,
+            )
+            self._loop = loop
+            self._token_lock = asyncio.Lock()
+        return self._client
+
+    def _retire(self, client: "httpx.AsyncClient", old_loop: asyncio.AbstractEventLoop | None,
+                loop: asyncio.AbstractEventLoop) -> None:
+        # A client replaced for a new loop is closed rather than dropped: on its own loop when
+        # that one still runs (another thread), otherwise from the new one
+        if old_loop is not None and old_loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._close_client(client), old_loop)
+        else:
+            task = loop.create_task(self._close_client(client))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_client(client: "httpx.AsyncClient") -> None:
+        try:
+            await client.aclose()
+        except RuntimeError:
+            # The client was opened on a loop that is already closed
+            pass
+
+    def _token_valid(self) -> bool:
+        if self._token is None:
+            return False
+        return time.time() + TOKEN_REFRESH_MARGIN < self._token_expires_at
+
+    async def _access_token(self) -> str:
+        import httpx
+
+        http = self._http()
+        if self._token_valid():
+            return self._token
+        async with self._token_lock:
+            # Another request may have refreshed the token while we waited
+            if self._token_valid():
+                return self._token
+            try:
+                resp = await http.post(TOKEN_PATH, data={
+                    "grant_type": "client_credentials",
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                })
+            except httpx.TransportError as err:
+                raise NetworkError(GatewayResponse(None, body=str(err))) from err
+            if resp.status_code != 200:
+                response = GatewayResponse(resp.status_code, dict(resp.headers), resp.text)
+                raise ResponseError(response)
+            payload = resp.json()
+            self._token = payload.get("access_token")
+            self._token_expires_at = time.time() + int(payload.get("expires_in", 0))
+            self.token_fetches += 1
+            logger.debug("Amadeus token refreshed, expires in %ss", payload.get("expires_in"))
+            return self._token
+
+    def invalidate_token(self) -> None:
+        self._token = None
+        self._token_expires_at = 0.0
+
+    async def get(self, path: str, **params: Any) -> GatewayResponse:
+        left = time_left()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded(GatewayResponse(504, body=f"deadline exceeded before {path}"))
+        breaker = self.breakers.for_path(path) if self.breakers is not None else None
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpen(GatewayResponse(503, body=f"circuit open for {path}"))
+        ok = None
+        try:
+            result = await self._get(path, params)
+            ok = result.status_code < 500
+        except DeadlineExceeded:
+            raise
+        except ResponseError as err:
+            ok = not (isinstance(err, NetworkError) or (err.response.status_code or 0) >= 500)
+            raise
+        finally:
+            if breaker is not None:
+                breaker.record(ok)
+        if result.status_code >= 400:
+            raise ResponseError(result)
+        return result
+
+    async def _get(self, path: str, params: Dict[str, Any]) -> GatewayResponse:
+        import httpx
+
+        http = self._http()
+        refreshed = False
+        throttled = 0
+        while True:
+            if self.limits is not None:
+                await self.limits.acquire(path)
+            token = await self._access_token()
+            request = http.get(path, params=params, headers={"Authorization": f"Bearer {token}"})
+            # Each attempt is also cut at what is left of the request's deadline
+            left = time_left()
+            try:
+                if left is not None:
+                    request = asyncio.wait_for(request, max(0.0, left))
+                resp = await request
+            except asyncio.TimeoutError as err:
+                response = GatewayResponse(504, body=f"deadline exceeded during {path}")
+                raise DeadlineExceeded(response) from err
+            except httpx.TransportError as err:
+                raise NetworkError(GatewayResponse(None, body=str(err))) from err
+            # A revoked token is retried once with a fresh one
+            if resp.status_code == 401 and not refreshed:
+                self.invalidate_token()
+                refreshed = True
+                continue
+            if resp.status_code == 429:
+                retry_after = retry_after_seconds(resp.headers.get("retry-after"))
+                # Without Retry-After: exponential backoff with jitter so callers spread out
+                delay = retry_after if retry_after is not None else (
+                    RETRY_429_BACKOFF * (2 ** throttled) * (0.5 + random.random() / 2)
+                )
+                # Every 429 pauses the family and is counted, whether or not this call retries
+                self.throttled += 1
+                if self.limits is not None:
+                    self.limits.throttled_by_upstream(path, retry_after, delay)
+                if throttled < RETRY_429 and delay <= RETRY_AFTER_MAX:
+                    throttled += 1
+                    left = time_left()
+                    if left is None or delay < left:
+                        logger.debug("Amadeus 429 on %s, retrying in %.2fs", path, delay)
+                        await asyncio.sleep(delay)
+                        continue
+            break
+        return GatewayResponse(resp.status_code, dict(resp.headers), resp.text)
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        closing = [t for t in self._closing if t.get_loop() is loop]
+        if closing:
+            await asyncio.gather(*closing, return_exceptions=True)
+        if self._client is not None:
+            await self._close_client(self._client)
+        self._client = None
+        self._loop = None
+
+
+_gateway: AmadeusGateway | None = None
+
+
+def base_url_from_env() -> str:
+    override = os.getenv("AMADEUS_BASE_URL", "")
+    if override:
+        return override
+    host_env = os.getenv("AMADEUS_HOST", "test").lower()
+    if host_env in ("production", "prod"):
+        return HOSTS["production"]
+    return HOSTS["test"]
+
+
+def get_gateway() -> AmadeusGateway:
+    global _gateway
+    if _gateway is not None:
+        return _gateway
+    client_id = os.getenv("AMADEUS_CLIENT_ID", "")
+    client_secret = os.getenv("AMADEUS_CLIENT_SECRET", "")
+    if not client_id or not client_secret:
+        raise HTTPException(status_code=500, detail="Amadeus credentials not configured")
+    _gateway = AmadeusGateway(client_id, client_secret, base_url_from_env(),
+                              limits=get_rate_limits(), breakers=get_breakers())
+    return _gateway
+
+
+def set_gateway(gateway: AmadeusGateway | None) -> None:
+    global _gateway
+    _gateway = gateway
+
+
+async def close_gateway() -> None:
+    if _gateway is not None:
+        await _gateway.aclose()
@@ -0,0 +1,254 @@
+import csv
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, IO, Iterable, Iterator, List, Tuple
+
+from .amadeus_gateway import ResponseError, is_retriable
+from .iata_resolver import IataResolver
+from .jsoncodec import loads
+from .rate_limit import TokenBucket
+from .resilience import retry
+
+logger = logging.getLogger("amadeus_logger")
+
+JOB_FIELDS = ("origin", "destination", "date")
+
+
+class LimitedClient:
+    """Gateway wrapper: every upstream call first takes a token from the batch-wide bucket (on
+    top of the gateway's per-family limits) and is retried on network errors and 5xx with
+    full-jitter backoff."""
+
+    def __init__(self, gateway, limiter: TokenBucket, max_retries: int = 2,
+                 backoff_sec: float = 0.6):
+        self.gateway = gateway
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff_sec = backoff_sec
+        self.calls = 0
+        self.errors = 0
+
+    async def get(self, path: str, **params: Any):
+        async def attempt():
+            await self.limiter.acquire()
+            self.calls += 1
+            try:
+                return await self.gateway.get(path, **params)
+            except ResponseError:
+                self.errors += 1
+                raise
+
+        return await retry(attempt, is_retriable, max_retries=self.max_retries,
+                           base=self.backoff_sec)
+
+    async def data(self, path: str, **params: Any) -> list:
+        """The response's `data` list, or [] when the call fails or returns something else."""
+        try:
+            resp = await self.get(path, **params)
+        except ResponseError:
+            return []
+        return resp.data if isinstance(resp.data, list) else []
+
+
+def sort_by_proximity(dates: List[str], departure: str) -> List[str]:
+    try:
+        req_dt = datetime.strptime(departure, "%Y-%m-%d")
+        return sorted(dates, key=lambda s: abs((datetime.strptime(s, "%Y-%m-%d") - req_dt).days))
+    except ValueError:
+        return dates
+
+
+def read_jobs(stream: IO[str], fmt: str = "auto") -> Iterator[Dict[str, Any]]:
+    """Search jobs from CSV (header with origin,destination,date[,adults][,id]) or NDJSON (one
+    object per line with the same keys). Every job gets a "line" number to match its result;
+    a line that cannot be used comes back as a job carrying an "error"."""
+    if fmt == "auto":
+        first = stream.readline()
+        while first and not first.strip():
+            first = stream.readline()
+        fmt = "ndjson" if first.lstrip().startswith("{") else "csv"
+        lines: Iterable[str] = _chain([first], stream)
+    else:
+        lines = stream
+
+    if fmt == "csv":
+        rows = ((i, row) for i, row in enumerate(csv.DictReader(lines), start=2))
+    else:
+        def parsed():
+            for i, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = loads(line)
+                except ValueError as e:
+                    yield i, {"error": f"invalid JSON: {e}"}
+                    continue
+                yield i, row if isinstance(row, dict) else {"error": "not a JSON object"}
+        rows = parsed()
+
+    for line, row in rows:
+        job: Dict[str, Any] = {"line": line}
+        if row.get("id") not in (None, ""):
+            job["id"] = row["id"]
+        missing = [f for f in JOB_FIELDS if not str(row.get(f) or "").strip()]
+        if "error" in row or missing:
+            job["error"] = row.get("error") or f"missing {', '.join(missing)}"
+            yield job
+            continue
+        job.update({f: str(row[f]).strip() for f in JOB_FIELDS})
+        try:
+            job["adults"] = int(row.get("adults") or 1)
+        except (TypeError, ValueError):
+            job["error"] = f"invalid adults: {row.get('adults')!r}"
+        yield job
+
+
+def _chain(head: List[str], rest: Iterable[str]) -> Iterator[str]:
+    yield from head
+    yield from rest
+
+
+class BatchSearch:
+    """Runs flight searches for many city pairs with `workers` concurrent searches, all sharing
+    one rate limit and one IATA resolver (each distinct city is resolved once per batch, and
+    not at all when the resolver index already knows it); results are yielded as they finish.
+
+    Each search follows the scripts' strategy: city→city, then airport→airport and mixed pairs
+    on the requested date, then up to `fallback_dates` provider-suggested dates closest to it.
+    """
+
+    def __init__(self, gateway, workers: int = 8, rate: float = 10.0, burst: int = 1,
+                 fallback_dates: int = 3, include_offers: bool = False):
+        self.workers = max(1, workers)
+        self.client = LimitedClient(gateway, TokenBucket(rate, burst))
+        self.resolver = IataResolver(self.client)
+        self.fallback_dates = fallback_dates
+        self.include_offers = include_offers
+        self.done = 0
+        self.found = 0
+        self.failed = 0
+
+    async def _offers(self, o_code: str, d_code: str, date: str, adults: int) -> list:
+        return await self.client.data("/v2/shopping/flight-offers", originLocationCode=o_code,
+                                      destinationLocationCode=d_code, departureDate=date,
+                                      adults=adults)
+
+    async def search(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = {k: job[k] for k in ("line", "id", "origin", "destination", "date") if k in job}
+        if "error" in job:
+            return {**result, "status": "invalid", "error": job["error"]}
+        (o_city, o_airports), (d_city, d_airports) = await asyncio.gather(
+            self.resolver.resolve(job["origin"]), self.resolver.resolve(job["destination"])
+        )
+        attempts: List[Tuple[str, str]] = []
+        if o_city and d_city:
+            attempts.append((o_city, d_city))
+        if o_airports and d_airports:
+            attempts.append((o_airports[0], d_airports[0]))
+        if o_city and d_airports:
+            attempts.append((o_city, d_airports[0]))
+        if o_airports and d_city:
+            attempts.append((o_airports[0], d_city))
+        attempts = list(dict.fromkeys(attempts))
+
+        data, used, fallback = [], None, False
+        for o_code, d_code in attempts:
+            data = await self._offers(o_code, d_code, job["date"], job["adults"])
+            if data:
+                used = (o_code, d_code, job["date"])
+                break
+        if not data and self.fallback_dates:
+            fallback = True
+            for o_code, d_code in attempts:
+                suggested = await self.client.data("/v1/shopping/flight-dates",
+                                                   origin=o_code, destination=d_code)
+                dates = [d for d in (i.get("departureDate") or i.get("date") for i in suggested)
+                         if isinstance(d, str)]
+                for date in sort_by_proximity(dates, job["date"])[:self.fallback_dates]:
+                    data = await self._offers(o_code, d_code, date, job["adults"])
+                    if data:
+                        used = (o_code, d_code, date)
+                        break
+                if data:
+                    break
+        if used is None and attempts:
+            used = (attempts[0][0], attempts[0][1], job["date"])
+
+        result.update({
+            "status": "found" if data else ("unresolved" if not attempts else "empty"),
+            "count": len(data),
+            "sample_price": ((data[0].get("price") or {}).get("total")
+                             if data and isinstance(data[0], dict) else None),
+            "used_origin": used[0] if used else None,
+            "used_dest": used[1] if used else None,
+            "used_date": used[2] if used else None,
+            "fallback": fallback,
+            "seconds": round(time.perf_counter() - started, 3),
+        })
+        if self.include_offers:
+            result["offers"] = data
+        return result
+
+    async def run(self, jobs: Iterable[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Results in completion order. Jobs are pulled from `jobs` only as workers free up, so
+        a large input file is never held in memory."""
+        pending: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+        results: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        async def feed():
+            for job in jobs:
+                await pending.put(job)
+            for _ in range(self.workers):
+                await pending.put(None)
+
+        async def work():
+            while (job := await pending.get()) is not None:
+                try:
+                    result = await self.search(job)
+                except Exception as e:  # one bad search must not stop the sweep
+                    logger.exception("batch search failed for line %s", job.get("line"))
+                    keys = ("line", "id", "origin", "destination", "date")
+                    result = {k: job[k] for k in keys if k in job}
+                    result.update(status="error", error=f"{type(e).__name__}: {e}")
+                await results.put(result)
+
+        async def supervise():
+            tasks = [asyncio.ensure_future(feed())]
+            tasks += [asyncio.ensure_future(work()) for _ in range(self.workers)]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # An unreadable input stops the workers too
+                for task in tasks:
+                    task.cancel()
+                await results.put(finished)
+
+        supervisor = asyncio.ensure_future(supervise())
+        try:
+            while (result := await results.get()) is not finished:
+                self.done += 1
+                if result["status"] == "found":
+                    self.found += 1
+                elif result["status"] in ("invalid", "error"):
+                    self.failed += 1
+                yield result
+            await supervisor
+        finally:
+            if not supervisor.done():
+                supervisor.cancel()
+                await asyncio.gather(supervisor, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "jobs": self.done,
+            "found": self.found,
+            "failed": self.failed,
+            "upstream_calls": self.client.calls,
+            "upstream_errors": self.client.errors,
+            "rate_limited_seconds": round(self.client.limiter.waited, 3),
+            **self.resolver.stats(),
+        }
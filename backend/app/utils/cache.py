@@ -1,44 +1,348 @@
 import os
-import json
 import time
+import asyncio
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
+
+from .cache_backends import CacheBackend, backend_from_env
+from .jsoncodec import CODEC, dumps, loads
 
 CACHE_DIR = Path(__file__).resolve().parents[1] / "cache"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 DEFAULT_TTL = int(os.getenv("CACHE_DEFAULT_TTL", "300"))  # seconds
-MEM_CACHE: Dict[str, Dict[str, Any]] = {}
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_SWEEP_INTERVAL = float(os.getenv("CACHE_SWEEP_INTERVAL", "60"))  # seconds
 
 
-def _cache_path(key: str) -> Path:
-    safe = key.replace("/", "_").replace("?", "_").replace("&", "_").replace("=", "_")
-    return CACHE_DIR / f"{safe}.json"
+class _Entry:
+    __slots__ = ("payload", "ts", "ttl", "stale_ttl", "size")
 
+    def __init__(self, payload: Any, ts: float, ttl: float, size: int, stale_ttl: float = 0):
+        self.payload = payload
+        self.ts = ts
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.size = size
 
-def get_cache(key: str, ttl: int = DEFAULT_TTL) -> Any | None:
-    # In-memory first
-    mem = MEM_CACHE.get(key)
-    if mem:
-        if time.time() - mem.get("_ts", 0) <= ttl:
-            return mem.get("payload")
-    p = _cache_path(key)
-    if not p.exists():
-        return None
+    def fresh(self, now: float) -> bool:
+        return now - self.ts <= self.ttl
+
+    def expired(self, now: float) -> bool:
+        # Stale entries are retained for `stale_ttl` past freshness, then dropped
+        return now - self.ts > self.ttl + self.stale_ttl
+
+
+class MemoryCache:
+    """In-process LRU tier bounded by entry count and payload bytes.
+
+    Each entry keeps the TTL it was written with, plus an optional stale window during which it
+    is only returned by `get_entry`; expired entries are dropped on read and by a background
+    sweeper thread.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def get(self, key: str) -> Any | None:
+        hit = self.get_entry(key, stale_ok=False)
+        return hit[0] if hit is not None else None
+
+    def get_entry(self, key: str, stale_ok: bool = True) -> Tuple[Any, float, float] | None:
+        """Return (payload, age, ttl) for a fresh or stale entry, None if absent or expired.
+
+        With `stale_ok=False` a stale entry is a miss, as it is to a caller that only serves
+        fresh payloads.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expired(now):
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if not stale_ok and not entry.fresh(now):
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            if entry.fresh(now):
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return entry.payload, now - entry.ts, entry.ttl
+
+    def set(self, key: str, payload: Any, ttl: float, size: int, ts: float | None = None,
+            stale_ttl: float = 0) -> None:
+        # Entries larger than the whole tier are never admitted
+        if size > self.max_bytes:
+            self.delete(key)
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            ts = ts if ts is not None else time.time()
+            self._data[key] = _Entry(payload, ts, ttl, size, stale_ttl)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            stale = [k for k, e in self._data.items() if e.expired(now)]
+            for k in stale:
+                self._remove(k)
+            self.expirations += len(stale)
+        return len(stale)
+
+    def _remove(self, key: str) -> None:
+        entry = self._data.pop(key)
+        self._bytes -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+MEM_CACHE = MemoryCache()
+BACKEND_STATS = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+_backend: CacheBackend | None = None
+_backend_lock = threading.Lock()
+_sweeper: threading.Thread | None = None
+_sweeper_lock = threading.Lock()
+
+
+def get_backend() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = backend_from_env(CACHE_DIR, DEFAULT_TTL)
+    return _backend
+
+
+def set_backend(backend: CacheBackend | None) -> None:
+    global _backend
+    _backend = backend
+
+
+def _sweep_forever() -> None:
+    while True:
+        time.sleep(CACHE_SWEEP_INTERVAL)
+        MEM_CACHE.purge_expired()
+
+
+def _ensure_sweeper() -> None:
+    # Started on first write rather than at import time
+    global _sweeper
+    if _sweeper is not None:
+        return
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(target=_sweep_forever, name="cache-sweeper", daemon=True)
+            _sweeper.start()
+
+
+def get_cache(key: str) -> Any | None:
+    raw = get_cache_raw(key)
+    return loads(raw) if raw is not None else None
+
+
+def get_cache_raw(key: str) -> bytes | None:
+    """Encoded JSON of a fresh entry, ready to send as a response body."""
+    hit = get_cache_entry(key, stale_ok=False)
+    return hit[0] if hit is not None else None
+
+
+def get_cache_entry(key: str, stale_ok: bool = True) -> Tuple[bytes, float, float] | None:
+    """(encoded payload, age, ttl) for an entry that is fresh or, with `stale_ok`, still
+    inside its stale window."""
+    # In-memory first, then the shared backend
+    hit = MEM_CACHE.get_entry(key, stale_ok)
+    if hit is not None:
+        return hit
+    return _backend_entry(key, stale_ok)
+
+
+def _backend_entry(key: str, stale_ok: bool) -> Tuple[bytes, float, float] | None:
     try:
-        data = json.loads(p.read_text())
-        ts = data.get("_ts", 0)
-        if time.time() - ts > ttl:
-            return None
-        payload = data.get("payload")
-        MEM_CACHE[key] = {"_ts": ts, "payload": payload}
-        return payload
+        record = get_backend().get(key)
     except Exception:
+        BACKEND_STATS["errors"] += 1
+        return None
+    if record is None:
+        BACKEND_STATS["misses"] += 1
+        return None
+    ts, ttl, stale_ttl, raw = record
+    age = time.time() - ts
+    if age > ttl + stale_ttl:
+        BACKEND_STATS["misses"] += 1
+        return None
+    MEM_CACHE.set(key, raw, ttl, len(raw), ts=ts, stale_ttl=stale_ttl)
+    _ensure_sweeper()
+    if not stale_ok and age > ttl:
+        BACKEND_STATS["misses"] += 1
         return None
+    BACKEND_STATS["hits"] += 1
+    return raw, age, ttl
+
+
+def set_cache(key: str, payload: Any, ttl: int = DEFAULT_TTL, stale_ttl: int = 0) -> bytes:
+    raw = dumps(payload)
+    set_cache_raw(key, raw, ttl=ttl, stale_ttl=stale_ttl)
+    return raw
+
+
+def set_cache_raw(key: str, raw: bytes, ttl: int = DEFAULT_TTL, stale_ttl: int = 0) -> None:
+    # Payloads are stored encoded once; both tiers hold the same bytes
+    now = time.time()
+    MEM_CACHE.set(key, raw, ttl, len(raw), ts=now, stale_ttl=stale_ttl)
+    _ensure_sweeper()
+    _backend_set(key, now, ttl, stale_ttl, raw)
+
+
+def _backend_set(key: str, ts: float, ttl: int, stale_ttl: int, raw: bytes) -> None:
+    try:
+        get_backend().set(key, ts, ttl, stale_ttl, raw)
+        BACKEND_STATS["writes"] += 1
+    except Exception:
+        # The memory tier still holds the entry; a backend outage must not fail the request
+        BACKEND_STATS["errors"] += 1
+
+
+# Async variants for the event loop: the memory tier is read and written in place, the backend
+# (file, SQLite or Redis I/O) in a worker thread
+
 
+async def aget_cache(key: str) -> Any | None:
+    raw = await aget_cache_raw(key)
+    return loads(raw) if raw is not None else None
 
-def set_cache(key: str, payload: Any) -> None:
+
+async def aget_cache_raw(key: str) -> bytes | None:
+    hit = await aget_cache_entry(key, stale_ok=False)
+    return hit[0] if hit is not None else None
+
+
+async def aget_cache_entry(key: str, stale_ok: bool = True) -> Tuple[bytes, float, float] | None:
+    hit = MEM_CACHE.get_entry(key, stale_ok)
+    if hit is not None:
+        return hit
+    return await asyncio.to_thread(_backend_entry, key, stale_ok)
+
+
+async def aset_cache(key: str, payload: Any, ttl: int = DEFAULT_TTL, stale_ttl: int = 0) -> bytes:
+    raw = dumps(payload)
     now = time.time()
-    MEM_CACHE[key] = {"_ts": now, "payload": payload}
-    p = _cache_path(key)
-    p.write_text(json.dumps({"_ts": now, "payload": payload}, ensure_ascii=False))
+    MEM_CACHE.set(key, raw, ttl, len(raw), ts=now, stale_ttl=stale_ttl)
+    _ensure_sweeper()
+    await asyncio.to_thread(_backend_set, key, now, ttl, stale_ttl, raw)
+    return raw
+
+
+def cache_stats() -> Dict[str, Any]:
+    backend = get_backend()
+    try:
+        details = backend.stats()
+    except Exception:
+        details = {}
+    return {
+        "codec": CODEC,
+        "memory": MEM_CACHE.stats(),
+        "backend": {"name": backend.name, **BACKEND_STATS, **details},
+    }
+
+
+class SharedGeneration:
+    """A counter kept in the shared backend so every worker sees when a dataset was replaced.
+
+    `bump()` is called by whoever rewrites the data; `current()` re-reads the backend at most
+    every `check_interval` seconds, so readers pay one backend lookup per interval, not per
+    request. The bumping worker sees its own bump immediately.
+    """
+
+    # Long enough to never expire in practice; purge_expired must not drop the counter
+    TTL = 10 * 365 * 24 * 3600
+
+    def __init__(self, key: str, check_interval: float = 2.0):
+        self.key = key
+        self.check_interval = check_interval
+        self._value = 0
+        self._checked = float("-inf")
+        self._lock = threading.Lock()
+
+    def _read(self) -> int:
+        record = get_backend().get(self.key)
+        return int(record[3]) if record is not None else 0
+
+    def current(self) -> int:
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self._value
+        with self._lock:
+            if time.monotonic() - self._checked >= self.check_interval:
+                try:
+                    self._value = self._read()
+                except Exception:
+                    # Keep serving the last known generation through a backend outage
+                    BACKEND_STATS["errors"] += 1
+                self._checked = time.monotonic()
+            return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            try:
+                value = max(self._read(), self._value) + 1
+                get_backend().set(self.key, time.time(), self.TTL, 0, str(value).encode())
+            except Exception:
+                BACKEND_STATS["errors"] += 1
+                value = self._value + 1
+            self._value = value
+            self._checked = time.monotonic()
+            return value
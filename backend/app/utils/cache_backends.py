@@ -0,0 +1,349 @@
+import os
+import json
+import time
+import zlib
+import struct
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+# A stored record: (written_at, ttl, stale_ttl, payload) where payload is the UTF-8 JSON of
+# the cached value. Backends never look inside the payload.
+Record = Tuple[float, float, float, bytes]
+
+
+class CacheBackend(ABC):
+    """Shared (second-tier) store behind get_cache/set_cache."""
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Record | None:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, ts: float, ttl: float, stale_ttl: float, payload: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def purge_expired(self) -> int:
+        return 0
+
+    def compact(self) -> Dict[str, int]:
+        return {"removed": self.purge_expired()}
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class FileBackend(CacheBackend):
+    """One file per key under CACHE_DIR, sharded by key hash: <root>/ab/cd/<sha1>.bin
+
+    Each file is a fixed header (magic, version, flags, ts, ttl, stale_ttl, key length), the
+    key, then the payload, zlib-compressed above COMPRESS_MIN_BYTES. Expiry checks read only
+    the header. Writes go to a temp file in the shard and are renamed into place, so readers
+    never see a partial file.
+
+    Flat `<key>.json` files from the old layout are still read, and rewritten in the new format
+    when they are: only a read knows the real key, since the old file names replaced "/", "?",
+    "&" and "=" with "_". `compact()` drops the legacy files nobody read.
+
+    `stats()` does not walk the shards: entry and byte counts come from the last full scan
+    (the first `stats()` call or a `compact()`), plus this process's writes and deletes since.
+    """
+
+    name = "file"
+    MAGIC = b"EOXC"
+    VERSION = 1
+    FLAG_ZLIB = 0x01
+    HEADER = struct.Struct("!4sBBdddH")
+    COMPRESS_MIN_BYTES = 512
+
+    def __init__(self, root: Path, compress_level: int = 6, fsync: bool = False,
+                 legacy_ttl: float = 300):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.legacy_ttl = legacy_ttl
+        self.compress_level = compress_level
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._entries: int | None = None
+        self._bytes = 0
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.root / digest[:2] / digest[2:4] / f"{digest}.bin"
+
+    def _legacy_path(self, key: str) -> Path:
+        safe = key.replace("/", "_").replace("?", "_").replace("&", "_").replace("=", "_")
+        return self.root / f"{safe}.json"
+
+    @classmethod
+    def read_header(cls, f) -> Tuple[int, float, float, float, str] | None:
+        head = f.read(cls.HEADER.size)
+        if len(head) < cls.HEADER.size:
+            return None
+        magic, version, flags, ts, ttl, stale_ttl, key_len = cls.HEADER.unpack(head)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            return None
+        key = f.read(key_len).decode("utf-8")
+        return flags, ts, ttl, stale_ttl, key
+
+    def get(self, key: str) -> Record | None:
+        try:
+            with open(self._path(key), "rb") as f:
+                header = self.read_header(f)
+                if header is None:
+                    return None
+                flags, ts, ttl, stale_ttl, stored_key = header
+                if stored_key != key:
+                    return None
+                if time.time() - ts > ttl + stale_ttl:
+                    return None
+                payload = f.read()
+        except FileNotFoundError:
+            return self._get_legacy(key)
+        if flags & self.FLAG_ZLIB:
+            try:
+                payload = zlib.decompress(payload)
+            except zlib.error:
+                return None
+        return ts, ttl, stale_ttl, payload
+
+    def _get_legacy(self, key: str) -> Record | None:
+        p = self._legacy_path(key)
+        try:
+            data = json.loads(p.read_text())
+        except Exception:
+            return None
+        payload = json.dumps(data.get("payload"), ensure_ascii=False).encode("utf-8")
+        ts, ttl = data.get("_ts", 0), data.get("ttl", self.legacy_ttl)
+        stale_ttl = data.get("stale_ttl", 0)
+        record = ts, ttl, stale_ttl, payload
+        # Migrated under the key it was asked for
+        try:
+            if time.time() - ts <= ttl + stale_ttl:
+                self.set(key, *record)
+            p.unlink(missing_ok=True)
+        except OSError:
+            pass
+        return record
+
+    def set(self, key: str, ts: float, ttl: float, stale_ttl: float, payload: bytes) -> None:
+        flags = 0
+        if len(payload) >= self.COMPRESS_MIN_BYTES:
+            payload = zlib.compress(payload, self.compress_level)
+            flags |= self.FLAG_ZLIB
+        key_bytes = key.encode("utf-8")
+        header = self.HEADER.pack(self.MAGIC, self.VERSION, flags, ts, ttl, stale_ttl,
+                                  len(key_bytes))
+        blob = header + key_bytes + payload
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        previous = self._size(path)
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        self._counted(path, previous, len(blob))
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+        previous = self._size(path)
+        path.unlink(missing_ok=True)
+        self._counted(path, previous, None)
+        self._legacy_path(key).unlink(missing_ok=True)
+
+    @staticmethod
+    def _size(path: Path) -> int | None:
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def _counted(self, path: Path, previous: int | None, size: int | None) -> None:
+        with self._lock:
+            if self._entries is None:
+                return
+            self._entries += (size is not None) - (previous is not None)
+            self._bytes += (size or 0) - (previous or 0)
+
+    def purge_expired(self) -> int:
+        return self.compact()["removed"]
+
+    def compact(self, tmp_grace: float = 3600) -> Dict[str, int]:
+        """Remove expired entries, stale temp files, empty shards and unread legacy files."""
+        now = time.time()
+        result = {"scanned": 0, "removed": 0, "kept": 0}
+        kept_bytes = 0
+        for p in self.root.glob("??/??/*"):
+            if p.name.startswith(".tmp-"):
+                # Left behind by a crashed writer
+                if now - p.stat().st_mtime > tmp_grace:
+                    p.unlink(missing_ok=True)
+                continue
+            result["scanned"] += 1
+            try:
+                with open(p, "rb") as f:
+                    header = self.read_header(f)
+                    size = os.fstat(f.fileno()).st_size
+            except FileNotFoundError:
+                continue
+            if header is None or now - header[1] > header[2] + header[3]:
+                p.unlink(missing_ok=True)
+                result["removed"] += 1
+            else:
+                result["kept"] += 1
+                kept_bytes += size
+        # The file name does not give back the key, so unread legacy entries cannot be moved
+        for p in self.root.glob("*.json"):
+            result["scanned"] += 1
+            result["removed"] += 1
+            p.unlink(missing_ok=True)
+        with self._lock:
+            self._entries, self._bytes = result["kept"], kept_bytes
+        for d in sorted(self.root.glob("??/??"), reverse=True) + sorted(self.root.glob("??")):
+            try:
+                d.rmdir()
+            except OSError:
+                pass
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        if self._entries is None:
+            files = list(self.root.glob("??/??/*.bin"))
+            total = sum(size for size in map(self._size, files) if size is not None)
+            with self._lock:
+                if self._entries is None:
+                    self._entries, self._bytes = len(files), total
+        return {"entries": self._entries, "bytes": self._bytes, "path": str(self.root)}
+
+
+class SQLiteBackend(CacheBackend):
+    """Single SQLite file in WAL mode, safe to share between workers on one host."""
+
+    name = "sqlite"
+
+    def __init__(self, path: Path, busy_timeout_ms: int = 5000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, ts REAL NOT NULL, ttl REAL NOT NULL, stale_ttl REAL NOT NULL,"
+            " expires_at REAL NOT NULL, payload BLOB NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=self.busy_timeout_ms / 1000,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Record | None:
+        row = self._conn().execute(
+            "SELECT ts, ttl, stale_ttl, payload FROM cache WHERE key = ? AND expires_at >= ?",
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], row[2], bytes(row[3])
+
+    def set(self, key: str, ts: float, ttl: float, stale_ttl: float, payload: bytes) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (key, ts, ttl, stale_ttl, expires_at, payload)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (key, ts, ttl, stale_ttl, ts + ttl + stale_ttl, sqlite3.Binary(payload)),
+        )
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        cur = self._conn().execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        return cur.rowcount
+
+    def compact(self) -> Dict[str, int]:
+        removed = self.purge_expired()
+        self._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"removed": removed}
+
+    def stats(self) -> Dict[str, Any]:
+        count, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM cache"
+        ).fetchone()
+        return {"entries": count, "bytes": size, "path": str(self.path)}
+
+
+class RedisBackend(CacheBackend):
+    """Network store shared by every worker and node (any server speaking the Redis protocol).
+
+    Values are a fixed header (ts, ttl, stale_ttl as doubles) followed by the payload; the
+    server expires keys itself once the stale window has passed.
+    """
+
+    name = "redis"
+    HEADER = struct.Struct("!ddd")
+
+    def __init__(self, url: str, prefix: str = "eoex:cache:"):
+        import redis  # optional dependency, only needed for CACHE_BACKEND=redis
+
+        self.url = url
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url, protocol=2, socket_timeout=1.0,
+                                           socket_connect_timeout=1.0)
+
+    def get(self, key: str) -> Record | None:
+        raw = self.client.get(self.prefix + key)
+        if raw is None or len(raw) < self.HEADER.size:
+            return None
+        ts, ttl, stale_ttl = self.HEADER.unpack_from(raw)
+        return ts, ttl, stale_ttl, raw[self.HEADER.size:]
+
+    def set(self, key: str, ts: float, ttl: float, stale_ttl: float, payload: bytes) -> None:
+        expire_ms = max(1, int((ts + ttl + stale_ttl - time.time()) * 1000))
+        blob = self.HEADER.pack(ts, ttl, stale_ttl) + payload
+        self.client.set(self.prefix + key, blob, px=expire_ms)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"url": self.url, "prefix": self.prefix}
+
+
+def backend_from_env(default_dir: Path, default_ttl: float = 300) -> CacheBackend:
+    kind = os.getenv("CACHE_BACKEND", "file").lower()
+    if kind == "sqlite":
+        path = os.getenv("CACHE_SQLITE_PATH", str(default_dir / "cache.sqlite3"))
+        return SQLiteBackend(Path(path))
+    if kind == "redis":
+        return RedisBackend(os.getenv("CACHE_REDIS_URL", "redis://127.0.0.1:6379/0"))
+    fsync = os.getenv("CACHE_FSYNC", "0") == "1"
+    return FileBackend(default_dir, fsync=fsync, legacy_ttl=default_ttl)
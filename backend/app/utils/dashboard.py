@@ -0,0 +1,80 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+from .geo_dump import decode_cursor, encode_cursor
+
+DASHBOARD_LIMIT = int(os.getenv("DASHBOARD_LIMIT", "100"))
+DASHBOARD_MAX_LIMIT = int(os.getenv("DASHBOARD_MAX_LIMIT", "500"))
+
+COLUMNS = "j.id, u.username, j.destination_country, j.destination_city, j.budget, j.created_at"
+
+Cursor = Tuple[str, int]  # (created_at, id) of the last journey on the previous page
+
+
+def encode_dashboard_cursor(row: Dict[str, Any]) -> str:
+    created_at = row["created_at"]
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat(sep=" ")
+    return encode_cursor(str(created_at), row["id"])
+
+
+def decode_dashboard_cursor(value: str) -> Cursor:
+    return decode_cursor(value)
+
+
+def dashboard_query(
+    user: str | None = None,
+    destination: str | None = None,
+    budget: float | None = None,
+    after: Cursor | None = None,
+    limit: int = DASHBOARD_LIMIT,
+) -> Tuple[TextClause, Dict[str, Any]]:
+    """The dashboard SELECT with only the active filters, newest first, one page after `after`.
+
+    Every variant can walk one index of 006_journeys_dashboard_indexes.sql in (created_at, id)
+    order and stop after `limit` + 1 rows (the extra one tells whether a next page exists):
+    the username is resolved through the unique key on users, and a destination, which may be
+    a city or a country, becomes two index-ordered branches (city, country) merged by a UNION
+    instead of an OR that no single index serves.
+    """
+    where: List[str] = []
+    params: Dict[str, Any] = {"limit": limit + 1}
+    if user is not None:
+        where.append("u.username = :user")
+        params["user"] = user
+    if budget is not None:
+        where.append("j.budget <= :budget")
+        params["budget"] = budget
+    if after is not None:
+        where.append("(j.created_at < :after_ts"
+                     " OR (j.created_at = :after_ts AND j.id < :after_id))")
+        params.update(after_ts=after[0], after_id=after[1])
+
+    def select(extra: List[str]) -> str:
+        conditions = extra + where
+        return (f"SELECT {COLUMNS} FROM journeys j JOIN users u ON u.id = j.user_id"
+                + (" WHERE " + " AND ".join(conditions) if conditions else "")
+                + " ORDER BY j.created_at DESC, j.id DESC LIMIT :limit")
+
+    if destination is None:
+        return text(select([])), params
+    params["destination"] = destination
+    # Derived tables rather than parenthesized SELECTs: MySQL and SQLite both accept them
+    by_city = select(["j.destination_city = :destination"])
+    by_country = select(["j.destination_country = :destination"])
+    sql = (f"SELECT * FROM ({by_city}) AS by_city"
+           f" UNION SELECT * FROM ({by_country}) AS by_country"
+           " ORDER BY created_at DESC, id DESC LIMIT :limit")
+    return text(sql), params
+
+
+def page(rows: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], str | None]:
+    """Split the limit + 1 fetched rows into the page and the cursor of the next one."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_dashboard_cursor(rows[-1])
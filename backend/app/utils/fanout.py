@@ -0,0 +1,41 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, List, Tuple
+
+
+async def gather_limited(factories: Iterable[Callable[[], Awaitable[Any]]],
+                         limit: int) -> List[Any]:
+    sem = asyncio.Semaphore(max(1, limit))
+
+    async def run(factory):
+        async with sem:
+            return await factory()
+
+    return await asyncio.gather(*(run(f) for f in factories))
+
+
+async def first_non_empty(
+    factories: Iterable[Callable[[], Awaitable[Any]]], limit: int
+) -> Tuple[int | None, Any]:
+    """Run the calls concurrently (at most `limit` in flight) and return the first non-empty
+    result in priority order, i.e. the order of `factories`, with its index.
+
+    Lower-priority calls that are still pending once a winner is known are cancelled.
+    Returns (None, None) when every call comes back empty.
+    """
+    sem = asyncio.Semaphore(max(1, limit))
+
+    async def run(factory):
+        async with sem:
+            return await factory()
+
+    tasks = [asyncio.ensure_future(run(f)) for f in factories]
+    try:
+        for i, task in enumerate(tasks):
+            result = await task
+            if result:
+                return i, result
+        return None, None
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
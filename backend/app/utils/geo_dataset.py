@@ -0,0 +1,362 @@
+import os
+import csv
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import logging
+import tempfile
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+
+from .geo_loader import GeoRow, fit, num, region_for_file
+
+logger = logging.getLogger("geo_loader")
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+GEO_SOURCE_DIR = Path(os.getenv("GEO_SOURCE_DIR", str(REPO_ROOT / "doc")))
+GEO_DATASET_PATH = Path(os.getenv("GEO_DATASET_PATH",
+                                  str(REPO_ROOT / "backend" / "app" / "data" / "geonames.bin")))
+
+# Misspelled export names mapped to the region they belong to
+REGION_ALIASES = {"artic": "arctic"}
+
+# Columns as (name, array typecode); string columns hold indexes into the interned string table
+COLUMNS = (
+    ("geoname_id", "I"),
+    ("name", "I"),
+    ("country", "I"),
+    ("country_code", "I"),
+    ("region", "I"),
+    ("timezone", "I"),
+    ("ascii_name", "I"),
+    ("alt_names", "I"),
+    ("population", "I"),
+    ("lat", "d"),
+    ("lon", "d"),
+)
+STRING_COLUMNS = {"name", "country", "country_code", "region", "timezone", "ascii_name",
+                  "alt_names"}
+# Alternate names are stored as one interned string, joined with this separator
+ALT_SEP = "\x1f"
+
+
+class GeoDataset:
+    """Compiled GeoNames places: one file of array columns plus an interned string table.
+
+    Layout (little-endian): a header (magic, version, row and string counts, digest of the
+    source files, column count), a column directory of (name, typecode, offset, bytes), then
+    each column 8-byte aligned. Strings are a uint32 offsets column into one UTF-8 blob, so
+    every repeated country, region or timezone is stored once.
+
+    `open()` maps the file and exposes columns as memoryviews cast over the mapping, without
+    copying or parsing anything; strings are decoded on access.
+    """
+
+    MAGIC = b"EOXG"
+    VERSION = 2
+    HEADER = struct.Struct("<4sHHII16s")
+    DIRENTRY = struct.Struct("<16s1s7xQQ")
+
+    def __init__(self, buf, source_digest: bytes, nrows: int, columns: Dict[str, memoryview],
+                 mm=None):
+        self._buf = buf
+        self._mm = mm
+        self.source_digest = source_digest
+        self.nrows = nrows
+        self.columns = columns
+        self._str_offsets = columns["str_offsets"]
+        self._str_data = columns["str_data"]
+        self._strings: Dict[int, str] = {}
+
+    # --- reading -----------------------------------------------------------------
+
+    @classmethod
+    def open(cls, path: Path) -> "GeoDataset":
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls.from_buffer(mm, mm=mm)
+        except Exception:
+            mm.close()
+            raise
+
+    @classmethod
+    def from_buffer(cls, buf, mm=None) -> "GeoDataset":
+        view = memoryview(buf)
+        magic, version, ncols, nrows, _, digest = cls.HEADER.unpack_from(view, 0)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError("not a geo dataset (bad magic or version)")
+        columns = {}
+        pos = cls.HEADER.size
+        for _ in range(ncols):
+            raw_name, typecode, offset, nbytes = cls.DIRENTRY.unpack_from(view, pos)
+            pos += cls.DIRENTRY.size
+            col = view[offset:offset + nbytes]
+            if typecode != b"B":
+                col = _native(col, typecode.decode())
+            columns[raw_name.rstrip(b"\0").decode()] = col
+        return cls(buf, digest, nrows, columns, mm=mm)
+
+    def close(self) -> None:
+        # Views over the mapping must be released before it can be closed
+        for col in self.columns.values():
+            if isinstance(col, memoryview):
+                col.release()
+        self.columns = {}
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __len__(self) -> int:
+        return self.nrows
+
+    def string(self, idx: int) -> str:
+        s = self._strings.get(idx)
+        if s is None:
+            s = str(self._str_data[self._str_offsets[idx]:self._str_offsets[idx + 1]], "utf-8")
+            self._strings[idx] = s
+        return s
+
+    def value(self, column: str, i: int) -> Any:
+        v = self.columns[column][i]
+        return self.string(v) if column in STRING_COLUMNS else v
+
+    def alternate_names(self, i: int) -> List[str]:
+        joined = self.value("alt_names", i)
+        return joined.split(ALT_SEP) if joined else []
+
+    def row(self, i: int) -> Dict[str, Any]:
+        return {name: self.value(name, i) for name, _ in COLUMNS}
+
+    def iter_seed_rows(self, regions: Iterable[str]) -> Iterator[GeoRow]:
+        """GeoRows (the GeoLoader input) for places in `regions`."""
+        wanted = set(regions)
+        c = self.columns
+        for i in range(self.nrows):
+            region = self.string(c["region"][i])
+            if region in wanted:
+                yield (region, self.string(c["country"][i]), self.string(c["name"][i]),
+                       c["lat"][i], c["lon"][i], c["population"][i], c["geoname_id"][i])
+
+    # --- writing -----------------------------------------------------------------
+
+    @classmethod
+    def build(cls, rows: Iterable[Dict[str, Any]], source_digest: bytes = b"") -> bytes:
+        strings: Dict[str, int] = {}
+        cols = {name: array(tc) for name, tc in COLUMNS}
+        nrows = 0
+        for row in rows:
+            for name, tc in COLUMNS:
+                value = row.get(name)
+                if name in STRING_COLUMNS:
+                    value = strings.setdefault(value or "", len(strings))
+                elif value is None:
+                    # Missing coordinates are NaN, missing counts 0
+                    value = float("nan") if tc == "d" else 0
+                cols[name].append(value)
+            nrows += 1
+
+        blob = bytearray()
+        offsets = array("I", [0])
+        for s in strings:  # dicts keep insertion order, matching the assigned indexes
+            blob += s.encode("utf-8")
+            offsets.append(len(blob))
+
+        sections = [(name, tc, _little_endian(cols[name])) for name, tc in COLUMNS]
+        sections.append(("str_offsets", "I", _little_endian(offsets)))
+        sections.append(("str_data", "B", bytes(blob)))
+
+        pos = cls.HEADER.size + cls.DIRENTRY.size * len(sections)
+        directory, body = [], bytearray()
+        for name, tc, data in sections:
+            pos = _align(pos)
+            body += b"\0" * (pos - cls.HEADER.size - cls.DIRENTRY.size * len(sections) - len(body))
+            directory.append(cls.DIRENTRY.pack(name.encode(), tc.encode(), pos, len(data)))
+            body += data
+            pos += len(data)
+        header = cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(sections), nrows, len(strings),
+                                 source_digest[:16].ljust(16, b"\0"))
+        return header + b"".join(directory) + bytes(body)
+
+
+def _align(pos: int, to: int = 8) -> int:
+    return (pos + to - 1) // to * to
+
+
+def _little_endian(a: array) -> bytes:
+    if sys.byteorder != "little":
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def _native(col: memoryview, typecode: str):
+    if sys.byteorder == "little":
+        return col.cast(typecode)
+    # Big-endian hosts pay for one copy per column
+    a = array(typecode, col.tobytes())
+    a.byteswap()
+    return a
+
+
+# --- compiling from the GeoNames exports -------------------------------------------
+
+
+def source_files(source_dir: Path) -> List[Path]:
+    return sorted(p for p in Path(source_dir).iterdir()
+                  if p.suffix in (".csv", ".json") and p.is_file())
+
+
+def digest_cache_path(dataset_path: Path) -> Path:
+    return Path(dataset_path).with_name(Path(dataset_path).stem + ".sources.json")
+
+
+def source_digest(source_dir: Path, cache_path: Path | None = None) -> bytes:
+    """Checksum of the source exports. It is remembered in `cache_path` (next to the dataset by
+    default) against each file's name, size and mtime, so an unchanged directory is not
+    re-read on every startup."""
+    files = source_files(source_dir)
+    signature = [[p.name, st.st_size, st.st_mtime_ns] for p, st in ((p, p.stat()) for p in files)]
+    cache_path = Path(cache_path) if cache_path is not None else digest_cache_path(GEO_DATASET_PATH)
+    try:
+        cached = json.loads(cache_path.read_text())
+        if cached["files"] == signature:
+            return bytes.fromhex(cached["digest"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    h = hashlib.sha256()
+    for p in files:
+        h.update(p.name.encode())
+        h.update(p.read_bytes())
+    digest = h.digest()[:16]
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps({"files": signature, "digest": digest.hex()}))
+    except OSError as e:
+        logger.info("Source checksum not cached at %s: %s", cache_path, e)
+    return digest
+
+
+def _region(path: Path) -> str:
+    stem = path.stem.lower()
+    return region_for_file(REGION_ALIASES.get(stem, stem) + path.suffix)
+
+
+def _join_alt(names: List[str]) -> str:
+    return ALT_SEP.join(dict.fromkeys(n.strip() for n in names if n and n.strip()))
+
+
+def _csv_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    region = _region(path)
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f, delimiter=";"):
+            lat, _, lon = (row.get("Coordinates") or "").partition(",")
+            yield {
+                "geoname_id": num(row.get("Geoname ID"), int),
+                "name": fit(row.get("Name") or row.get("name")),
+                "country": fit(row.get("Country name EN") or row.get("country")
+                               or row.get("Country") or region),
+                "country_code": row.get("Country Code") or "",
+                "region": region,
+                "timezone": row.get("Timezone") or "",
+                "ascii_name": row.get("ASCII Name") or "",
+                "alt_names": _join_alt(row.get("Alternate Names", "").split(",")),
+                "population": num(row.get("Population"), int),
+                "lat": num(lat),
+                "lon": num(lon),
+            }
+
+
+def _json_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    region = _region(path)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    for row in data if isinstance(data, list) else []:
+        coords = row.get("coordinates") or {}
+        yield {
+            "geoname_id": num(row.get("geoname_id"), int),
+            "name": fit(row.get("name")),
+            "country": fit(row.get("cou_name_en") or row.get("label_en") or region),
+            "country_code": row.get("country_code") or "",
+            "region": region,
+            "timezone": row.get("timezone") or "",
+            "ascii_name": row.get("ascii_name") or "",
+            "alt_names": _join_alt(row.get("alternate_names") or []),
+            "population": num(row.get("population"), int),
+            "lat": num(coords.get("lat")),
+            "lon": num(coords.get("lon")),
+        }
+
+
+def iter_source_rows(source_dir: Path) -> Iterator[Dict[str, Any]]:
+    """Every place in the CSV and JSON exports, once per geoname_id (CSV and JSON overlap)."""
+    seen = set()
+    for path in source_files(source_dir):
+        rows = _csv_rows(path) if path.suffix == ".csv" else _json_rows(path)
+        try:
+            for row in rows:
+                gid = row["geoname_id"]
+                if not row["name"] or gid is None or gid in seen:
+                    continue
+                seen.add(gid)
+                yield row
+        except (OSError, ValueError, csv.Error) as e:
+            logger.error("Failed to parse %s: %s", path.name, e)
+
+
+def compile_dataset(source_dir: Path = GEO_SOURCE_DIR,
+                    out_path: Path = GEO_DATASET_PATH) -> Dict[str, Any]:
+    digest = source_digest(source_dir, digest_cache_path(out_path))
+    blob = GeoDataset.build(iter_source_rows(source_dir), digest)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(out_path.parent), prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(blob)
+    os.replace(tmp, out_path)
+    header = GeoDataset.HEADER.unpack_from(blob, 0)
+    return {"path": str(out_path), "rows": header[3], "strings": header[4], "bytes": len(blob),
+            "digest": digest.hex()}
+
+
+_dataset: GeoDataset | None = None
+_dataset_lock = threading.Lock()
+
+
+def get_geo_dataset() -> GeoDataset:
+    """Process-wide dataset, compiled from GEO_SOURCE_DIR first if missing or out of date."""
+    global _dataset
+    if _dataset is None:
+        with _dataset_lock:
+            if _dataset is None:
+                _dataset = _open_current()
+    return _dataset
+
+
+def _open_current() -> GeoDataset:
+    digest = source_digest(GEO_SOURCE_DIR) if GEO_SOURCE_DIR.is_dir() else None
+    if GEO_DATASET_PATH.exists():
+        try:
+            ds = GeoDataset.open(GEO_DATASET_PATH)
+        except ValueError:
+            ds = None  # written by another format version
+        if ds is not None:
+            if digest is None or ds.source_digest == digest:
+                return ds
+            ds.close()
+    if digest is None:
+        raise FileNotFoundError(
+            f"No geo dataset at {GEO_DATASET_PATH} and no sources in {GEO_SOURCE_DIR}")
+    logger.info("Compiling geo dataset: %s", compile_dataset(GEO_SOURCE_DIR, GEO_DATASET_PATH))
+    return GeoDataset.open(GEO_DATASET_PATH)
+
+
+def reset_geo_dataset() -> None:
+    global _dataset
+    with _dataset_lock:
+        if _dataset is not None:
+            _dataset.close()
+        _dataset = None
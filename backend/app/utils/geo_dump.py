@@ -0,0 +1,284 @@
+import os
+import time
+import base64
+import hashlib
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .geo_tree import GEO_GENERATION
+from .jsoncodec import dumps, loads
+
+GEO_DUMP_CHUNK = int(os.getenv("GEO_DUMP_CHUNK", "1000"))
+GEO_DUMP_MAX_LIMIT = int(os.getenv("GEO_DUMP_MAX_LIMIT", "10000"))
+# How long a worker trusts its dataset version before asking MySQL again
+GEO_VERSION_TTL = float(os.getenv("GEO_VERSION_TTL", "60"))
+
+NDJSON_TYPES = {"regions": "region", "countries": "country", "cities": "city"}
+
+Cursor = Tuple[str, int]  # (name, id) of the last city on the previous page
+
+
+def encode_cursor(name: str, city_id: int) -> str:
+    return base64.urlsafe_b64encode(dumps([name, city_id])).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(value: str) -> Cursor:
+    try:
+        name, city_id = loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {value!r}") from e
+    if not isinstance(name, str) or not isinstance(city_id, int):
+        raise ValueError(f"invalid cursor: {value!r}")
+    return name, city_id
+
+
+_version: str | None = None
+_version_checked = 0.0
+_version_generation = 0
+_version_lock = threading.Lock()
+
+
+# Seeding deletes and re-inserts, and auto-increment ids never go back: counts plus the
+# highest ids change whenever the tables do
+VERSION_SQL = text(
+    "SELECT (SELECT COUNT(*) FROM regions), (SELECT COALESCE(MAX(id), 0) FROM regions),"
+    " (SELECT COUNT(*) FROM countries), (SELECT COALESCE(MAX(id), 0) FROM countries),"
+    " (SELECT COUNT(*) FROM cities), (SELECT COALESCE(MAX(id), 0) FROM cities)"
+)
+
+
+def _digest(row) -> str:
+    return hashlib.sha1(":".join(str(v) for v in row).encode()).hexdigest()[:16]
+
+
+def _compute_version(engine: Engine) -> str:
+    with engine.connect() as conn:
+        return _digest(conn.execute(VERSION_SQL).one())
+
+
+def cached_geo_version() -> str | None:
+    """The cached version while it is still valid: until the geo generation changes (a reseed
+    on any worker) and for at most GEO_VERSION_TTL seconds. None means it must be recomputed."""
+    if (_version is None or GEO_GENERATION.current() != _version_generation
+            or time.monotonic() - _version_checked >= GEO_VERSION_TTL):
+        return None
+    return _version
+
+
+def _remember(version: str, generation: int) -> str:
+    global _version, _version_checked, _version_generation
+    _version, _version_checked, _version_generation = version, time.monotonic(), generation
+    return version
+
+
+def geo_version(engine: Engine) -> str:
+    """Version of the seeded geo tables (see cached_geo_version for how long it is trusted)."""
+    version = cached_geo_version()
+    if version is not None:
+        return version
+    with _version_lock:
+        version = cached_geo_version()
+        if version is None:
+            generation = GEO_GENERATION.current()
+            version = _remember(_compute_version(engine), generation)
+        return version
+
+
+async def geo_version_async(engine) -> str:
+    """geo_version on an asyncio engine."""
+    version = cached_geo_version()
+    if version is not None:
+        return version
+    generation = GEO_GENERATION.current()
+    async with engine.connect() as conn:
+        row = (await conn.execute(VERSION_SQL)).one()
+    return _remember(_digest(row), generation)
+
+
+def invalidate_geo_version() -> None:
+    global _version
+    _version = None
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
+def _filters(region_id: int | None,
+             country_id: int | None) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    # WHERE clauses per table for the requested region/country
+    where = {"regions": [], "countries": [], "cities": []}
+    params: Dict[str, Any] = {}
+    if region_id is not None:
+        params["rid"] = region_id
+        where["regions"].append("id = :rid")
+        where["countries"].append("region_id = :rid")
+        where["cities"].append("country_id IN (SELECT id FROM countries WHERE region_id = :rid)")
+    if country_id is not None:
+        params["cid"] = country_id
+        where["regions"].append("id IN (SELECT region_id FROM countries WHERE id = :cid)")
+        where["countries"].append("id = :cid")
+        where["cities"].append("country_id = :cid")
+    return {table: (" WHERE " + " AND ".join(c) if c else "") for table, c in where.items()}, params
+
+
+def _stream(conn, sql: str, params: Dict[str, Any]) -> Iterator[List[Dict[str, Any]]]:
+    # Server-side cursor: rows arrive in chunks instead of being fetched all at once
+    streaming = conn.execution_options(stream_results=True, yield_per=GEO_DUMP_CHUNK)
+    result = streaming.execute(text(sql), params)
+    for chunk in result.mappings().partitions(GEO_DUMP_CHUNK):
+        yield chunk
+
+
+def _region(r) -> Dict[str, Any]:
+    return {"id": r["id"], "name": r["name"]}
+
+
+def _country(c) -> Dict[str, Any]:
+    return {"id": c["id"], "region_id": c["region_id"], "name": c["name"]}
+
+
+def _city(c) -> Dict[str, Any]:
+    return {"id": c["id"], "country_id": c["country_id"], "name": c["name"],
+            "is_capital": int(c["is_capital"])}
+
+
+class _Dump:
+    """Queries and encoding of one dump request, shared by the sync and the async driver: they
+    only differ in how they run `sections` and feed each chunk of rows to `encode`."""
+
+    def __init__(self, region_id, country_id, after: Cursor | None, limit: int | None,
+                 ndjson: bool):
+        self.limit = limit
+        self.ndjson = ndjson
+        self.last: Dict[str, Any] | None = None
+        self.more = False
+        self.sent = 0
+        self.first = True
+
+        where, params = _filters(region_id, country_id)
+        city_sql = f"SELECT id, country_id, name, is_capital FROM cities{where['cities']}"
+        city_params = dict(params)
+        if after is not None:
+            city_sql += (" AND" if where["cities"] else " WHERE")
+            city_sql += " (name > :after_name OR (name = :after_name AND id > :after_id))"
+            city_params.update(after_name=after[0], after_id=after[1])
+        city_sql += " ORDER BY name, id"
+        if limit is not None:
+            city_sql += " LIMIT :limit"
+            city_params["limit"] = limit + 1  # one extra row tells whether another page exists
+
+        self.sections = [("cities", _city, city_sql, city_params)]
+        if after is None:
+            self.sections[:0] = [
+                ("regions", _region,
+                 f"SELECT id, name FROM regions{where['regions']} ORDER BY name", params),
+                ("countries", _country,
+                 f"SELECT id, region_id, name FROM countries{where['countries']} ORDER BY name",
+                 params),
+            ]
+        elif not ndjson:
+            self.sections[:0] = [("regions", None, None, None), ("countries", None, None, None)]
+
+    def open(self, i: int, name: str) -> bytes:
+        self.first = True
+        if self.ndjson:
+            return b""
+        return (b"{" if i == 0 else b"],") + b'"' + name.encode() + b'":['
+
+    def encode(self, name: str, shape, chunk) -> bytes:
+        if name == "cities" and self.limit is not None:
+            if self.sent + len(chunk) > self.limit:
+                self.more = True
+                chunk = chunk[:self.limit - self.sent]
+            self.sent += len(chunk)
+            if chunk:
+                self.last = chunk[-1]
+        items = [shape(r) for r in chunk]
+        if not items:
+            return b""
+        if self.ndjson:
+            kind = NDJSON_TYPES[name]
+            return b"".join(dumps({"type": kind, **item}) + b"\n" for item in items)
+        out = (b"" if self.first else b",") + b",".join(dumps(item) for item in items)
+        self.first = False
+        return out
+
+    def close(self) -> bytes:
+        next_cursor = None
+        if self.more and self.last is not None:
+            next_cursor = encode_cursor(self.last["name"], self.last["id"])
+        if self.ndjson:
+            if self.limit is None:
+                return b""
+            return dumps({"type": "page", "next": next_cursor}) + b"\n"
+        if self.limit is not None:
+            return b'],"next":' + dumps(next_cursor) + b"}"
+        return b"]}"
+
+
+def iter_dump(
+    engine: Engine,
+    region_id: int | None = None,
+    country_id: int | None = None,
+    after: Cursor | None = None,
+    limit: int | None = None,
+    ndjson: bool = False,
+) -> Iterator[bytes]:
+    """Encoded chunks of the regions → countries → cities dump, never holding more than one
+    chunk of rows.
+
+    JSON keeps the `{"regions": [...], "countries": [...], "cities": [...]}` shape; NDJSON
+    writes one object per line tagged with its "type". Cities are ordered by (name, id) so
+    `after` can resume right past the last city of a page; with `limit`, regions and countries
+    only come with the first page and the cursor for the next one is reported as "next"
+    (null on the last page).
+    """
+    dump = _Dump(region_id, country_id, after, limit, ndjson)
+    with engine.connect() as conn:
+        for i, (name, shape, sql, sql_params) in enumerate(dump.sections):
+            head = dump.open(i, name)
+            if head:
+                yield head
+            if sql is None:
+                continue
+            for chunk in _stream(conn, sql, sql_params):
+                out = dump.encode(name, shape, chunk)
+                if out:
+                    yield out
+    tail = dump.close()
+    if tail:
+        yield tail
+
+
+async def aiter_dump(
+    engine,
+    region_id: int | None = None,
+    country_id: int | None = None,
+    after: Cursor | None = None,
+    limit: int | None = None,
+    ndjson: bool = False,
+) -> AsyncIterator[bytes]:
+    """iter_dump on an asyncio engine: same queries, same bytes."""
+    dump = _Dump(region_id, country_id, after, limit, ndjson)
+    async with engine.connect() as conn:
+        for i, (name, shape, sql, sql_params) in enumerate(dump.sections):
+            head = dump.open(i, name)
+            if head:
+                yield head
+            if sql is None:
+                continue
+            result = await conn.stream(text(sql), sql_params)
+            async for chunk in result.mappings().partitions(GEO_DUMP_CHUNK):
+                out = dump.encode(name, shape, chunk)
+                if out:
+                    yield out
+    tail = dump.close()
+    if tail:
+        yield tail
@@ -0,0 +1,169 @@
+import os
+import math
+import heapq
+import threading
+from array import array
+from typing import Any, Dict, List, Tuple
+
+from .geo_dataset import GeoDataset, get_geo_dataset
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = math.pi * EARTH_RADIUS_KM / 180
+GEO_GRID_DEG = float(os.getenv("GEO_GRID_DEG", "0.5"))
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    phi, lam = math.radians(lat), math.radians(lon)
+    return math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)
+
+
+def _chord2_to_km(chord2: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord2) / 2))
+
+
+def _km_to_chord2(km: float) -> float:
+    if km >= math.pi * EARTH_RADIUS_KM:
+        return 4.0
+    return (2 * math.sin(km / (2 * EARTH_RADIUS_KM))) ** 2
+
+
+class GeoGridIndex:
+    """Fixed lat/lon grid over the places of a GeoDataset (a geohash-style bucket index).
+
+    Each cell of `cell_deg` degrees lists the rows inside it. `nearest` scans rings of cells
+    outward from the query point and stops once the k-th best distance is closer than
+    anything outside the scanned box can be; `within` only visits the cells overlapping the box.
+    """
+
+    def __init__(self, dataset: GeoDataset, cell_deg: float = GEO_GRID_DEG):
+        self.ds = dataset
+        self.cell = cell_deg
+        self.lon_cells = int(math.ceil(360 / cell_deg))
+        self.lat_cells = int(math.ceil(180 / cell_deg))
+        self.lat = dataset.columns["lat"]
+        self.lon = dataset.columns["lon"]
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        # Unit-sphere coordinates: ranking by squared chord length needs no trigonometry per row
+        zeros = bytes(8 * len(dataset))
+        self.x, self.y, self.z = array("d", zeros), array("d", zeros), array("d", zeros)
+        for i in range(len(dataset)):
+            lat, lon = self.lat[i], self.lon[i]
+            if lat != lat or lon != lon:  # NaN: no coordinates
+                continue
+            self.x[i], self.y[i], self.z[i] = _unit_vector(lat, lon)
+            self.cells.setdefault(self._cell(lat, lon), []).append(i)
+        self.size = sum(len(v) for v in self.cells.values())
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        ci = min(self.lat_cells - 1, int((lat + 90) // self.cell))
+        cj = int((lon + 180) // self.cell) % self.lon_cells
+        return ci, cj
+
+    def _outside_bound_km(self, lat: float, ci: int, cj: int, r: int, lon: float) -> float:
+        # Lower bound on the distance from (lat, lon) to any point outside the (2r+1)^2 box of cells
+        south = (ci - r) * self.cell - 90
+        north = (ci + r + 1) * self.cell - 90
+        bounds = []
+        if south > -90:
+            bounds.append((lat - south) * KM_PER_DEG_LAT)
+        if north < 90:
+            bounds.append((north - lat) * KM_PER_DEG_LAT)
+        if 2 * r + 1 < self.lon_cells:
+            west = (cj - r) * self.cell - 180
+            east = (cj + r + 1) * self.cell - 180
+            # Distance to the nearest meridian at least dlon away, over all latitudes
+            dlon = math.radians(min(90.0, lon - west, east - lon))
+            reach = math.sin(dlon) * math.cos(math.radians(lat))
+            bounds.append(EARTH_RADIUS_KM * math.asin(min(1.0, reach)))
+        return min(bounds) if bounds else math.inf
+
+    def nearest(self, lat: float, lon: float, k: int = 10) -> List[Tuple[float, int]]:
+        """(distance_km, row) of the k places closest to (lat, lon), nearest first."""
+        ci, cj = self._cell(lat, lon)
+        qx, qy, qz = _unit_vector(lat, lon)
+        xs, ys, zs = self.x, self.y, self.z
+        heap: List[Tuple[float, int]] = []  # the best k so far as (-chord², row)
+        seen = set()
+        r = 0
+        while True:
+            for di in range(-r, r + 1):
+                i = ci + di
+                if not 0 <= i < self.lat_cells:
+                    continue
+                for dj in (range(-r, r + 1) if abs(di) == r else (-r, r)):
+                    cell = (i, (cj + dj) % self.lon_cells)
+                    if cell in seen:
+                        continue
+                    seen.add(cell)
+                    for row in self.cells.get(cell, ()):
+                        dx, dy, dz = xs[row] - qx, ys[row] - qy, zs[row] - qz
+                        d = dx * dx + dy * dy + dz * dz
+                        if len(heap) < k:
+                            heapq.heappush(heap, (-d, row))
+                        elif d < -heap[0][0]:
+                            heapq.heapreplace(heap, (-d, row))
+            bound = self._outside_bound_km(lat, ci, cj, r, lon)
+            if bound == math.inf or (len(heap) >= k and -heap[0][0] <= _km_to_chord2(bound)):
+                break
+            r += 1
+        return sorted((_chord2_to_km(-nd), row) for nd, row in heap)
+
+    def within(self, north: float, west: float, south: float, east: float,
+               limit: int = 100) -> List[int]:
+        """Rows inside the box, most populous first; west > east crosses the antimeridian."""
+        if south > north:
+            return []
+        lon_ranges = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        i0, i1 = self._cell(max(-90.0, south), 0)[0], self._cell(min(90.0, north), 0)[0]
+        hits = set()
+        for w, e in lon_ranges:
+            j0 = int((max(-180.0, w) + 180) // self.cell)
+            j1 = min(self.lon_cells - 1, int((min(180.0, e) + 180) // self.cell))
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    for row in self.cells.get((i, j % self.lon_cells), ()):
+                        if south <= self.lat[row] <= north and w <= self.lon[row] <= e:
+                            hits.add(row)
+        population = self.ds.columns["population"]
+        return heapq.nlargest(limit, hits, key=lambda row: (population[row], -row))
+
+    def place(self, row: int, distance_km: float | None = None) -> Dict[str, Any]:
+        ds = self.ds
+        out = {
+            "geoname_id": ds.columns["geoname_id"][row],
+            "name": ds.value("name", row),
+            "country": ds.value("country", row),
+            "country_code": ds.value("country_code", row),
+            "region": ds.value("region", row),
+            "population": ds.columns["population"][row],
+            "latitude": self.lat[row],
+            "longitude": self.lon[row],
+        }
+        if distance_km is not None:
+            out["distance_km"] = round(distance_km, 3)
+        return out
+
+
+_index: GeoGridIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_geo_index() -> GeoGridIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = GeoGridIndex(get_geo_dataset())
+    return _index
+
+
+def reset_geo_index() -> None:
+    global _index
+    _index = None
@@ -0,0 +1,212 @@
+import os
+import csv
+import time
+import logging
+import tempfile
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger("geo_loader")
+
+GEO_BATCH_SIZE = int(os.getenv("GEO_SEED_BATCH_SIZE", "5000"))
+GEO_PROGRESS_EVERY = int(os.getenv("GEO_SEED_PROGRESS_EVERY", "10000"))
+
+# (region, country, city, latitude, longitude, population, geoname_id)
+GeoRow = Tuple[str, str, str, float | None, float | None, int | None, int | None]
+
+
+def fit(s: str, n: int = 255) -> str:
+    return (s or "")[:n]
+
+
+def num(value, kind=float):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def region_for_file(filename: str) -> str:
+    stem = filename.split(".")[0]
+    return "America" if stem == "america" else stem.capitalize()
+
+
+def iter_csv_rows(dir_path: str, regions: Iterable[str]) -> Iterator[GeoRow]:
+    """Stream GeoRows from the GeoNames `<region>.csv` exports in `dir_path`.
+
+    Files whose region is not in `regions` are skipped; rows are never held in memory.
+    """
+    wanted = set(regions)
+    for rf in sorted(os.listdir(dir_path)):
+        if not rf.endswith(".csv"):
+            continue
+        region_name = region_for_file(rf)
+        if region_name not in wanted:
+            continue
+        path = os.path.join(dir_path, rf)
+        try:
+            # utf-8-sig: the exports start with a BOM
+            with open(path, "r", encoding="utf-8-sig", newline="") as f:
+                for row in csv.DictReader(f, delimiter=";"):
+                    country_name = fit(row.get("Country name EN") or row.get("country")
+                                       or row.get("Country") or region_name)
+                    city_name = fit(row.get("Name") or row.get("name"))
+                    if country_name and city_name:
+                        lat, _, lon = (row.get("Coordinates") or "").partition(",")
+                        yield (region_name, country_name, city_name, num(lat), num(lon),
+                               num(row.get("Population"), int), num(row.get("Geoname ID"), int))
+        except (OSError, csv.Error) as e:
+            logger.error("Failed to parse %s: %s", rf, e)
+
+
+def _insert_ignore(conn: Connection) -> str:
+    # MySQL in production; SQLite spells it differently
+    return "INSERT OR IGNORE" if conn.dialect.name == "sqlite" else "INSERT IGNORE"
+
+
+class GeoLoader:
+    """Bulk loader for regions → countries → cities.
+
+    Country ids are resolved in memory (one INSERT + one SELECT per batch for the countries
+    first seen in it), and cities go out as multi-row INSERTs of `batch_size` rows, or through
+    `LOAD DATA LOCAL INFILE` when `use_load_data` is set and the server allows it. Time spent
+    in the database is tracked separately from parsing.
+    """
+
+    def __init__(
+        self,
+        conn: Connection,
+        batch_size: int = GEO_BATCH_SIZE,
+        use_load_data: bool = False,
+        progress: Callable[[Dict[str, float]], None] | None = None,
+        progress_every: int = GEO_PROGRESS_EVERY,
+    ):
+        self.conn = conn
+        self.batch_size = max(1, batch_size)
+        self.use_load_data = use_load_data and conn.dialect.name == "mysql"
+        self.progress = progress or (lambda stats: logger.info("geo seed progress: %s", stats))
+        self.progress_every = progress_every
+        self.region_ids: Dict[str, int] = {}
+        self.country_ids: Dict[Tuple[int, str], int] = {}
+        self._seen_cities: set = set()
+        self.stats = {"rows": 0, "cities": 0, "countries": 0, "regions": 0, "batches": 0,
+                      "db_seconds": 0.0}
+
+    def _execute(self, sql, params=None):
+        t0 = time.perf_counter()
+        try:
+            return self.conn.execute(sql, params) if params is not None else self.conn.execute(sql)
+        finally:
+            self.stats["db_seconds"] += time.perf_counter() - t0
+
+    def reset(self, regions: List[str]) -> None:
+        self._execute(text("DELETE FROM cities"))
+        self._execute(text("DELETE FROM countries"))
+        self._execute(text("DELETE FROM regions"))
+        self._execute(text("INSERT INTO regions (name) VALUES (:n)"), [{"n": r} for r in regions])
+        rows = self._execute(text("SELECT id, name FROM regions")).mappings().all()
+        self.region_ids = {r["name"]: r["id"] for r in rows}
+        self.stats["regions"] = len(self.region_ids)
+
+    def _resolve_countries(self, pairs: set) -> None:
+        missing = [p for p in pairs if p not in self.country_ids]
+        if not missing:
+            return
+        self._execute(
+            text(f"{_insert_ignore(self.conn)} INTO countries (region_id, name) VALUES (:rid, :n)"),
+            [{"rid": rid, "n": name} for rid, name in missing],
+        )
+        by_region: Dict[int, List[str]] = {}
+        for rid, name in missing:
+            by_region.setdefault(rid, []).append(name)
+        select = text(
+            "SELECT id, region_id, name FROM countries WHERE region_id = :rid AND name IN :names"
+        ).bindparams(bindparam("names", expanding=True))
+        for rid, names in by_region.items():
+            for r in self._execute(select, {"rid": rid, "names": names}).mappings():
+                self.country_ids[(r["region_id"], r["name"])] = r["id"]
+        self.stats["countries"] = len(self.country_ids)
+
+    def _flush(self, batch: List[tuple]) -> None:
+        if not batch:
+            return
+        self._resolve_countries({(row[0], row[1]) for row in batch})
+        cities = []
+        for rid, country, city, lat, lon, population, geoname_id in batch:
+            cid = self.country_ids.get((rid, country))
+            if cid is None or (cid, city) in self._seen_cities:
+                continue
+            self._seen_cities.add((cid, city))
+            if lat != lat or lon != lon:  # NaN from the dataset
+                lat = lon = None
+            cities.append({"cid": cid, "n": city, "lat": lat, "lon": lon, "pop": population,
+                           "gid": geoname_id})
+        if cities:
+            if not (self.use_load_data and self._load_data(cities)):
+                self._execute(text(
+                    f"{_insert_ignore(self.conn)} INTO cities"
+                    " (country_id, name, is_capital, latitude, longitude, population, geoname_id)"
+                    " VALUES (:cid, :n, 0, :lat, :lon, :pop, :gid)"
+                ), cities)
+        self.stats["cities"] += len(cities)
+        self.stats["batches"] += 1
+
+    def _load_data(self, cities: List[Dict]) -> bool:
+        # Needs local_infile on both ends (MYSQL_LOCAL_INFILE=1 and the server's local_infile)
+        def esc(value) -> str:
+            if value is None:
+                return "\\N"
+            return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+        fd, path = tempfile.mkstemp(prefix="geo-cities-", suffix=".tsv")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for c in cities:
+                    fields = (esc(c[k]) for k in ("cid", "n", "lat", "lon", "pop", "gid"))
+                    f.write("\t".join(fields) + "\n")
+            self._execute(text(
+                "LOAD DATA LOCAL INFILE :path IGNORE INTO TABLE cities CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'"
+                " (country_id, name, latitude, longitude, population, geoname_id)"
+                " SET is_capital = 0"
+            ), {"path": path})
+            return True
+        except Exception as e:
+            logger.warning(
+                "LOAD DATA LOCAL INFILE unavailable, falling back to batched INSERTs: %s", e)
+            self.use_load_data = False
+            return False
+        finally:
+            os.unlink(path)
+
+    def load(self, rows: Iterable[GeoRow]) -> Dict[str, float]:
+        """Stream `rows` into the cities table; returns counters, timings and rows/sec."""
+        started = time.perf_counter()
+        batch: List[tuple] = []
+        next_report = self.progress_every
+        for row in rows:
+            self.stats["rows"] += 1
+            rid = self.region_ids.get(row[0])
+            if rid is None:
+                continue
+            batch.append((rid,) + tuple(row[1:]))
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+            if self.progress_every and self.stats["rows"] >= next_report:
+                next_report += self.progress_every
+                self.progress(self._report(started))
+        self._flush(batch)
+        return self._report(started)
+
+    def _report(self, started: float) -> Dict[str, float]:
+        elapsed = time.perf_counter() - started
+        return {
+            **self.stats,
+            "db_seconds": round(self.stats["db_seconds"], 4),
+            "seconds": round(elapsed, 4),
+            "rows_per_sec": round(self.stats["rows"] / elapsed) if elapsed > 0 else None,
+            "load_data": self.use_load_data,
+        }
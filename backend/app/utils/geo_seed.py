@@ -0,0 +1,109 @@
+import os
+import time
+import logging
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+from .geo_dataset import get_geo_dataset
+from .geo_loader import GEO_BATCH_SIZE, GeoLoader, GeoRow
+from .geo_tree import bump_geo_generation
+
+logger = logging.getLogger("geo_loader")
+
+GEO_SEED_ON_STARTUP = os.getenv("GEO_SEED_ON_STARTUP", "1") == "1"
+GEO_SEED_LOCK = "eoex_geo_seed"
+
+
+def stored_digest(conn: Connection) -> str | None:
+    """Checksum recorded by the last dataset seed, or None (never seeded, or no 005 migration)."""
+    try:
+        return conn.execute(text("SELECT source_digest FROM geo_seed_state WHERE id = 1")).scalar()
+    except DBAPIError:
+        return None
+
+
+def _seed_is_current(conn: Connection, digest: str) -> bool:
+    # The recorded checksum only counts while the tables still hold that seed: re-running
+    # 002_geo_reset.sql empties them but leaves geo_seed_state behind
+    try:
+        state = conn.execute(
+            text("SELECT source_digest, cities FROM geo_seed_state WHERE id = 1")
+        ).first()
+    except DBAPIError:
+        return False
+    if state is None or state[0] != digest:
+        return False
+    return conn.execute(text("SELECT COUNT(*) FROM cities")).scalar() == state[1]
+
+
+def _record_seed(conn: Connection, digest: str | None, cities: int) -> None:
+    # A CSV seed records no digest, so the next startup reseeds from the dataset. MySQL and
+    # SQLite keep the transaction usable after a failed statement, so a missing table only
+    # costs the checksum, not the seed.
+    try:
+        conn.execute(text("DELETE FROM geo_seed_state"))
+        if digest is not None:
+            conn.execute(
+                text("INSERT INTO geo_seed_state (id, source_digest, cities, seeded_at)"
+                     " VALUES (1, :d, :n, :t)"),
+                {"d": digest, "n": cities, "t": time.time()},
+            )
+    except DBAPIError as e:
+        logger.warning(
+            "geo seed checksum not recorded (apply migrations/005_geo_seed_state.sql): %s", e)
+
+
+def _lock(conn: Connection) -> bool:
+    # Only one worker seeds; the others find the lock taken and leave it to that one
+    if conn.dialect.name != "mysql":
+        return True
+    return bool(conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": GEO_SEED_LOCK}).scalar())
+
+
+def _unlock(conn: Connection) -> None:
+    if conn.dialect.name == "mysql":
+        conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": GEO_SEED_LOCK})
+
+
+def seed_geo(
+    engine: Engine,
+    regions: List[str],
+    rows: Iterable[GeoRow] | None = None,
+    digest: str | None = None,
+    force: bool = False,
+    **loader_options: Any,
+) -> Dict[str, Any]:
+    """Replace the geo tables with `rows` (the compiled dataset by default).
+
+    Skipped when the recorded checksum already equals `digest` (the dataset's source digest by
+    default) and the recorded city count is still what `cities` holds, unless `force` is set,
+    or when another worker holds the seed lock. After a seed, the geo generation is bumped so
+    every worker drops its cached tree.
+    """
+    if rows is None:
+        dataset = get_geo_dataset()
+        rows = dataset.iter_seed_rows(regions)
+        digest = digest or dataset.source_digest.hex()
+    with engine.connect() as conn:
+        locked = _lock(conn)
+        conn.commit()
+        if not locked:
+            return {"status": "skipped", "reason": "locked"}
+        try:
+            with conn.begin():
+                if not force and digest is not None and _seed_is_current(conn, digest):
+                    return {"status": "skipped", "reason": "unchanged", "digest": digest}
+                loader = GeoLoader(conn, **{"batch_size": GEO_BATCH_SIZE, **loader_options})
+                loader.reset(regions)
+                stats = loader.load(rows)
+                # INSERT IGNORE drops names the column collation folds together (MySQL's
+                # utf8mb4_0900_ai_ci ignores accents and case), so record what was stored
+                stats["cities"] = conn.execute(text("SELECT COUNT(*) FROM cities")).scalar()
+                _record_seed(conn, digest, stats["cities"])
+        finally:
+            _unlock(conn)
+            conn.commit()
+    return {"status": "seeded", "digest": digest, **stats, "generation": bump_geo_generation()}
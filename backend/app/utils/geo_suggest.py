@@ -0,0 +1,205 @@
+import os
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, List, Tuple
+
+from .geo_dataset import GeoDataset, get_geo_dataset
+
+SUGGEST_LIMIT_MAX = 50
+# Prefixes up to this length get their top results precomputed; longer ones scan their range
+SUGGEST_TOP_PREFIX_LEN = int(os.getenv("GEO_SUGGEST_TOP_PREFIX_LEN", "3"))
+SUGGEST_MIN_FUZZY_LEN = 3
+
+
+def fold(s: str) -> str:
+    """Case- and accent-insensitive form used for matching: "Ἀθῆναι" and "São Paulo" fold to
+    "αθηναι" and "sao paulo"."""
+    decomposed = unicodedata.normalize("NFKD", s)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+class SuggestIndex:
+    """Autocomplete over city and country names, ranked by population.
+
+    A sorted array of (folded key, entity) pairs is the prefix index: every key starting with
+    a query sits in one contiguous range found by bisection. Keys are each city's name, ASCII
+    name and alternate names, plus every country name. Entities are dataset rows for cities and
+    ids past the last row for countries (population summed over their cities). Matches on a
+    primary name rank ahead of matches found only through an alternate name.
+
+    When a prefix matches nothing, the query is retried with one edit (deletion, transposition,
+    substitution or insertion) at positions up to the longest prefix that does match, using
+    only characters that actually follow that prefix in the index. The first character is
+    assumed right except for deletions and transpositions.
+    """
+
+    def __init__(self, dataset: GeoDataset, top_prefix_len: int = SUGGEST_TOP_PREFIX_LEN):
+        self.ds = dataset
+        n = len(dataset)
+        population = dataset.columns["population"]
+        self.population: List[int] = [population[i] for i in range(n)]
+        # (name, country_code, region) per country entity
+        self.countries: List[Tuple[str, str, str]] = []
+
+        # Entries are (key, entity * 2 + is_alternate)
+        pairs: Dict[Tuple[str, int], None] = {}
+        country_ids: Dict[Tuple[str, str], int] = {}
+        for i in range(n):
+            primary = {fold(dataset.value("name", i)), fold(dataset.value("ascii_name", i))}
+            for key in primary:
+                if key:
+                    pairs[(key, 2 * i)] = None
+            for name in dataset.alternate_names(i):
+                key = fold(name)
+                if key and key not in primary:
+                    pairs[(key, 2 * i + 1)] = None
+            country = dataset.value("country", i)
+            region = dataset.value("region", i)
+            cid = country_ids.get((country, region))
+            if cid is None:
+                cid = country_ids[(country, region)] = n + len(self.countries)
+                self.countries.append((country, dataset.value("country_code", i), region))
+                self.population.append(0)
+                pairs[(fold(country), 2 * cid)] = None
+            self.population[cid] += self.population[i]
+
+        ordered = sorted(pairs)
+        self.keys: List[str] = [k for k, _ in ordered]
+        self.entities: List[int] = [e for _, e in ordered]
+        self.top: Dict[str, List[int]] = {}
+        self._precompute_top(top_prefix_len)
+
+    def _best(self, entries, limit: int) -> List[int]:
+        # entries are entity * 2 + is_alternate; an entity ranks by its best match
+        best: Dict[int, int] = {}
+        for e in entries:
+            entity, alt = e >> 1, e & 1
+            if best.get(entity, 1) >= alt:
+                best[entity] = alt
+        pop = self.population
+        return heapq.nlargest(limit, best,
+                              key=lambda entity: (1 - best[entity], pop[entity], -entity))
+
+    def _precompute_top(self, max_len: int) -> None:
+        # Short prefixes cover thousands of keys; keep their best SUGGEST_LIMIT_MAX instead
+        for length in range(1, max_len + 1):
+            groups: Dict[str, List[int]] = {}
+            for key, entity in zip(self.keys, self.entities):
+                if len(key) >= length:
+                    groups.setdefault(key[:length], []).append(entity)
+            for prefix, entries in groups.items():
+                self.top[prefix] = self._encode(entries, self._best(entries, SUGGEST_LIMIT_MAX))
+
+    @staticmethod
+    def _encode(entries, entities: List[int]) -> List[int]:
+        # Back to entries so precomputed lists merge like raw ranges
+        primary = {e >> 1 for e in entries if not e & 1}
+        return [2 * e + (0 if e in primary else 1) for e in entities]
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def _has_prefix(self, prefix: str) -> bool:
+        lo = bisect_left(self.keys, prefix)
+        return lo < len(self.keys) and self.keys[lo].startswith(prefix)
+
+    def _prefix_entries(self, prefix: str, limit: int) -> List[int]:
+        top = self.top.get(prefix)
+        if top is not None:
+            return top[:limit]
+        lo, hi = self._range(prefix)
+        return self.entities[lo:hi]
+
+    def prefix_matches(self, prefix: str, limit: int) -> List[int]:
+        return self._best(self._prefix_entries(prefix, limit), limit)
+
+    def _next_chars(self, prefix: str) -> List[str]:
+        # Distinct characters following `prefix` in the index, by jumping over each run
+        chars = []
+        n = len(prefix)
+        lo, hi = self._range(prefix)
+        while lo < hi:
+            key = self.keys[lo]
+            if len(key) == n:
+                lo += 1
+                continue
+            c = key[n]
+            chars.append(c)
+            lo = bisect_left(self.keys, prefix + chr(ord(c) + 1), lo, hi)
+        return chars
+
+    def fuzzy_matches(self, q: str, limit: int) -> List[int]:
+        # The edit has to fall within the longest matching prefix (or just after it)
+        m = 0
+        while m < len(q) and self._has_prefix(q[:m + 1]):
+            m += 1
+        variants = set()
+        for i in range(min(m, len(q) - 1) + 1):
+            head, rest = q[:i], q[i:]
+            variants.add(head + rest[1:])  # deletion
+            if len(rest) > 1:
+                variants.add(head + rest[1] + rest[0] + rest[2:])  # transposition
+            if not head:
+                continue
+            for c in self._next_chars(head):
+                if c != rest[0]:
+                    variants.add(head + c + rest[1:])  # substitution
+                variants.add(head + c + rest)  # insertion
+        variants.discard(q)
+        found = []
+        for v in variants:
+            if v and self._has_prefix(v):
+                found.extend(self._prefix_entries(v, limit))
+        return self._best(found, limit)
+
+    def suggest(self, q: str, limit: int = 10) -> Tuple[List[int], bool]:
+        """Best entities for `q` and whether the typo-tolerant fallback produced them."""
+        key = fold(q)
+        if not key:
+            return [], False
+        limit = max(1, min(limit, SUGGEST_LIMIT_MAX))
+        hits = self.prefix_matches(key, limit)
+        if hits or len(key) < SUGGEST_MIN_FUZZY_LEN:
+            return hits, False
+        return self.fuzzy_matches(key, limit), True
+
+    def describe(self, entity: int) -> Dict[str, Any]:
+        n = len(self.ds)
+        if entity >= n:
+            name, code, region = self.countries[entity - n]
+            return {"type": "country", "name": name, "country_code": code, "region": region,
+                    "population": self.population[entity]}
+        ds = self.ds
+        return {
+            "type": "city",
+            "geoname_id": ds.columns["geoname_id"][entity],
+            "name": ds.value("name", entity),
+            "country": ds.value("country", entity),
+            "country_code": ds.value("country_code", entity),
+            "region": ds.value("region", entity),
+            "population": self.population[entity],
+            "latitude": ds.columns["lat"][entity],
+            "longitude": ds.columns["lon"][entity],
+        }
+
+
+_index: SuggestIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_suggest_index() -> SuggestIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SuggestIndex(get_geo_dataset())
+    return _index
+
+
+def reset_suggest_index() -> None:
+    global _index
+    _index = None
@@ -0,0 +1,111 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .cache import SharedGeneration
+from .jsoncodec import dumps
+
+logger = logging.getLogger("geo_loader")
+
+# GEO_TREE_CACHE=0 sends every dropdown request to MySQL, as before
+GEO_TREE_CACHE = os.getenv("GEO_TREE_CACHE", "1") == "1"
+GEO_GENERATION_CHECK_INTERVAL = float(os.getenv("GEO_GENERATION_CHECK_INTERVAL", "2"))
+
+# Bumped by every reseed; shared through the cache backend so all workers drop their trees
+GEO_GENERATION = SharedGeneration("geo:generation", check_interval=GEO_GENERATION_CHECK_INTERVAL)
+
+
+class GeoTree:
+    """The whole regions → countries → cities tree as ready-to-send response bodies.
+
+    Bodies are the exact JSON that /regions, /countries?region_id= and /cities?country_id=
+    produce from MySQL, encoded once when the tree is loaded.
+    """
+
+    def __init__(self, generation: int, regions: bytes, countries: Dict[int, bytes],
+                 cities: Dict[int, bytes]):
+        self.generation = generation
+        self.regions = regions
+        self.countries = countries
+        self.cities = cities
+        self.loaded_at = time.time()
+
+    @classmethod
+    def load(cls, engine: Engine, generation: int) -> "GeoTree":
+        with engine.connect() as conn:
+            regions = conn.execute(
+                text("SELECT id, name FROM regions ORDER BY name")
+            ).mappings().all()
+            countries = conn.execute(
+                text("SELECT id, region_id, name FROM countries ORDER BY name")
+            ).mappings().all()
+            cities = conn.execute(text(
+                "SELECT id, country_id, name, is_capital FROM cities ORDER BY is_capital DESC, name"
+            )).mappings().all()
+        by_region: Dict[int, List[dict]] = {}
+        for c in countries:
+            by_region.setdefault(c["region_id"], []).append({"id": c["id"], "name": c["name"]})
+        by_country: Dict[int, List[dict]] = {}
+        for c in cities:
+            by_country.setdefault(c["country_id"], []).append(
+                {"id": c["id"], "name": c["name"], "is_capital": int(c["is_capital"])}
+            )
+        return cls(
+            generation,
+            dumps([{"id": r["id"], "name": r["name"]} for r in regions]),
+            {rid: dumps(items) for rid, items in by_region.items()},
+            {cid: dumps(items) for cid, items in by_country.items()},
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "generation": self.generation,
+            "countries": len(self.countries),
+            "cities": len(self.cities),
+            "bytes": (len(self.regions) + sum(map(len, self.countries.values()))
+                      + sum(map(len, self.cities.values()))),
+        }
+
+
+_tree: GeoTree | None = None
+_tree_lock = threading.Lock()
+
+
+def peek_geo_tree() -> GeoTree | None:
+    """The loaded tree if it is still current, without ever querying (async handlers use this
+    first and load through get_geo_tree in the threadpool only on a miss)."""
+    tree = _tree
+    if GEO_TREE_CACHE and tree is not None and tree.generation == GEO_GENERATION.current():
+        return tree
+    return None
+
+
+def get_geo_tree(engine: Engine) -> GeoTree | None:
+    """The cached tree for the current generation (loaded on first use), or None when disabled."""
+    global _tree
+    if not GEO_TREE_CACHE:
+        return None
+    generation = GEO_GENERATION.current()
+    tree = _tree
+    if tree is not None and tree.generation == generation:
+        return tree
+    with _tree_lock:
+        if _tree is None or _tree.generation != generation:
+            started = time.perf_counter()
+            _tree = GeoTree.load(engine, generation)
+            logger.info("geo tree loaded in %.3fs: %s", time.perf_counter() - started,
+                        _tree.stats())
+        return _tree
+
+
+def bump_geo_generation() -> int:
+    """Mark the geo tables as rewritten: this worker and, within the check interval, every other
+    worker reload their tree on next use."""
+    global _tree
+    _tree = None
+    return GEO_GENERATION.bump()
@@ -0,0 +1,267 @@
+import os
+import re
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Tuple
+
+from .amadeus_gateway import ResponseError
+from .cache import aget_cache, aset_cache
+from .geo_suggest import fold
+
+logger = logging.getLogger("amadeus_logger")
+
+# Resolved names are kept for a month, unknown names for an hour
+IATA_INDEX_TTL = int(os.getenv("IATA_INDEX_TTL", str(30 * 86400)))
+IATA_NEGATIVE_TTL = int(os.getenv("IATA_NEGATIVE_TTL", "3600"))
+# IATA_GEONAMES=0 skips the city codes found in the local GeoNames alternate names
+IATA_GEONAMES = os.getenv("IATA_GEONAMES", "1") == "1"
+
+INDEX_PREFIX = "iata_resolver:"
+
+# Multi-airport cities: the metropolitan code Amadeus searches on, which is often not the
+# first match of a city lookup
+METRO_CODES = {
+    "paris": "PAR",
+    "athens": "ATH",
+    "madrid": "MAD",
+    "moscow": "MOW",
+    "beijing": "BJS",
+    "london": "LON",
+    "rome": "ROM",
+    "milan": "MIL",
+    "berlin": "BER",
+    "stockholm": "STO",
+    "bucharest": "BUH",
+    "istanbul": "IST",
+    "new york": "NYC",
+    "washington": "WAS",
+    "chicago": "CHI",
+    "toronto": "YTO",
+    "montreal": "YMQ",
+    "sao paulo": "SAO",
+    "rio de janeiro": "RIO",
+    "buenos aires": "BUE",
+    "tokyo": "TYO",
+    "osaka": "OSA",
+    "seoul": "SEL",
+    "jakarta": "JKT",
+}
+
+# Local and former names not covered by the GeoNames data, folded
+ALIASES = {
+    "athina": "athens",
+    "athenes": "athens",
+    "roma": "rome",
+    "moskva": "moscow",
+    "peking": "beijing",
+    "londres": "london",
+    "milano": "milan",
+    "lisboa": "lisbon",
+    "munchen": "munich",
+    "koln": "cologne",
+    "wien": "vienna",
+    "praha": "prague",
+    "warszawa": "warsaw",
+    "firenze": "florence",
+    "venezia": "venice",
+    "napoli": "naples",
+    "bruxelles": "brussels",
+    "kobenhavn": "copenhagen",
+    "bombay": "mumbai",
+    "new york city": "new york",
+}
+
+RESOLVER_STATS = {"warm": 0, "cold": 0, "negative": 0, "upstream_calls": 0, "upstream_errors": 0,
+                  "from_cached_responses": 0, "from_geonames": 0}
+
+_SEPARATORS = re.compile(r"[\s\-'’.,/]+")
+
+
+def is_iata(value: str) -> bool:
+    return len(value) == 3 and value.isalpha() and value.isupper()
+
+
+def normalize(name: str) -> str:
+    """Index key for a city name: case, accents and punctuation folded ("São-Paulo" and
+    "sao paulo"), "St." spelled out and known aliases mapped to one name."""
+    words = _SEPARATORS.sub(" ", fold(name)).split()
+    if words and words[0] in ("st", "ste"):
+        words[0] = "saint" if words[0] == "st" else "sainte"
+    key = " ".join(words)
+    return ALIASES.get(key, key)
+
+
+def build_geonames_codes(dataset) -> Dict[str, str]:
+    """Folded name → city code for GeoNames cities with exactly one IATA-like alternate name.
+    Every name of such a city points at the code; a name shared by several cities keeps the
+    most populous one."""
+    codes: Dict[str, Tuple[str, int]] = {}
+    population = dataset.columns["population"]
+    for i in range(len(dataset)):
+        alternates = dataset.alternate_names(i)
+        found = {a for a in alternates if is_iata(a) and a.isascii()}
+        if len(found) != 1:
+            continue
+        code = found.pop()
+        pop = population[i]
+        for name in [dataset.value("name", i), dataset.value("ascii_name", i)] + alternates:
+            key = normalize(name) if name and not is_iata(name) else ""
+            if key and codes.get(key, ("", -1))[1] < pop:
+                codes[key] = (code, pop)
+    return {key: code for key, (code, _) in codes.items()}
+
+
+_geonames_codes: Dict[str, str] | None = None
+_geonames_lock = threading.Lock()
+
+
+def geonames_codes() -> Dict[str, str]:
+    global _geonames_codes
+    if _geonames_codes is None:
+        with _geonames_lock:
+            if _geonames_codes is None:
+                codes: Dict[str, str] = {}
+                if IATA_GEONAMES:
+                    from .geo_dataset import get_geo_dataset
+
+                    try:
+                        codes = build_geonames_codes(get_geo_dataset())
+                    except (FileNotFoundError, ValueError) as e:
+                        logger.info("No GeoNames city codes for the IATA resolver: %s", e)
+                _geonames_codes = codes
+    return _geonames_codes
+
+
+def reset_geonames_codes() -> None:
+    global _geonames_codes
+    _geonames_codes = None
+
+
+def _airport_codes(items: List[Any]) -> List[str]:
+    codes = []
+    for item in items:
+        if isinstance(item, dict):
+            code = item.get("iataCode") or (item.get("address") or {}).get("iataCode")
+            if code and code not in codes:
+                codes.append(code)
+    return codes
+
+
+def _city_code(items: List[Any], key: str) -> str | None:
+    # An exact name match beats the first result
+    cities = [i for i in items if isinstance(i, dict) and i.get("iataCode")]
+    for item in cities:
+        if normalize(item.get("name") or "") == key:
+            return item["iataCode"]
+    return cities[0]["iataCode"] if cities else None
+
+
+class IataResolver:
+    """City name (or IATA code) → (city code, airport codes), shared by the API and the scripts.
+
+    Resolutions are kept in the cache tiers under "iata_resolver:<key>", so they outlive the
+    process and are shared by every worker and script using the same cache backend; a warm
+    name costs no upstream call. A cold name is resolved from, in order: the metropolitan code
+    table, the city codes in the local GeoNames alternate names, cached `/locations` responses
+    and finally Amadeus itself (through `client.get`, so the caller's rate limits and retries
+    apply). Names Amadeus does not know are remembered for IATA_NEGATIVE_TTL.
+
+    Within one resolver, concurrent callers asking for the same name share one resolution.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._lookups: Dict[str, asyncio.Task] = {}
+        self.lookups = 0
+        self.hits = 0
+        self.warm = 0
+        self.upstream_calls = 0
+
+    async def resolve(self, name: str) -> Tuple[str | None, List[str]]:
+        raw = name.strip()
+        key = f"code:{raw}" if is_iata(raw) else f"name:{normalize(raw)}"
+        task = self._lookups.get(key)
+        if task is None:
+            task = self._lookups[key] = asyncio.ensure_future(self._resolve(raw, key))
+            self.lookups += 1
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    async def _resolve(self, raw: str, key: str) -> Tuple[str | None, List[str]]:
+        if key in ("name:", "code:"):
+            return None, []
+        entry = await aget_cache(INDEX_PREFIX + key)
+        if entry is not None:
+            self.warm += 1
+            RESOLVER_STATS["warm"] += 1
+            if entry["city"] is None and not entry["airports"]:
+                RESOLVER_STATS["negative"] += 1
+            return entry["city"], entry["airports"]
+        RESOLVER_STATS["cold"] += 1
+
+        if key.startswith("code:"):
+            keyword, city = raw, raw
+        else:
+            keyword = key[len("name:"):]
+            city = METRO_CODES.get(keyword)
+            if city is None:
+                city = (await asyncio.to_thread(geonames_codes)).get(keyword)
+                if city is not None:
+                    RESOLVER_STATS["from_geonames"] += 1
+
+        # Responses the /locations route already cached, under the name as typed
+        city_data = airports_data = None
+        for variant in dict.fromkeys((raw, keyword, keyword.upper())):
+            city_data = city_data or await aget_cache(f"locations_{variant}_CITY")
+            airports_data = airports_data or await aget_cache(f"locations_{variant}_AIRPORT")
+        if city_data or airports_data:
+            RESOLVER_STATS["from_cached_responses"] += 1
+
+        failed = False
+
+        async def lookup(path: str, **params: Any) -> List[Any]:
+            nonlocal failed
+            self.upstream_calls += 1
+            RESOLVER_STATS["upstream_calls"] += 1
+            try:
+                resp = await self.client.get(path, **params)
+            except ResponseError:
+                failed = True
+                RESOLVER_STATS["upstream_errors"] += 1
+                return []
+            return resp.data if isinstance(resp.data, list) else []
+
+        pending = []
+        if city is None and city_data is None:
+            pending.append(lookup("/v1/reference-data/locations/cities", keyword=keyword))
+        if airports_data is None:
+            pending.append(lookup("/v1/reference-data/locations", keyword=keyword,
+                                  subType="AIRPORT"))
+        results = list(await asyncio.gather(*pending))
+        if city is None and city_data is None:
+            city_data = results.pop(0)
+        if airports_data is None:
+            airports_data = results.pop(0)
+
+        if city is None:
+            city = _city_code(city_data or [], keyword)
+        airports = _airport_codes(airports_data or [])
+        # Stable preference: the city code, when it is an airport code too, comes first
+        if city in airports:
+            airports = [city] + [c for c in airports if c != city]
+
+        if not failed:
+            known = city is not None or airports
+            await aset_cache(INDEX_PREFIX + key, {"city": city, "airports": airports},
+                             ttl=IATA_INDEX_TTL if known else IATA_NEGATIVE_TTL)
+        return city, airports
+
+    def stats(self) -> Dict[str, int]:
+        return {"distinct_cities": self.lookups, "reused": self.hits, "warm": self.warm,
+                "resolver_upstream_calls": self.upstream_calls}
+
+
+def resolver_stats() -> Dict[str, int]:
+    return dict(RESOLVER_STATS)
@@ -0,0 +1,79 @@
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+JOURNEY_COLUMNS = ("user_id", "destination_country", "destination_city", "budget")
+
+# Child tables of a journey, in insert order, with the columns taken from each payload row
+CHILD_TABLES: Dict[str, tuple] = {
+    "flights": ("airline", "origin_city", "destination_city", "departure_date", "arrival_date",
+                "price"),
+    "accommodations": ("name", "address", "city", "price_per_night"),
+    "transportation": ("type", "provider", "price"),
+    "food_choices": ("restaurant", "cuisine", "price_range"),
+    "shopping_choices": ("shop_name", "category", "price_range"),
+    "places_to_visit": ("place_name", "category", "description"),
+}
+
+# Placeholder rows seeded when a journey comes without any of its own
+DEFAULT_CHILDREN: Dict[str, Dict[str, Any]] = {
+    "transportation": {"type": "Metro", "provider": "City Transit", "price": 15.0},
+    "food_choices": {"restaurant": "Local Bistro", "cuisine": "Mediterranean", "price_range": "$$"},
+    "shopping_choices": {"shop_name": "Central Mall", "category": "General", "price_range": "$$$"},
+}
+
+
+def _insert_sql(table: str, columns: Iterable[str]) -> str:
+    cols = ", ".join(columns)
+    params = ", ".join(f":{c}" for c in columns)
+    return f"INSERT INTO {table} ({cols}) VALUES ({params})"
+
+
+def missing_child_field(journey: Dict[str, Any]) -> str | None:
+    """First child field absent from the payload, as "flights[0].price", or None. Fields may
+    be null, but every column has to be given, as it had to be for row-by-row INSERTs."""
+    for table, columns in CHILD_TABLES.items():
+        for i, item in enumerate(journey.get(table) or []):
+            if not isinstance(item, dict):
+                return f"{table}[{i}]"
+            for c in columns:
+                if c not in item:
+                    return f"{table}[{i}].{c}"
+    return None
+
+
+def insert_journeys(conn: Connection, journeys: List[Dict[str, Any]],
+                    with_defaults: bool = True) -> List[int]:
+    """Insert journeys and all their child rows on `conn`; returns the new journey ids.
+
+    Each journey row is its own INSERT (its id keys the children), then every child table
+    gets a single executemany across all journeys, which the MySQL driver sends as one
+    multi-row INSERT. Round-trips are O(journeys + tables) instead of O(rows). Raises
+    ValueError, before writing anything, when a child row lacks one of its columns.
+    """
+    for journey in journeys:
+        missing = missing_child_field(journey)
+        if missing is not None:
+            raise ValueError(f"Missing field: {missing}")
+    journey_sql = text(_insert_sql("journeys", JOURNEY_COLUMNS))
+    journey_ids = []
+    for journey in journeys:
+        res = conn.execute(journey_sql, {c: journey.get(c) for c in JOURNEY_COLUMNS})
+        journey_ids.append(res.lastrowid)
+
+    for table, columns in CHILD_TABLES.items():
+        rows = []
+        for journey_id, journey in zip(journey_ids, journeys):
+            items = journey.get(table) or []
+            if not items and with_defaults and table in DEFAULT_CHILDREN:
+                items = [DEFAULT_CHILDREN[table]]
+            rows.extend({"journey_id": journey_id, **{c: item.get(c) for c in columns}}
+                        for item in items)
+        if rows:
+            conn.execute(text(_insert_sql(table, ("journey_id",) + columns)), rows)
+    return journey_ids
+
+
+def insert_journey(conn: Connection, journey: Dict[str, Any], with_defaults: bool = True) -> int:
+    return insert_journeys(conn, [journey], with_defaults=with_defaults)[0]
@@ -0,0 +1,70 @@
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger("lifecycle")
+
+
+class Lifecycle:
+    """Startup work of one worker, tracked per component for the health endpoints.
+
+    Components run as background tasks so the worker starts serving right away. A `required`
+    component must have finished before the worker reports ready; optional ones (such as geo
+    seeding) are only reported. Liveness never depends on any of them.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self, name: str, fn: Callable[[], Awaitable[Any]],
+              required: bool = True) -> asyncio.Task:
+        state = self.components[name] = {"state": "running", "required": required}
+
+        async def run():
+            t0 = time.perf_counter()
+            try:
+                result = await fn()
+                state.update(state="ready", result=result)
+            except asyncio.CancelledError:
+                state.update(state="cancelled")
+                raise
+            except Exception as e:
+                logger.exception("startup component %s failed", name)
+                state.update(state="failed", error=f"{type(e).__name__}: {e}")
+            finally:
+                state["seconds"] = round(time.perf_counter() - t0, 3)
+
+        task = self._tasks[name] = asyncio.create_task(run(), name=f"startup:{name}")
+        return task
+
+    async def wait(self, name: str) -> None:
+        """Wait for another component to finish (without cancelling it if the waiter is)."""
+        task = self._tasks.get(name)
+        if task is not None:
+            await asyncio.shield(task)
+
+    def ready(self) -> bool:
+        # Nothing registered yet means startup has not run
+        return bool(self.components) and all(
+            c["state"] == "ready" for c in self.components.values() if c["required"]
+        )
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "live": True,
+            "ready": self.ready(),
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "components": self.components,
+        }
+
+    async def shutdown(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+
+LIFECYCLE = Lifecycle()
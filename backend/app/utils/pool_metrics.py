@@ -0,0 +1,117 @@
+import time
+import threading
+from collections import deque
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Checkout waits kept for the percentiles; older ones only count in the totals
+WAIT_SAMPLES = 2048
+
+
+class PoolMetrics:
+    """Counters for one connection pool: how long checkouts wait, how many connections are in
+    use, how often the pool overflows past `pool_size` and how often a checkout times out."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits: deque = deque(maxlen=WAIT_SAMPLES)
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.overflow_connects = 0
+        self.invalidations = 0
+        self.peak_in_use = 0
+
+    def record_wait(self, seconds: float, in_use: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.waits.append(seconds)
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.peak_in_use = max(self.peak_in_use, in_use)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self.waits)
+
+        def pct(q: float) -> float | None:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(len(waits) * q))] * 1000, 3)
+
+        return {
+            "checkouts": self.checkouts,
+            "wait_ms": {
+                "p50": pct(0.5),
+                "p95": pct(0.95),
+                "p99": pct(0.99),
+                "max": round(self.wait_max * 1000, 3),
+                "mean": (round(self.wait_total / self.checkouts * 1000, 3)
+                         if self.checkouts else None),
+            },
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "overflow_connects": self.overflow_connects,
+            "invalidations": self.invalidations,
+            "peak_in_use": self.peak_in_use,
+        }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout, including the wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "invalidate", self._on_invalidate)
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception as e:
+            # sqlalchemy.exc.TimeoutError: pool_size + max_overflow all busy for pool_timeout
+            if type(e).__name__ == "TimeoutError":
+                self.metrics.record_timeout()
+            raise
+        self.metrics.record_wait(time.perf_counter() - t0, self.checkedout())
+        return conn
+
+    def recreate(self):
+        # Keep counting across engine.dispose() / pool recreation
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.metrics.connects += 1
+        if self.overflow() > 0:
+            self.metrics.overflow_connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.metrics.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout_s": self._timeout,
+            "recycle_s": self._recycle,
+            "in_use": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(0, self.overflow()),
+            **self.metrics.stats(),
+        }
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """The same instrumentation for the asyncio engine's pool."""
@@ -0,0 +1,384 @@
+import os
+import math
+import time
+import heapq
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .amadeus_gateway import ResponseError, is_retriable
+from .cache import aget_cache_entry, get_cache, set_cache
+from .jsoncodec import loads
+from .rate_limit import TokenBucket, family_for, get_rate_limits
+from .resilience import get_breakers, retry
+from .swr import POLICIES, CachePolicy, refresh
+
+logger = logging.getLogger("amadeus_logger")
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "0") == "1"
+PREFETCH_SEEDS = Path(os.getenv("PREFETCH_SEEDS")
+                      or Path(__file__).resolve().parents[1] / "prefetch_seeds.json")
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "30"))
+# Hot keys kept per kind (routes, cities, geocodes, ...)
+PREFETCH_TOP_K = int(os.getenv("PREFETCH_TOP_K", "50"))
+# A key is refreshed once less than max(PREFETCH_LEAD_MIN, PREFETCH_LEAD_FRACTION * ttl) is left
+PREFETCH_LEAD_MIN = float(os.getenv("PREFETCH_LEAD_MIN", "30"))
+PREFETCH_LEAD_FRACTION = float(os.getenv("PREFETCH_LEAD_FRACTION", "0.1"))
+# Upstream budget of the prefetcher: calls per second, calls per pass, and monthly calls per API
+# family it leaves to user requests
+PREFETCH_RATE = float(os.getenv("PREFETCH_RATE", "1"))
+PREFETCH_MAX_PER_PASS = int(os.getenv("PREFETCH_MAX_PER_PASS", "100"))
+PREFETCH_QUOTA_RESERVE = int(os.getenv("PREFETCH_QUOTA_RESERVE", "1000"))
+# Request counts halve every PREFETCH_HALF_LIFE seconds so yesterday's hot keys cool down
+PREFETCH_HALF_LIFE = float(os.getenv("PREFETCH_HALF_LIFE", "3600"))
+PREFETCH_MAX_KEYS = int(os.getenv("PREFETCH_MAX_KEYS", "10000"))
+PREFETCH_PUBLISH_INTERVAL = float(os.getenv("PREFETCH_PUBLISH_INTERVAL", "60"))
+
+# Hot keys of all workers, read by the CLI prefetcher
+HOT_KEYS_CACHE_KEY = "prefetch_hot_keys"
+
+
+class Endpoint:
+    """A cached Amadeus GET: upstream path, cache key template over its parameters, freshness
+    policy and the kind of key it produces for the top-K lists."""
+
+    def __init__(self, path: str, key: str, policy: CachePolicy, kind: str):
+        self.path = path
+        self.key = key
+        self.policy = policy
+        self.kind = kind
+
+    def cache_key(self, params: Dict[str, Any]) -> str:
+        return self.key.format(**params)
+
+
+ENDPOINTS: Dict[str, Endpoint] = {
+    "flight_offers_search": Endpoint(
+        "/v2/shopping/flight-offers",
+        "flight_offers_search_{originLocationCode}_{destinationLocationCode}"
+        "_{departureDate}_{adults}",
+        CachePolicy(600), "routes"),
+    "flight_destinations": Endpoint("/v1/shopping/flight-destinations",
+                                    "flight_destinations_{origin}",
+                                    POLICIES["flight_destinations"], "routes"),
+    "flight_dates": Endpoint("/v1/shopping/flight-dates", "flight_dates_{origin}_{destination}",
+                             POLICIES["flight_dates"], "routes"),
+    "locations": Endpoint("/v1/reference-data/locations", "locations_{keyword}_{subType}",
+                          POLICIES["locations"], "cities"),
+    "activities_geo": Endpoint("/v1/shopping/activities", "activities_geo_{latitude}_{longitude}",
+                               CachePolicy(900), "geocodes"),
+    "activities_square": Endpoint("/v1/shopping/activities/by-square",
+                                  "activities_square_{north}_{west}_{south}_{east}",
+                                  CachePolicy(900), "geocodes"),
+    "hotel_offers": Endpoint("/v3/shopping/hotel-offers", "hotel_offers_{hotelIds}_{adults}",
+                             POLICIES["hotel_offers"], "hotels"),
+    "checkin_links": Endpoint("/v2/reference-data/urls/checkin-links",
+                              "checkin_links_{airlineCode}",
+                              POLICIES["checkin_links"], "other"),
+}
+
+# (endpoint name, upstream parameters): enough to refetch a key from any process
+Spec = Tuple[str, Dict[str, Any]]
+
+
+def load_seeds(path: Path = PREFETCH_SEEDS) -> List[Spec]:
+    """Seed list: a JSON array of {"endpoint": <name in ENDPOINTS>, "params": {...}} kept warm
+    whether or not anyone asked for them yet. A missing file is an empty list."""
+    try:
+        entries = loads(path.read_bytes())
+    except FileNotFoundError:
+        return []
+    seeds = []
+    for entry in entries:
+        endpoint = ENDPOINTS.get(entry.get("endpoint"))
+        try:
+            endpoint.cache_key(entry.get("params") or {})
+        except (AttributeError, KeyError) as e:
+            raise ValueError(f"bad prefetch seed {entry!r} in {path}: {e!r}") from None
+        seeds.append((entry["endpoint"], entry.get("params") or {}))
+    return seeds
+
+
+class HotKeys:
+    """Request counts per cache key (halved every `half_life` seconds), the spec to refetch each
+    key, and cache hits and misses of the requests seen.
+
+    `publish` writes the top keys to the shared cache, merged with what other workers
+    published, so a prefetcher in another process can use them. It is called from the prefetch
+    loop (or `publish_forever`) in a worker thread, never from the request path, so the counters
+    are guarded by a lock that is held only while they are read or updated, not during cache I/O.
+    """
+
+    def __init__(self, max_keys: int = PREFETCH_MAX_KEYS, half_life: float = PREFETCH_HALF_LIFE):
+        self.max_keys = max_keys
+        self.half_life = half_life
+        self.counts: Dict[str, float] = {}
+        self.specs: Dict[str, Spec] = {}
+        self.hits = 0
+        self.misses = 0
+        # Hits and misses when the prefetcher started, to compare the ratio before and after
+        self.baseline: Tuple[int, int] | None = None
+        self._decayed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, key: str, hit: bool, endpoint: str | None = None,
+               params: Dict[str, Any] | None = None) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._decayed_at >= self.half_life:
+                self._decay(now)
+            self.counts[key] = self.counts.get(key, 0.0) + 1
+            if endpoint is not None:
+                self.specs[key] = (endpoint, dict(params or {}))
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if len(self.counts) > self.max_keys:
+                self._prune(self.max_keys // 2)
+
+    def _decay(self, now: float) -> None:
+        # Rounded first: on large monotonic clocks the elapsed time of exactly n half-lives can
+        # come out a hair short of n
+        halvings = math.floor(round((now - self._decayed_at) / self.half_life, 6))
+        factor = 0.5 ** halvings
+        self.counts = {k: c * factor for k, c in self.counts.items() if c * factor >= 0.5}
+        self.specs = {k: s for k, s in self.specs.items() if k in self.counts}
+        self._decayed_at += halvings * self.half_life
+
+    def _prune(self, keep: int) -> None:
+        kept = heapq.nlargest(keep, self.counts.items(), key=lambda kv: kv[1])
+        self.counts = dict(kept)
+        self.specs = {k: s for k, s in self.specs.items() if k in self.counts}
+
+    def top(self, k: int = PREFETCH_TOP_K) -> Dict[str, List[Tuple[str, float]]]:
+        """The `k` most requested refetchable keys of each kind, as (key, count)."""
+        with self._lock:
+            return self._top(k)
+
+    def _top(self, k: int) -> Dict[str, List[Tuple[str, float]]]:
+        by_kind: Dict[str, List[Tuple[str, float]]] = {}
+        for key, (endpoint, _) in self.specs.items():
+            items = by_kind.setdefault(ENDPOINTS[endpoint].kind, [])
+            items.append((key, self.counts.get(key, 0.0)))
+        return {kind: heapq.nlargest(k, items, key=lambda kv: kv[1])
+                for kind, items in by_kind.items()}
+
+    def publish(self, k: int = PREFETCH_TOP_K) -> None:
+        with self._lock:
+            hot = [(key, count, self.specs[key])
+                   for items in self._top(k).values() for key, count in items]
+        snapshot = get_cache(HOT_KEYS_CACHE_KEY) or {}
+        for key, count, (endpoint, params) in hot:
+            seen = snapshot.get(key)
+            snapshot[key] = {"endpoint": endpoint, "params": params,
+                             "count": max(count, seen["count"] if seen else 0.0)}
+        set_cache(HOT_KEYS_CACHE_KEY, snapshot, ttl=int(self.half_life * 2))
+
+    def mark_baseline(self) -> None:
+        self.baseline = (self.hits, self.misses)
+
+    def stats(self) -> Dict[str, Any]:
+        def ratio(hits: int, misses: int) -> float | None:
+            return round(hits / (hits + misses), 4) if hits + misses else None
+
+        out: Dict[str, Any] = {"keys": len(self.counts), "hits": self.hits, "misses": self.misses,
+                               "hit_ratio": ratio(self.hits, self.misses)}
+        if self.baseline is not None:
+            hits0, misses0 = self.baseline
+            out["hit_ratio_before_prefetch"] = ratio(hits0, misses0)
+            out["hit_ratio_since_prefetch"] = ratio(self.hits - hits0, self.misses - misses0)
+        out["top"] = {kind: [[key, round(count, 1)] for key, count in items[:10]]
+                      for kind, items in self.top().items()}
+        return out
+
+
+def published_hot_keys() -> List[Tuple[str, Spec, float]]:
+    """Hot keys published by the API workers, as (key, spec, count)."""
+    snapshot = get_cache(HOT_KEYS_CACHE_KEY) or {}
+    return [(key, (e["endpoint"], e["params"]), e["count"]) for key, e in snapshot.items()
+            if e.get("endpoint") in ENDPOINTS]
+
+
+def _lead(ttl: float) -> float:
+    return max(PREFETCH_LEAD_MIN, PREFETCH_LEAD_FRACTION * ttl)
+
+
+class Prefetcher:
+    """Keeps seed and hot keys cached by refetching them shortly before they expire.
+
+    Each pass collects candidates (the seed list plus the top `top_k` keys of each kind), skips
+    the ones with more than their lead time left, and refreshes the rest most requested first.
+    Refreshes go through the gateway, so the per-family rate limits, quota accounting and
+    circuit breakers apply, and on top take tokens from the prefetcher's own bucket
+    (`rate` calls/second, at most `max_per_pass` per pass). A family whose monthly quota has
+    less than `quota_reserve` calls left, or an endpoint whose breaker is open, is skipped.
+    """
+
+    def __init__(self, client, hot: HotKeys | None = None, seeds: Iterable[Spec] = (),
+                 top_k: int = PREFETCH_TOP_K, rate: float = PREFETCH_RATE,
+                 max_per_pass: int = PREFETCH_MAX_PER_PASS,
+                 quota_reserve: int = PREFETCH_QUOTA_RESERVE):
+        self.client = client
+        self.hot = hot
+        self.seeds = list(seeds)
+        self.top_k = top_k
+        self.bucket = TokenBucket(rate)
+        self.max_per_pass = max_per_pass
+        self.quota_reserve = quota_reserve
+        self.passes = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.last_pass: Dict[str, Any] = {}
+
+    async def candidates(self) -> Dict[str, Tuple[Spec, float]]:
+        found: Dict[str, Tuple[Spec, float]] = {}
+        for endpoint, params in self.seeds:
+            found[ENDPOINTS[endpoint].cache_key(params)] = ((endpoint, params), 0.0)
+        if self.hot is not None:
+            for items in self.hot.top(self.top_k).values():
+                for key, count in items:
+                    found[key] = (self.hot.specs[key], count)
+        else:
+            hot = sorted(await asyncio.to_thread(published_hot_keys), key=lambda item: -item[2])
+            kinds: Dict[str, int] = {}
+            for key, spec, count in hot:
+                kind = ENDPOINTS[spec[0]].kind
+                if kinds.get(kind, 0) < self.top_k:
+                    kinds[kind] = kinds.get(kind, 0) + 1
+                    found[key] = (spec, count)
+        return found
+
+    @staticmethod
+    async def _fresh(key: str) -> Tuple[bool, float | None]:
+        """(fresh now, seconds left before it is due for a refresh)"""
+        hit = await aget_cache_entry(key)
+        if hit is None:
+            return False, None
+        _, age, ttl = hit
+        return age <= ttl, ttl - age - _lead(ttl)
+
+    def _within_budget(self, path: str) -> bool:
+        if get_breakers().for_path(path).state == "open":
+            return False
+        family = get_rate_limits().stats()["families"][family_for(path)]
+        remaining = family["month_remaining"]
+        return remaining is None or remaining > self.quota_reserve
+
+    async def _refresh(self, key: str, spec: Spec) -> bool:
+        endpoint_name, params = spec
+        endpoint = ENDPOINTS[endpoint_name]
+
+        async def fetch():
+            response = await retry(lambda: self.client.get(endpoint.path, **params),
+                                   is_retriable, max_retries=2)
+            return response.data
+
+        await self.bucket.acquire()
+        try:
+            await refresh(key, fetch, endpoint.policy)
+            return True
+        except ResponseError as e:
+            logger.info("Prefetch of %s failed: %s", key, e)
+            return False
+
+    async def run_once(self) -> Dict[str, Any]:
+        """One pass; the report's coverage is the share of candidate requests (weighted by
+        count, seeds counting once) that would be served fresh, before and after the pass."""
+        started = time.perf_counter()
+        candidates = await self.candidates()
+        due: List[Tuple[float, float, str]] = []
+        weight_total = weight_fresh = 0.0
+        for key, (spec, count) in candidates.items():
+            fresh, left = await self._fresh(key)
+            weight = max(count, 1.0)
+            weight_total += weight
+            weight_fresh += weight if fresh else 0.0
+            if left is None or left <= 0:
+                due.append((-count, left if left is not None else float("-inf"), key))
+        due.sort()
+
+        refreshed = failed = skipped = 0
+        for _, _, key in due[:self.max_per_pass]:
+            spec = candidates[key][0]
+            if not self._within_budget(ENDPOINTS[spec[0]].path):
+                skipped += 1
+                continue
+            if await self._refresh(key, spec):
+                refreshed += 1
+            else:
+                failed += 1
+        self.passes += 1
+        self.refreshed += refreshed
+        self.failed += failed
+
+        fresh_after = 0.0
+        for key, (_, count) in candidates.items():
+            if (await self._fresh(key))[0]:
+                fresh_after += max(count, 1.0)
+        self.last_pass = {
+            "candidates": len(candidates),
+            "due": len(due),
+            "refreshed": refreshed,
+            "failed": failed,
+            "skipped_budget": skipped,
+            "deferred": max(0, len(due) - self.max_per_pass),
+            "coverage_before": round(weight_fresh / weight_total, 4) if weight_total else None,
+            "coverage_after": round(fresh_after / weight_total, 4) if weight_total else None,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        return self.last_pass
+
+    async def run_forever(self, interval: float = PREFETCH_INTERVAL) -> None:
+        if self.hot is not None:
+            self.hot.mark_baseline()
+        while True:
+            try:
+                if self.hot is not None:
+                    await asyncio.to_thread(self.hot.publish)
+                report = await self.run_once()
+                if report["refreshed"] or report["failed"]:
+                    logger.info("Prefetch pass: %s", report)
+            except Exception:
+                logger.exception("Prefetch pass failed")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"passes": self.passes, "refreshed": self.refreshed, "failed": self.failed,
+                "seeds": len(self.seeds), "last_pass": self.last_pass,
+                "bucket": self.bucket.stats()}
+
+
+HOT_KEYS = HotKeys()
+_prefetcher: Prefetcher | None = None
+
+
+def get_prefetcher() -> Prefetcher | None:
+    return _prefetcher
+
+
+async def run_in_process(client) -> None:
+    """The in-process prefetcher (PREFETCH_ENABLED=1), fed by this worker's hot keys."""
+    global _prefetcher
+    _prefetcher = Prefetcher(client, HOT_KEYS, load_seeds())
+    await _prefetcher.run_forever()
+
+
+async def publish_forever(hot: HotKeys = HOT_KEYS,
+                          interval: float = PREFETCH_PUBLISH_INTERVAL) -> None:
+    """Publishes this worker's hot keys for a CLI prefetcher when the in-process one is off."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(hot.publish)
+        except Exception:
+            logger.exception("Publishing hot keys failed")
+
+
+def prefetch_stats() -> Dict[str, Any]:
+    out: Dict[str, Any] = {"enabled": PREFETCH_ENABLED, "requests": HOT_KEYS.stats()}
+    if _prefetcher is not None:
+        out["prefetcher"] = _prefetcher.stats()
+    return out
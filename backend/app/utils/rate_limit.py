@@ -0,0 +1,300 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict
+
+logger = logging.getLogger("amadeus_logger")
+
+# Amadeus limits are per API family; unknown paths share the "other" bucket
+FAMILIES = ("shopping", "reference-data", "analytics", "other")
+RATE_DEFAULTS = {"shopping": 10.0, "reference-data": 10.0, "analytics": 5.0, "other": 10.0}
+
+# AMADEUS_RATE_SHARED=1 also caps the total across workers through the Redis cache backend
+RATE_SHARED = os.getenv("AMADEUS_RATE_SHARED", "0") == "1"
+RETRY_429 = int(os.getenv("AMADEUS_RETRY_429", "2"))
+# Base of the exponential backoff when a 429 carries no Retry-After
+RETRY_429_BACKOFF = float(os.getenv("AMADEUS_RETRY_429_BACKOFF", "1.0"))
+# Longest Retry-After we are willing to sleep through before giving up with the 429
+RETRY_AFTER_MAX = float(os.getenv("AMADEUS_RETRY_AFTER_MAX", "10"))
+
+
+def _env_name(family: str) -> str:
+    return family.upper().replace("-", "_")
+
+
+def family_for(path: str) -> str:
+    parts = path.strip("/").split("/")
+    if len(parts) >= 2:
+        if parts[1] == "shopping":
+            return "shopping"
+        if parts[1] == "reference-data":
+            return "reference-data"
+        if parts[1] == "travel" and len(parts) >= 3 and parts[2] == "analytics":
+            return "analytics"
+    return "other"
+
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """Retry-After as seconds to wait: either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """At most `rate` acquisitions per second on average, with bursts of up to `burst`.
+
+    Waiters queue on a lock so they are served in order. `pause` empties the bucket until a
+    given time, which is how a 429 holds back every caller of the family, not just the one
+    that got it. A rate of 0 disables the bucket.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.acquired = 0
+        self.waits = 0
+        self.waited = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            self.acquired += 1
+            return
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        async with self._lock:
+            waited = False
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    self.acquired += 1
+                    return
+                else:
+                    delay = (1 - self._tokens) / self.rate
+                if not waited:
+                    self.waits += 1
+                    waited = True
+                self.waited += delay
+                await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0.0
+        self._paused_until = max(self._paused_until, now + seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        if self.rate > 0:
+            self._refill(now)
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "acquired": self.acquired,
+            "waits": self.waits,
+            "waited_seconds": round(self.waited, 3),
+            "paused_for": round(max(0.0, self._paused_until - now), 3),
+        }
+
+
+class SharedWindow:
+    """Cross-worker cap: a per-second counter per family in Redis (INCR on a key that expires),
+    so all workers together stay under the family's rate.
+
+    The client is synchronous, so each round-trip runs in a worker thread rather than on the
+    event loop. A denied attempt takes its increment back, so waiting callers do not use up
+    the window.
+    """
+
+    def __init__(self, client, prefix: str = "eoex:rate:"):
+        self.client = client
+        self.prefix = prefix
+        self.errors = 0
+
+    def _take(self, key: str, rate: float) -> bool:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.incr(key)
+        pipe.expire(key, 2)
+        if pipe.execute()[0] <= rate:
+            return True
+        self.client.decr(key)
+        return False
+
+    async def delay(self, family: str, rate: float) -> float:
+        now = time.time()
+        key = f"{self.prefix}{family}:{int(now)}"
+        try:
+            taken = await asyncio.to_thread(self._take, key, rate)
+        except Exception:
+            # Redis down: fall back to the per-process buckets rather than failing calls
+            self.errors += 1
+            return 0.0
+        return 0.0 if taken else int(now) + 1 - now
+
+    def _incr_month(self, key: str) -> int:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.incr(key)
+        pipe.expire(key, 40 * 86400)
+        return pipe.execute()[0]
+
+    async def count_month(self, family: str) -> int | None:
+        key = f"{self.prefix}quota:{family}:{time.strftime('%Y-%m')}"
+        try:
+            return await asyncio.to_thread(self._incr_month, key)
+        except Exception:
+            self.errors += 1
+            return None
+
+
+# Shares of a monthly quota logged as a warning, once each per family and month
+QUOTA_WARNINGS = (0.9, 1.0)
+
+
+class RateLimits:
+    """One bucket per Amadeus API family plus quota accounting, shared by every call of the
+    process (routes and scripts alike, through the gateway).
+
+    Rates come from AMADEUS_RATE_<FAMILY> (calls/second) and AMADEUS_BURST_<FAMILY>; an optional
+    monthly budget AMADEUS_QUOTA_<FAMILY> is reported as used/remaining (counted across workers
+    when shared, per process otherwise).
+    """
+
+    def __init__(self, rates: Dict[str, float], bursts: Dict[str, int] | None = None,
+                 quotas: Dict[str, int] | None = None, shared: SharedWindow | None = None):
+        bursts = bursts or {}
+        self.buckets = {f: TokenBucket(rates.get(f, RATE_DEFAULTS[f]), bursts.get(f, 1))
+                        for f in FAMILIES}
+        self.quotas = quotas or {}
+        self.shared = shared
+        self.month = time.strftime("%Y-%m")
+        self.used: Dict[str, int] = {f: 0 for f in FAMILIES}
+        self.throttled: Dict[str, int] = {f: 0 for f in FAMILIES}
+        self.last_retry_after: Dict[str, float | None] = {f: None for f in FAMILIES}
+        self._minute: Dict[str, deque] = {f: deque() for f in FAMILIES}
+        self._warned: Dict[str, float] = {f: 0.0 for f in FAMILIES}
+
+    @classmethod
+    def from_env(cls) -> "RateLimits":
+        rates, bursts, quotas = {}, {}, {}
+        for family in FAMILIES:
+            name = _env_name(family)
+            rates[family] = float(os.getenv(f"AMADEUS_RATE_{name}", str(RATE_DEFAULTS[family])))
+            bursts[family] = int(os.getenv(f"AMADEUS_BURST_{name}", "1"))
+            if os.getenv(f"AMADEUS_QUOTA_{name}"):
+                quotas[family] = int(os.environ[f"AMADEUS_QUOTA_{name}"])
+        shared = None
+        if RATE_SHARED:
+            from .cache import get_backend
+            from .cache_backends import RedisBackend
+
+            backend = get_backend()
+            if isinstance(backend, RedisBackend):
+                shared = SharedWindow(backend.client)
+            else:
+                logger.warning(
+                    "AMADEUS_RATE_SHARED=1 needs CACHE_BACKEND=redis; limiting per process only")
+        return cls(rates, bursts, quotas, shared)
+
+    async def acquire(self, path: str) -> str:
+        """Wait for a call slot on the path's family; returns the family."""
+        family = family_for(path)
+        bucket = self.buckets[family]
+        await bucket.acquire()
+        if self.shared is not None and bucket.rate > 0:
+            while (delay := await self.shared.delay(family, bucket.rate)) > 0:
+                bucket.waited += delay
+                await asyncio.sleep(delay)
+        await self._count(family)
+        return family
+
+    async def _count(self, family: str) -> None:
+        month = time.strftime("%Y-%m")
+        if month != self.month:
+            self.month, self.used = month, {f: 0 for f in FAMILIES}
+            self._warned = {f: 0.0 for f in FAMILIES}
+        self.used[family] += 1
+        if self.shared is not None and family in self.quotas:
+            total = await self.shared.count_month(family)
+            if total is not None:
+                self.used[family] = total
+        now = time.monotonic()
+        window = self._minute[family]
+        window.append(now)
+        while window and window[0] < now - 60:
+            window.popleft()
+        quota = self.quotas.get(family)
+        if quota:
+            # Crossing, not hitting exactly: concurrent workers can step over a threshold
+            crossed = [share for share in QUOTA_WARNINGS
+                       if share > self._warned[family] and self.used[family] >= quota * share]
+            if crossed:
+                self._warned[family] = max(crossed)
+                logger.warning("Amadeus %s calls this month: %s of %s", family,
+                               self.used[family], quota)
+
+    def throttled_by_upstream(self, path: str, retry_after: float | None, delay: float) -> None:
+        """Record a 429 and hold back every caller of the family for `delay` seconds."""
+        family = family_for(path)
+        self.throttled[family] += 1
+        self.last_retry_after[family] = retry_after
+        self.buckets[family].pause(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        out: Dict[str, Any] = {"month": self.month, "shared": self.shared is not None,
+                               "families": {}}
+        for family in FAMILIES:
+            quota = self.quotas.get(family)
+            out["families"][family] = {
+                **self.buckets[family].stats(),
+                "calls_last_minute": sum(1 for t in self._minute[family] if t >= now - 60),
+                "throttled_429": self.throttled[family],
+                "last_retry_after": self.last_retry_after[family],
+                "month_used": self.used[family],
+                "month_quota": quota,
+                "month_remaining": max(0, quota - self.used[family]) if quota else None,
+            }
+        if self.shared is not None:
+            out["shared_errors"] = self.shared.errors
+        return out
+
+
+_limits: RateLimits | None = None
+
+
+def get_rate_limits() -> RateLimits:
+    global _limits
+    if _limits is None:
+        _limits = RateLimits.from_env()
+    return _limits
+
+
+def set_rate_limits(limits: RateLimits | None) -> None:
+    global _limits
+    _limits = limits
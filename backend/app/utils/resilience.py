@@ -0,0 +1,184 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import contextvars
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger("amadeus_logger")
+
+# End-to-end budget for one API request, across all its upstream calls and retries
+REQUEST_DEADLINE = float(os.getenv("AMADEUS_REQUEST_DEADLINE", "8"))
+RETRY_MAX = int(os.getenv("AMADEUS_RETRY_MAX", "3"))
+# Full jitter: attempt n sleeps a random time in [0, min(cap, base * 2**n)]
+RETRY_BASE = float(os.getenv("AMADEUS_RETRY_BASE", "0.25"))
+RETRY_CAP = float(os.getenv("AMADEUS_RETRY_CAP", "2.0"))
+
+# A breaker opens when at least half of the last 20 calls (and at least 10) failed, and lets
+# one probe through after 30 s
+BREAKER_WINDOW = int(os.getenv("AMADEUS_BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("AMADEUS_BREAKER_MIN_CALLS", "10"))
+BREAKER_ERROR_RATE = float(os.getenv("AMADEUS_BREAKER_ERROR_RATE", "0.5"))
+BREAKER_COOLDOWN = float(os.getenv("AMADEUS_BREAKER_COOLDOWN", "30"))
+
+RETRY_STATS = {"retries": 0, "gave_up_for_deadline": 0}
+
+# Monotonic time by which the current request must be done; None means no deadline
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "amadeus_deadline", default=None)
+
+
+def set_deadline(seconds: float) -> None:
+    """Start the deadline for the current request (and the tasks it spawns). An earlier
+    deadline already in force is kept."""
+    current = _deadline.get()
+    ends = time.monotonic() + seconds
+    _deadline.set(ends if current is None else min(current, ends))
+
+
+def time_left() -> float | None:
+    ends = _deadline.get()
+    return None if ends is None else ends - time.monotonic()
+
+
+def detached_context() -> contextvars.Context:
+    """Context for background work started from a request, which must not inherit its deadline."""
+    ctx = contextvars.copy_context()
+    ctx.run(_deadline.set, None)
+    return ctx
+
+
+def full_jitter(attempt: int, base: float = RETRY_BASE, cap: float = RETRY_CAP) -> float:
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+async def retry(fn: Callable[[], Awaitable[Any]], retriable: Callable[[Exception], bool],
+                max_retries: int = RETRY_MAX, base: float = RETRY_BASE,
+                cap: float = RETRY_CAP) -> Any:
+    """Await `fn()` up to `max_retries` times while it raises a retriable error, sleeping with
+    full jitter in between. A sleep that would outlast the deadline is not taken: the last
+    error is raised instead."""
+    for attempt in range(max_retries):
+        try:
+            return await fn()
+        except Exception as err:
+            if attempt == max_retries - 1 or not retriable(err):
+                raise
+            delay = full_jitter(attempt, base, cap)
+            left = time_left()
+            if left is not None and delay >= left:
+                RETRY_STATS["gave_up_for_deadline"] += 1
+                raise
+            RETRY_STATS["retries"] += 1
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """Error-rate breaker for one upstream endpoint.
+
+    closed: calls go through and their outcomes fill a window of the last `window` calls; once
+    it holds `min_calls` and the failed share reaches `error_rate` the breaker opens.
+    open: calls are refused for `cooldown` seconds.
+    half_open: one probe call goes through; success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, name: str = "", window: int = BREAKER_WINDOW,
+                 min_calls: int = BREAKER_MIN_CALLS, error_rate: float = BREAKER_ERROR_RATE,
+                 cooldown: float = BREAKER_COOLDOWN):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._outcomes: deque = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.cooldown:
+                self.rejected += 1
+                return False
+            self.state, self._probing = "half_open", False
+        if self.state == "half_open":
+            if self._probing:
+                self.rejected += 1
+                return False
+            self._probing = True
+        return True
+
+    def record(self, ok: bool | None) -> None:
+        """Outcome of an allowed call; None when it ended without a verdict on the upstream
+        (cancelled, cut by the request deadline)."""
+        if self.state == "half_open":
+            self._probing = False
+            if ok:
+                self.state = "closed"
+                self._outcomes.clear()
+            elif ok is False:
+                self._open()
+            return
+        if ok is None:
+            return
+        self._outcomes.append(ok)
+        failures = self._outcomes.count(False)
+        calls = len(self._outcomes)
+        if calls >= self.min_calls and failures / calls >= self.error_rate:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened += 1
+        logger.warning("Circuit for Amadeus %s open for %ss after repeated failures",
+                       self.name, self.cooldown)
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "state": self.state,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": self._outcomes.count(False),
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+        if self.state == "open":
+            elapsed = time.monotonic() - self._opened_at
+            out["retry_in"] = round(max(0.0, self.cooldown - elapsed), 1)
+        return out
+
+
+class Breakers:
+    """One breaker per upstream path, created on first use."""
+
+    def __init__(self, **options: Any):
+        self.options = options
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def for_path(self, path: str) -> CircuitBreaker:
+        breaker = self._breakers.get(path)
+        if breaker is None:
+            breaker = self._breakers[path] = CircuitBreaker(path, **self.options)
+        return breaker
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {path: b.stats() for path, b in sorted(self._breakers.items())}
+
+
+_breakers: Breakers | None = None
+
+
+def get_breakers() -> Breakers:
+    global _breakers
+    if _breakers is None:
+        _breakers = Breakers()
+    return _breakers
+
+
+def set_breakers(breakers: Breakers | None) -> None:
+    global _breakers
+    _breakers = breakers
@@ -0,0 +1,104 @@
+import os
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from .cache import DEFAULT_TTL, aget_cache_entry, aset_cache
+from .resilience import detached_context
+from .singleflight import SINGLE_FLIGHT
+
+logger = logging.getLogger("amadeus_logger")
+
+SWR_WINDOW = int(os.getenv("CACHE_SWR_WINDOW", "3600"))  # seconds
+STALE_IF_ERROR = int(os.getenv("CACHE_STALE_IF_ERROR", "21600"))  # seconds
+
+
+class CachePolicy:
+    """Freshness windows for a cached upstream payload.
+
+    - age <= ttl: fresh, served as is
+    - ttl < age <= ttl + stale_while_revalidate: served immediately, refreshed in the background
+    - beyond that and up to stale_if_error more: refetched on the request path, but served
+      if the upstream call fails
+    """
+
+    def __init__(self, ttl: int = DEFAULT_TTL, stale_while_revalidate: int = 0,
+                 stale_if_error: int = 0):
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+
+    @property
+    def retention(self) -> int:
+        return self.stale_while_revalidate + self.stale_if_error
+
+
+POLICIES: Dict[str, CachePolicy] = {
+    "flight_destinations": CachePolicy(DEFAULT_TTL, SWR_WINDOW, STALE_IF_ERROR),
+    "flight_dates": CachePolicy(DEFAULT_TTL, SWR_WINDOW, STALE_IF_ERROR),
+    "locations": CachePolicy(DEFAULT_TTL, SWR_WINDOW * 24, STALE_IF_ERROR * 4),
+    "checkin_links": CachePolicy(DEFAULT_TTL, SWR_WINDOW * 24, STALE_IF_ERROR * 4),
+    "hotel_offers": CachePolicy(DEFAULT_TTL, SWR_WINDOW, STALE_IF_ERROR),
+}
+
+SWR_STATS = {"stale_served": 0, "refreshes": 0, "refresh_failures": 0, "stale_on_error": 0}
+
+# Strong references so background refresh tasks are not garbage-collected mid-flight
+_background: set = set()
+
+
+async def _load_and_store(key: str, fetch: Callable[[], Awaitable[Any]],
+                          policy: CachePolicy) -> bytes:
+    payload = await fetch()
+    return await aset_cache(key, payload, ttl=policy.ttl, stale_ttl=policy.retention)
+
+
+def _refresh_in_background(key: str, fetch: Callable[[], Awaitable[Any]],
+                           policy: CachePolicy) -> None:
+    if SINGLE_FLIGHT.in_flight(key):
+        return
+    SWR_STATS["refreshes"] += 1
+    # The refresh outlives the request that triggered it, so it does not run on its deadline
+    task = asyncio.get_running_loop().create_task(
+        SINGLE_FLIGHT.do(key, lambda: _load_and_store(key, fetch, policy)),
+        context=detached_context(),
+    )
+    _background.add(task)
+
+    def done(t: asyncio.Task) -> None:
+        _background.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            SWR_STATS["refresh_failures"] += 1
+            logger.warning("Background refresh of %s failed: %s", key, t.exception())
+
+    task.add_done_callback(done)
+
+
+async def swr_fetch(key: str, fetch: Callable[[], Awaitable[Any]], policy: CachePolicy) -> bytes:
+    """Cached payload for `key` as encoded JSON, fetching it through `fetch` when needed."""
+    hit = await aget_cache_entry(key)
+    if hit is not None:
+        payload, age, _ = hit
+        if age <= policy.ttl:
+            return payload
+        if age <= policy.ttl + policy.stale_while_revalidate:
+            SWR_STATS["stale_served"] += 1
+            _refresh_in_background(key, fetch, policy)
+            return payload
+    try:
+        return await SINGLE_FLIGHT.do(key, lambda: _load_and_store(key, fetch, policy))
+    except Exception:
+        if hit is None:
+            raise
+        SWR_STATS["stale_on_error"] += 1
+        logger.warning("Upstream failed for %s, serving stale payload", key)
+        return hit[0]
+
+
+async def refresh(key: str, fetch: Callable[[], Awaitable[Any]], policy: CachePolicy) -> bytes:
+    """Fetch and store `key` now, whatever its age (joining a fetch of it already in flight)."""
+    return await SINGLE_FLIGHT.do(key, lambda: _load_and_store(key, fetch, policy))
+
+
+def swr_stats() -> Dict[str, int]:
+    return {**SWR_STATS, "refreshing": len(_background)}
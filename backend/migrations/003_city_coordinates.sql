@@ -0,0 +1,7 @@
+-- Keep GeoNames coordinates, population and id on cities (nearest-city / bounding-box lookups)
+ALTER TABLE cities
+  ADD COLUMN geoname_id INT NULL,
+  ADD COLUMN latitude DOUBLE NULL,
+  ADD COLUMN longitude DOUBLE NULL,
+  ADD COLUMN population INT NULL,
+  ADD KEY idx_cities_lat_lon (latitude, longitude);
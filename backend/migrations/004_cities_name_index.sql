@@ -0,0 +1,3 @@
+-- Keyset pagination of /api/geo/dump walks cities in (name, id) order; InnoDB secondary keys carry the primary key
+ALTER TABLE cities
+  ADD KEY idx_cities_name (name);
@@ -0,0 +1,7 @@
+-- Checksum of the geo dataset last seeded into regions/countries/cities; startup seeding skips when it matches
+CREATE TABLE IF NOT EXISTS geo_seed_state (
+  id TINYINT PRIMARY KEY,
+  source_digest VARCHAR(64) NOT NULL,
+  cities INT NOT NULL,
+  seeded_at DOUBLE NOT NULL
+);
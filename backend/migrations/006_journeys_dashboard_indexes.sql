@@ -0,0 +1,23 @@
+-- /api/admin/dashboard pages journeys newest first with a keyset on (created_at, id).
+-- One index per leading filter, ordered (filter, created_at, id), so each query variant reads its page in index
+-- order without a filesort; id is explicit because a trailing column would otherwise sort ahead of the implicit
+-- primary key. budget (and user_id on the destination keys) come last so those filters are checked in the index.
+-- idx_journeys_user_created also serves the user_id foreign key, replacing the index MySQL created for it.
+-- journeys survives re-runs of init_db.sh and MySQL has no ADD KEY IF NOT EXISTS, so the keys (added together in
+-- one statement) are only added when none of them exists yet.
+SET @dashboard_keys := (
+  SELECT COUNT(*) FROM information_schema.statistics
+  WHERE table_schema = DATABASE() AND table_name = 'journeys'
+    AND index_name IN ('idx_journeys_created', 'idx_journeys_user_created',
+                       'idx_journeys_city_created', 'idx_journeys_country_created')
+);
+SET @ddl := IF(@dashboard_keys = 0,
+  'ALTER TABLE journeys
+     ADD KEY idx_journeys_created (created_at, id, budget),
+     ADD KEY idx_journeys_user_created (user_id, created_at, id, budget),
+     ADD KEY idx_journeys_city_created (destination_city, created_at, id, budget, user_id),
+     ADD KEY idx_journeys_country_created (destination_country, created_at, id, budget, user_id)',
+  'DO 0');
+PREPARE add_dashboard_keys FROM @ddl;
+EXECUTE add_dashboard_keys;
+DEALLOCATE PREPARE add_dashboard_keys;
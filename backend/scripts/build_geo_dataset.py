@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Compile the GeoNames CSV/JSON exports into the binary geo dataset.
+
+Seeding and in-process geo lookups read the compiled file (memory-mapped) instead of
+re-parsing the exports. The app also compiles it on first use when it is missing or the
+sources changed; run this at build time to keep that off the request path:
+
+    python backend/scripts/build_geo_dataset.py
+    python backend/scripts/build_geo_dataset.py --source doc --out /tmp/geonames.bin
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.app.utils.geo_dataset import (  # noqa: E402
+    GEO_DATASET_PATH, GEO_SOURCE_DIR, compile_dataset,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default=str(GEO_SOURCE_DIR))
+    parser.add_argument("--out", default=str(GEO_DATASET_PATH))
+    args = parser.parse_args()
+    started = time.perf_counter()
+    result = compile_dataset(Path(args.source), Path(args.out))
+    print(json.dumps({**result, "seconds": round(time.perf_counter() - started, 3)}))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
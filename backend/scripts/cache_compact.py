@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""Garbage-collect the shared cache backend selected by CACHE_BACKEND.
+
+Removes entries past their stale window (and, for the file store, crashed-writer temp files,
+empty shard directories and flat legacy `<key>.json` files no request has read and converted):
+
+    python backend/scripts/cache_compact.py
+    CACHE_BACKEND=sqlite python backend/scripts/cache_compact.py
+"""
+import sys
+import json
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.app.utils.cache import get_backend  # noqa: E402
+
+
+def main():
+    backend = get_backend()
+    result = backend.compact()
+    print(json.dumps({"backend": backend.name, **result}))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
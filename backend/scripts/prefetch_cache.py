@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Refresh seed and hot Amadeus responses in the shared cache before they expire.
+
+Candidates are the seed list (PREFETCH_SEEDS, default backend/app/prefetch_seeds.json) plus the
+hot keys the API workers publish to the cache backend. Upstream calls go through the gateway's
+rate limits and breakers and the prefetcher's own --rate. Each pass prints a JSON report, with
+the request-weighted share of candidates served fresh before and after it:
+
+    python backend/scripts/prefetch_cache.py
+    python backend/scripts/prefetch_cache.py --loop --interval 30 --rate 2
+    python backend/scripts/prefetch_cache.py --seeds my_seeds.json --top-k 20
+
+Set AMADEUS_CLIENT_ID / AMADEUS_CLIENT_SECRET (and AMADEUS_HOST or AMADEUS_BASE_URL), and the
+same CACHE_BACKEND as the API so both see one cache. In-process instead: PREFETCH_ENABLED=1.
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.app.utils.amadeus_gateway import AmadeusGateway, base_url_from_env  # noqa: E402
+from backend.app.utils.prefetch import (  # noqa: E402
+    PREFETCH_INTERVAL, PREFETCH_MAX_PER_PASS, PREFETCH_RATE, PREFETCH_SEEDS, PREFETCH_TOP_K,
+    Prefetcher, load_seeds,
+)
+from backend.app.utils.rate_limit import get_rate_limits  # noqa: E402
+from backend.app.utils.resilience import get_breakers  # noqa: E402
+
+
+async def run(args) -> int:
+    gateway = AmadeusGateway(os.environ["AMADEUS_CLIENT_ID"], os.environ["AMADEUS_CLIENT_SECRET"],
+                             base_url_from_env(), limits=get_rate_limits(), breakers=get_breakers())
+    prefetcher = Prefetcher(gateway, seeds=load_seeds(Path(args.seeds)), top_k=args.top_k,
+                            rate=args.rate, max_per_pass=args.max_per_pass)
+    try:
+        while True:
+            report = await prefetcher.run_once()
+            print(json.dumps(report), flush=True)
+            if not args.loop:
+                return 1 if report["failed"] else 0
+            await asyncio.sleep(args.interval)
+    finally:
+        await gateway.aclose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seeds", default=str(PREFETCH_SEEDS), help="JSON seed list")
+    parser.add_argument("--top-k", type=int, default=PREFETCH_TOP_K, help="hot keys per kind")
+    parser.add_argument("--rate", type=float, default=PREFETCH_RATE,
+                        help="prefetch calls per second (0: unlimited)")
+    parser.add_argument("--max-per-pass", type=int, default=PREFETCH_MAX_PER_PASS)
+    parser.add_argument("--loop", action="store_true",
+                        help="keep running, one pass every --interval seconds")
+    parser.add_argument("--interval", type=float, default=PREFETCH_INTERVAL)
+    args = parser.parse_args()
+
+    if not os.getenv("AMADEUS_CLIENT_ID") or not os.getenv("AMADEUS_CLIENT_SECRET"):
+        print("ERROR: Set AMADEUS_CLIENT_ID and AMADEUS_CLIENT_SECRET in environment (source .env)",
+              file=sys.stderr)
+        return 1
+    try:
+        return asyncio.run(run(args))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Seed regions/countries/cities with the bulk loader.
+
+Rows come from the compiled geo dataset (backend/scripts/build_geo_dataset.py) or, with
+`--source csv`, straight from the GeoNames CSV exports. Prints progress (rows, rows/sec, time
+spent in MySQL) to stderr and the final counters as JSON. `--dry-run` only reads the input,
+which measures that side on its own:
+
+    python backend/scripts/seed_regions.py --batch-size 5000
+    python backend/scripts/seed_regions.py --source csv --dir doc
+    MYSQL_LOCAL_INFILE=1 python backend/scripts/seed_regions.py --load-data
+    python backend/scripts/seed_regions.py --source csv --dry-run
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from backend.app.utils.geo_dataset import get_geo_dataset  # noqa: E402
+from backend.app.utils.geo_loader import GEO_BATCH_SIZE, iter_csv_rows  # noqa: E402
+from backend.app.routes.geo import _region_names  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", choices=("dataset", "csv"), default="dataset")
+    parser.add_argument("--dir", default=str(Path(__file__).resolve().parents[2] / "doc"))
+    parser.add_argument("--batch-size", type=int, default=GEO_BATCH_SIZE)
+    parser.add_argument("--progress-every", type=int, default=5000)
+    parser.add_argument("--load-data", action="store_true",
+                        help="use LOAD DATA LOCAL INFILE when the server allows it")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="parse the files without touching the database")
+    args = parser.parse_args()
+
+    regions = _region_names()
+
+    def rows():
+        if args.source == "dataset":
+            return get_geo_dataset().iter_seed_rows(regions)
+        return iter_csv_rows(args.dir, regions)
+
+    if args.dry_run:
+        started = time.perf_counter()
+        count = sum(1 for _ in rows())
+        elapsed = time.perf_counter() - started
+        print(json.dumps({"source": args.source, "rows": count, "seconds": round(elapsed, 4),
+                          "rows_per_sec": round(count / elapsed) if elapsed else None}))
+        return 0
+
+    from backend.app.db import engine
+    from backend.app.utils.geo_seed import seed_geo
+
+    def progress(stats):
+        print(f"[seed] rows={stats['rows']} cities={stats['cities']} "
+              f"rows/s={stats['rows_per_sec']} db={stats['db_seconds']}s", file=sys.stderr)
+
+    # Records the dataset checksum (so startup seeding skips) and bumps the geo generation,
+    # so running app workers drop their cached tree and dump version
+    stats = seed_geo(engine, regions, rows=rows() if args.source == "csv" else None, force=True,
+                     batch_size=args.batch_size, use_load_data=args.load_data,
+                     progress=progress, progress_every=args.progress_every)
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
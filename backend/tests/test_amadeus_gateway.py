@@ -0,0 +1,86 @@
+import asyncio
+import httpx
+import pytest
+
+from backend.app.utils import amadeus_gateway
+from backend.app.utils.amadeus_gateway import AmadeusGateway, ResponseError
+from scripts.amadeus_stub import app as stub_app
+
+
+def _gateway():
+    transport = httpx.ASGITransport(app=stub_app)
+    return AmadeusGateway("id", "secret", "http://stub", transport=transport)
+
+
+def test_concurrent_calls_share_one_token():
+    async def run():
+        gw = _gateway()
+        results = await asyncio.gather(*(
+            gw.get("/v1/reference-data/locations", keyword="Athens", subType="CITY")
+            for _ in range(20)
+        ))
+        await gw.aclose()
+        return gw, results
+
+    gw, results = asyncio.run(run())
+    assert gw.token_fetches == 1
+    assert all(r.data[0]["iataCode"] == "ATH" for r in results)
+
+
+def test_token_refreshed_ahead_of_expiry(monkeypatch):
+    async def run():
+        gw = _gateway()
+        await gw.get("/v1/reference-data/airlines", airlineCodes="BA")
+        # Inside the refresh margin: the next call fetches a new token first
+        margin = amadeus_gateway.TOKEN_REFRESH_MARGIN
+        gw._token_expires_at = amadeus_gateway.time.time() + margin - 1
+        await gw.get("/v1/reference-data/airlines", airlineCodes="BA")
+        await gw.aclose()
+        return gw
+
+    assert asyncio.run(run()).token_fetches == 2
+
+
+def test_revoked_token_is_retried_once():
+    async def run():
+        gw = _gateway()
+        await gw.get("/v1/reference-data/airlines", airlineCodes="BA")
+        gw._token = "revoked"
+        resp = await gw.get("/v1/reference-data/airlines", airlineCodes="BA")
+        await gw.aclose()
+        return gw, resp
+
+    gw, resp = asyncio.run(run())
+    assert resp.status_code == 200
+    assert gw.token_fetches == 2
+
+
+def test_bad_credentials_raise_response_error():
+    async def run():
+        gw = AmadeusGateway("", "", "http://stub", transport=httpx.ASGITransport(app=stub_app))
+        try:
+            await gw.get("/v1/reference-data/airlines", airlineCodes="BA")
+        finally:
+            await gw.aclose()
+
+    with pytest.raises(ResponseError) as exc:
+        asyncio.run(run())
+    assert exc.value.response.status_code == 400
+
+
+def test_client_replaced_for_a_new_loop_is_closed():
+    gw = _gateway()
+
+    async def call():
+        await gw.get("/v1/reference-data/airlines", airlineCodes="BA")
+        return gw._client
+
+    first = asyncio.run(call())
+
+    async def second_run():
+        client = await call()
+        await gw.aclose()
+        return client
+
+    second = asyncio.run(second_run())
+    assert first is not second and first.is_closed and second.is_closed
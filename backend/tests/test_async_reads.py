@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from backend.app import db
+from backend.app.routes import admin, geo, journeys
+
+
+@pytest.fixture
+def http(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool,
+                           connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(64))"))
+        conn.execute(text(
+            "CREATE TABLE journeys (id INTEGER PRIMARY KEY, user_id INT,"
+            " destination_country VARCHAR(64), destination_city VARCHAR(64), budget DECIMAL(10,2),"
+            " created_at TIMESTAMP)"
+        ))
+        conn.execute(text("INSERT INTO users VALUES (1, 'ana'), (2, 'ben')"))
+        conn.execute(text("INSERT INTO journeys VALUES (:id, :u, :country, :city, :budget, :ts)"), [
+            {"id": 1, "u": 1, "country": "Greece", "city": "Athens", "budget": 2000,
+             "ts": "2026-01-01 10:00:00"},
+            {"id": 2, "u": 2, "country": "Japan", "city": "Tokyo", "budget": 3500,
+             "ts": "2026-01-02 10:00:00"},
+            {"id": 3, "u": 1, "country": "Japan", "city": "Osaka", "budget": 1200,
+             "ts": "2026-01-03 10:00:00"},
+        ])
+    monkeypatch.setattr(db, "_engine", engine)
+    monkeypatch.setattr(db, "DB_ASYNC", False)
+    app = FastAPI()
+    app.include_router(journeys.router, prefix="/api/journeys")
+    app.include_router(admin.router, prefix="/api/admin")
+    return TestClient(app)
+
+
+def test_read_routes_are_coroutines():
+    for handler in (journeys.list_journeys, admin.admin_dashboard, geo.list_regions,
+                    geo.list_countries, geo.list_cities, geo.dump_geo):
+        assert asyncio.iscoroutinefunction(handler), handler.__name__
+
+
+def test_sync_mode_serves_the_shared_queries_from_the_threadpool(http):
+    assert [j["id"] for j in http.get("/api/journeys").json()] == [3, 2, 1]
+    rows = http.get("/api/admin/dashboard", params={"destination": "Japan", "budget": 2000}).json()
+    assert [(r["id"], r["username"]) for r in rows] == [(3, "ana")]
+    assert len(http.get("/api/admin/dashboard").json()) == 3
@@ -0,0 +1,112 @@
+import io
+import time
+import asyncio
+
+import httpx
+import pytest
+
+from backend.app.utils import cache
+from backend.app.utils.amadeus_gateway import AmadeusGateway
+from backend.app.utils.batch_search import BatchSearch, read_jobs
+from backend.app.utils.cache import MemoryCache
+from backend.app.utils.cache_backends import FileBackend
+from backend.app.utils.rate_limit import TokenBucket
+from scripts.amadeus_stub import app as stub_app
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    # The IATA resolver index lives in the cache
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    monkeypatch.setattr(cache, "MEM_CACHE", MemoryCache())
+
+
+@pytest.fixture(autouse=True)
+def stub():
+    stub_app.state.stats = {"token_requests": 0, "api_requests": 0, "by_path": {}}
+    stub_app.state.latency_ms = 0
+    yield stub_app
+    stub_app.state.latency_ms = 0
+
+
+def _run(jobs, **options):
+    async def run():
+        transport = httpx.ASGITransport(app=stub_app)
+        gateway = AmadeusGateway("id", "secret", "http://stub", transport=transport)
+        batch = BatchSearch(gateway, **options)
+        results = [r async for r in batch.run(jobs)]
+        await gateway.aclose()
+        return batch, results
+
+    return asyncio.run(run())
+
+
+def test_jobs_from_csv_and_ndjson():
+    csv = "origin,destination,date,adults,id\nParis,Athens,2026-01-01,2,a\n,Rome,2026-01-02,,b\n"
+    csv_jobs = list(read_jobs(io.StringIO(csv)))
+    assert csv_jobs[0] == {"line": 2, "id": "a", "origin": "Paris", "destination": "Athens",
+                           "date": "2026-01-01", "adults": 2}
+    assert csv_jobs[1] == {"line": 3, "id": "b", "error": "missing origin"}
+
+    ndjson = '\n{"origin": "Paris", "destination": "Rome", "date": "2026-01-03"}\nnot json\n[1]\n'
+    jobs = list(read_jobs(io.StringIO(ndjson)))
+    assert jobs[0]["origin"] == "Paris" and jobs[0]["adults"] == 1
+    assert jobs[1]["error"].startswith("invalid JSON") and jobs[2]["error"] == "not a JSON object"
+
+
+def test_each_distinct_city_is_resolved_once(stub):
+    pairs = [("Paris", "Athens"), ("Athens", "Madrid"), ("Madrid", "Paris"),
+             ("paris", "Madrid")] * 5
+    jobs = [{"line": i, "origin": o, "destination": d, "date": "2026-01-15", "adults": 1}
+            for i, (o, d) in enumerate(pairs)]
+    batch, results = _run(jobs, workers=8, rate=0)
+    assert sorted(r["line"] for r in results) == list(range(len(pairs)))
+    assert all(r["status"] == "found" and r["count"] == 20 for r in results)
+    # Metropolitan codes are known without a city lookup; only the airports are looked up
+    paris = {(r["origin"], r["used_origin"]) for r in results if r["origin"] == "Paris"}
+    assert paris == {("Paris", "PAR")}
+    by_path = stub.state.stats["by_path"]
+    assert "/v1/reference-data/locations/cities" not in by_path
+    assert by_path["/v1/reference-data/locations"] == 3
+    assert by_path["/v2/shopping/flight-offers"] == len(pairs)
+    assert batch.stats()["distinct_cities"] == 3 and batch.stats()["reused"] == 2 * len(pairs) - 3
+
+
+def test_invalid_jobs_are_reported_without_stopping_the_batch():
+    jobs = [{"line": 1, "error": "missing date"},
+            {"line": 2, "origin": "Rome", "destination": "Athens", "date": "2026-01-15",
+             "adults": 1}]
+    batch, results = _run(jobs, workers=2, rate=0)
+    assert {r["line"]: r["status"] for r in results} == {1: "invalid", 2: "found"}
+    assert batch.stats()["failed"] == 1
+
+
+def test_workers_run_searches_concurrently(stub):
+    stub.state.latency_ms = 30
+    jobs = [{"line": i, "origin": "PAR", "destination": "ATH", "date": "2026-01-15", "adults": 1}
+            for i in range(16)]
+    started = time.perf_counter()
+    _, results = _run(jobs, workers=8, rate=0)
+    # One at a time this would take 16 searches x 30 ms plus the lookups
+    assert len(results) == 16 and time.perf_counter() - started < 0.3
+
+
+def test_rate_limit_is_global():
+    async def run():
+        limiter = TokenBucket(rate=50, burst=1)
+        started = time.perf_counter()
+        await asyncio.gather(*(limiter.acquire() for _ in range(11)))
+        return time.perf_counter() - started
+
+    # The first token is there already; ten more arrive 20 ms apart
+    assert 0.18 <= asyncio.run(run()) < 0.5
+
+
+def test_a_second_batch_resolves_from_the_index(stub):
+    jobs = [{"line": 1, "origin": "Paris", "destination": "Athens", "date": "2026-01-15",
+             "adults": 1}]
+    _run(jobs, rate=0)
+    batch, results = _run(jobs, rate=0)
+    assert results[0]["status"] == "found"
+    assert batch.stats()["warm"] == 2 and batch.stats()["resolver_upstream_calls"] == 0
+    assert stub.state.stats["by_path"]["/v1/reference-data/locations"] == 2
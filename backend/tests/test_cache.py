@@ -0,0 +1,100 @@
+import time
+import asyncio
+
+from backend.app.utils import cache
+from backend.app.utils.cache import MemoryCache
+from backend.app.utils.cache_backends import FileBackend
+
+
+def test_lru_evicts_least_recently_used_by_count():
+    mc = MemoryCache(max_entries=2, max_bytes=1_000)
+    mc.set("a", 1, ttl=60, size=10)
+    mc.set("b", 2, ttl=60, size=10)
+    assert mc.get("a") == 1  # "b" is now the least recently used
+    mc.set("c", 3, ttl=60, size=10)
+    assert "b" not in mc
+    assert mc.get("a") == 1 and mc.get("c") == 3
+    assert mc.stats()["evictions"] == 1
+
+
+def test_byte_budget_bounds_the_tier():
+    mc = MemoryCache(max_entries=100, max_bytes=100)
+    for i in range(10):
+        mc.set(f"k{i}", i, ttl=60, size=30)
+    stats = mc.stats()
+    assert stats["bytes"] <= 100
+    assert stats["entries"] == 3
+    # Oversized payloads are not admitted at all
+    mc.set("huge", "x", ttl=60, size=101)
+    assert "huge" not in mc
+
+
+def test_ttl_is_fixed_at_write_time_and_purged():
+    mc = MemoryCache(max_entries=10, max_bytes=1_000)
+    mc.set("short", 1, ttl=5, size=1, ts=time.time() - 10)
+    mc.set("long", 2, ttl=600, size=1)
+    assert mc.purge_expired() == 1
+    assert mc.get("short") is None
+    assert mc.get("long") == 2
+    stats = mc.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["expirations"] == 1
+
+
+def test_set_and_get_cache_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    monkeypatch.setattr(cache, "MEM_CACHE", MemoryCache(max_entries=10, max_bytes=10_000))
+    cache.set_cache("flight_dates_CDG_MUC", [{"departureDate": "2026-01-15"}], ttl=60)
+    assert cache.get_cache("flight_dates_CDG_MUC") == [{"departureDate": "2026-01-15"}]
+    # Cold memory tier falls back to the file and keeps the stored TTL
+    cache.MEM_CACHE.clear()
+    assert cache.get_cache("flight_dates_CDG_MUC") == [{"departureDate": "2026-01-15"}]
+    assert cache.get_cache("missing") is None
+
+
+def test_entries_are_stored_encoded_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    monkeypatch.setattr(cache, "MEM_CACHE", MemoryCache(max_entries=10, max_bytes=10_000))
+    raw = cache.set_cache("locations_Athens_CITY", [{"name": "Αθήνα", "iataCode": "ATH"}], ttl=60)
+    assert isinstance(raw, bytes)
+    assert cache.get_cache_raw("locations_Athens_CITY") is raw
+    assert cache.MEM_CACHE.stats()["bytes"] == len(raw)
+    cache.MEM_CACHE.clear()
+    assert cache.get_cache_raw("locations_Athens_CITY") == raw
+
+
+def test_stale_entry_is_a_miss_to_fresh_only_readers():
+    mc = MemoryCache()
+    mc.set("k", 1, ttl=60, size=1, ts=time.time() - 120, stale_ttl=600)
+    assert mc.get("k") is None
+    assert mc.get_entry("k")[0] == 1
+    stats = mc.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (0, 1, 1)
+
+
+def test_async_variants_share_the_tiers(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    monkeypatch.setattr(cache, "MEM_CACHE", MemoryCache())
+
+    async def run():
+        payload = [{"departureDate": "2026-01-15"}]
+        raw = await cache.aset_cache("flight_dates_CDG_MUC", payload, ttl=60)
+        cache.MEM_CACHE.clear()
+        again = await cache.aget_cache_raw("flight_dates_CDG_MUC")
+        return raw, again, await cache.aget_cache("missing")
+
+    raw, again, missing = asyncio.run(run())
+    assert again == raw and missing is None
+    assert cache.get_cache("flight_dates_CDG_MUC") == [{"departureDate": "2026-01-15"}]
+
+
+def test_shared_generation_reaches_other_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    writer = cache.SharedGeneration("geo:generation", check_interval=0)
+    reader = cache.SharedGeneration("geo:generation", check_interval=3600)
+    assert reader.current() == 0
+    assert writer.bump() == 1 and writer.current() == 1
+    # The reader only looks again once its interval is up
+    assert reader.current() == 0
+    reader.check_interval = 0
+    assert reader.current() == 1
+    assert reader.bump() == 2 and writer.current() == 2
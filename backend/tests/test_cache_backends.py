@@ -0,0 +1,119 @@
+import time
+import multiprocessing
+import pytest
+
+from backend.app.utils import cache
+from backend.app.utils.cache import MemoryCache
+from backend.app.utils.cache_backends import FileBackend, RedisBackend, SQLiteBackend
+from scripts.resp_stub import RespServer
+
+
+@pytest.fixture
+def resp_server():
+    server = RespServer().start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["file", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "file":
+        return FileBackend(tmp_path)
+    if request.param == "sqlite":
+        return SQLiteBackend(tmp_path / "cache.sqlite3")
+    server = request.getfixturevalue("resp_server")
+    return RedisBackend(server.url)
+
+
+def test_backend_round_trip(backend):
+    now = time.time()
+    backend.set("locations_Athens_CITY", now, 60, 30, b'[{"iataCode": "ATH"}]')
+    ts, ttl, stale_ttl, payload = backend.get("locations_Athens_CITY")
+    assert (round(ts, 3), ttl, stale_ttl) == (round(now, 3), 60, 30)
+    assert payload == b'[{"iataCode": "ATH"}]'
+    backend.delete("locations_Athens_CITY")
+    assert backend.get("locations_Athens_CITY") is None
+
+
+def test_backend_is_the_shared_tier(backend, monkeypatch):
+    # Two "workers" with separate memory tiers see each other's writes through the backend
+    monkeypatch.setattr(cache, "_backend", backend)
+    monkeypatch.setattr(cache, "MEM_CACHE", MemoryCache())
+    cache.set_cache("flight_dates_CDG_MUC", {"dates": ["2026-01-15"]}, ttl=60)
+    monkeypatch.setattr(cache, "MEM_CACHE", MemoryCache())
+    assert cache.get_cache("flight_dates_CDG_MUC") == {"dates": ["2026-01-15"]}
+
+
+def _writer(path, worker):
+    b = SQLiteBackend(path)
+    for i in range(50):
+        b.set(f"k{worker}_{i}", time.time(), 60, 0, b"[1]")
+
+
+def test_sqlite_backend_across_processes(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    SQLiteBackend(path)
+    procs = [multiprocessing.Process(target=_writer, args=(path, w)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert all(p.exitcode == 0 for p in procs)
+    assert SQLiteBackend(path).stats()["entries"] == 200
+
+
+def test_sqlite_purges_expired(tmp_path):
+    b = SQLiteBackend(tmp_path / "cache.sqlite3")
+    b.set("old", time.time() - 100, 10, 10, b"1")
+    b.set("new", time.time(), 10, 10, b"2")
+    assert b.purge_expired() == 1
+    assert b.get("old") is None and b.get("new") is not None
+
+
+def test_file_backend_layout_is_sharded_and_compressed(tmp_path):
+    b = FileBackend(tmp_path)
+    payload = b'{"offers": "' + b"x" * 4096 + b'"}'
+    b.set("flight_offers_search_CDG_ATH_2026-01-15_1", time.time(), 60, 0, payload)
+    files = list(tmp_path.glob("??/??/*.bin"))
+    assert len(files) == 1
+    assert files[0].stat().st_size < len(payload) // 4
+    assert b.get("flight_offers_search_CDG_ATH_2026-01-15_1")[3] == payload
+    # No temp files are left behind by the atomic write
+    assert not list(tmp_path.glob("??/??/.tmp-*"))
+
+
+def test_file_backend_ignores_truncated_files(tmp_path):
+    b = FileBackend(tmp_path)
+    b.set("k", time.time(), 60, 0, b"[1, 2, 3]")
+    path = next(tmp_path.glob("??/??/*.bin"))
+    path.write_bytes(path.read_bytes()[:10])
+    assert b.get("k") is None
+
+
+def test_legacy_files_migrate_on_read_and_compact_drops_the_rest(tmp_path):
+    b = FileBackend(tmp_path)
+    now = time.time()
+    b.set("fresh", now, 60, 0, b"1")
+    b.set("expired", now - 100, 10, 10, b"2")
+    # "a/b" was stored as a_b.json: only a read under the real key can move it
+    (tmp_path / "a_b.json").write_text('{"_ts": %f, "ttl": 60, "payload": [3]}' % now)
+    (tmp_path / "unread_key.json").write_text('{"_ts": %f, "ttl": 60, "payload": [4]}' % now)
+    assert b.get("a/b")[3] == b"[3]"
+    assert not (tmp_path / "a_b.json").exists() and b.get("a/b")[3] == b"[3]"
+    result = b.compact()
+    assert result["removed"] == 2 and result["kept"] == 2
+    assert b.get("fresh")[3] == b"1" and b.get("a_b") is None and b.get("unread_key") is None
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_file_stats_are_counted_without_rescanning(tmp_path):
+    b = FileBackend(tmp_path)
+    b.set("k1", time.time(), 60, 0, b"1")
+    assert b.stats()["entries"] == 1
+    b.set("k2", time.time(), 60, 0, b"22")
+    b.set("k1", time.time(), 60, 0, b"111")
+    b.delete("k2")
+    stats = b.stats()
+    on_disk = list(tmp_path.glob("??/??/*.bin"))
+    assert stats["entries"] == len(on_disk) == 1 and stats["bytes"] == on_disk[0].stat().st_size
@@ -0,0 +1,126 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from backend.app import db
+from backend.app.routes import admin
+from backend.app.utils.dashboard import dashboard_query
+
+# The MySQL indexes of 006_journeys_dashboard_indexes.sql, in SQLite syntax
+INDEXES = [
+    "CREATE INDEX idx_journeys_created ON journeys (created_at, id, budget)",
+    "CREATE INDEX idx_journeys_user_created ON journeys (user_id, created_at, id, budget)",
+    "CREATE INDEX idx_journeys_city_created"
+    " ON journeys (destination_city, created_at, id, budget, user_id)",
+    "CREATE INDEX idx_journeys_country_created"
+    " ON journeys (destination_country, created_at, id, budget, user_id)",
+]
+CITIES = [("Greece", "Athens"), ("Japan", "Tokyo"), ("Japan", "Osaka"), ("Singapore", "Singapore")]
+
+
+def _engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool,
+                           connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(100) UNIQUE)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE journeys (id INTEGER PRIMARY KEY, user_id INT NOT NULL,"
+            " destination_country VARCHAR(100), destination_city VARCHAR(100),"
+            " budget DECIMAL(12,2), created_at TIMESTAMP)"
+        ))
+        for stmt in INDEXES:
+            conn.execute(text(stmt))
+        conn.execute(text("INSERT INTO users VALUES (1, 'ana'), (2, 'ben')"))
+        # Pairs of journeys share a timestamp so pages must break ties on id
+        conn.execute(text("INSERT INTO journeys VALUES (:id, :u, :country, :city, :budget, :ts)"), [
+            {"id": i, "u": 1 + i % 2, "country": CITIES[i % 4][0], "city": CITIES[i % 4][1],
+             "budget": 500 * (1 + i % 5), "ts": f"2026-01-{1 + i // 2:02d} 10:00:00"}
+            for i in range(1, 41)
+        ])
+    return engine
+
+
+@pytest.fixture
+def http(monkeypatch):
+    engine = _engine()
+    monkeypatch.setattr(db, "_engine", engine)
+    monkeypatch.setattr(db, "DB_ASYNC", False)
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+    return TestClient(app), engine
+
+
+def _expected(engine, where="1 = 1", **params):
+    with engine.connect() as conn:
+        return [r[0] for r in conn.execute(text(
+            "SELECT j.id FROM journeys j JOIN users u ON u.id = j.user_id"
+            f" WHERE {where} ORDER BY j.created_at DESC, j.id DESC"
+        ), params)]
+
+
+def _all_pages(http, limit, **params):
+    ids, after, pages = [], None, 0
+    while True:
+        cursor = {"after": after} if after else {}
+        r = http.get("/api/admin/dashboard", params={**params, "limit": limit, **cursor})
+        assert r.status_code == 200
+        ids += [row["id"] for row in r.json()]
+        pages += 1
+        after = r.headers.get("x-next-cursor")
+        if after is None:
+            return ids, pages
+
+
+def test_only_active_filters_reach_the_sql():
+    sql, params = dashboard_query()
+    assert "WHERE" not in str(sql) and "IS NULL" not in str(sql) and params == {"limit": 101}
+    sql, params = dashboard_query(budget=900, limit=10)
+    assert "j.budget <= :budget" in str(sql) and "username" not in str(sql).split("FROM")[1]
+    sql, _ = dashboard_query(destination="Japan")
+    assert "UNION" in str(sql) and " OR " not in str(sql)
+
+
+@pytest.mark.parametrize("params, where", [
+    ({}, "1 = 1"),
+    ({"user": "ana"}, "u.username = :user"),
+    ({"destination": "Japan"},
+     "(j.destination_city = :destination OR j.destination_country = :destination)"),
+    ({"destination": "Singapore", "budget": 1500},
+     "(j.destination_city = :destination OR j.destination_country = :destination)"
+     " AND j.budget <= :budget"),
+    ({"user": "ben", "destination": "Tokyo", "budget": 2500},
+     "u.username = :user AND j.destination_city = :destination AND j.budget <= :budget"),
+])
+def test_keyset_pages_match_the_unpaged_result(http, params, where):
+    client, engine = http
+    expected = _expected(engine, where, **params)
+    ids, pages = _all_pages(client, 3, **params)
+    assert ids == expected
+    assert pages == max(1, -(-len(expected) // 3))
+
+
+def test_default_page_and_bad_cursor(http):
+    client, engine = http
+    r = client.get("/api/admin/dashboard")
+    assert [row["id"] for row in r.json()] == _expected(engine)
+    assert "x-next-cursor" not in r.headers
+    assert client.get("/api/admin/dashboard", params={"after": "nope"}).status_code == 400
+
+
+def test_plans_read_the_index_in_order(http):
+    _, engine = http
+    for kwargs in ({}, {"user": "ana"}, {"destination": "Japan"}, {"budget": 900}):
+        sql, params = dashboard_query(**kwargs, after=("2026-01-10 10:00:00", 19), limit=5)
+        with engine.connect() as conn:
+            steps = [r[-1] for r in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params)]
+        assert any("USING INDEX idx_journeys_" in s or "USING COVERING INDEX idx_journeys_" in s
+                   for s in steps), steps
+        # Each branch reads its index in order; only the UNION merge of the (limit + 1)-row
+        # branches sorts
+        for i, step in enumerate(steps):
+            if "TEMP B-TREE" in step:
+                assert "destination" in kwargs and steps[i - 1].startswith("SCAN by_"), steps
@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.routes import amadeus_api
+from backend.app.utils import cache
+from backend.app.utils.cache import MemoryCache
+from backend.app.utils.cache_backends import FileBackend
+from backend.app.utils.fanout import first_non_empty, gather_limited
+
+
+def test_first_non_empty_respects_priority_and_cancels_rest():
+    cancelled = []
+
+    def call(result, delay):
+        async def run():
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(result)
+                raise
+            return result
+        return run
+
+    # The second call finishes first, but the first one has priority and is non-empty
+    factories = [call(["a"], 0.05), call(["b"], 0.01), call([], 0.0), call(["d"], 1.0)]
+    idx, result = asyncio.run(first_non_empty(factories, limit=4))
+    assert (idx, result) == (0, ["a"])
+    assert cancelled == [["d"]]
+
+
+def test_first_non_empty_skips_empty_results():
+    async def empty():
+        return []
+
+    async def found():
+        return ["x"]
+
+    assert asyncio.run(first_non_empty([empty, empty, found], limit=2)) == (2, ["x"])
+    assert asyncio.run(first_non_empty([empty], limit=2)) == (None, None)
+
+
+def test_gather_limited_caps_in_flight_calls():
+    in_flight = 0
+    peak = 0
+
+    async def call():
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return 1
+
+    assert asyncio.run(gather_limited([call] * 10, limit=3)) == [1] * 10
+    assert peak == 3
+
+
+class _RouteClient:
+    """Amadeus stand-in: Paris has airport CDG, Athens none; offers exist only PAR→ATH on
+    the 16th, the date flight-dates suggests."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def get(self, path, **params):
+        if path.endswith("/flight-dates"):
+            self.calls.append(("dates", params["origin"], params["destination"]))
+            return SimpleNamespace(data=[{"departureDate": "2026-01-16"}])
+        if path.endswith("/flight-offers"):
+            key = (params["originLocationCode"], params["destinationLocationCode"],
+                   params["departureDate"])
+            self.calls.append(("offers",) + key)
+            found = key == ("PAR", "ATH", "2026-01-16")
+            return SimpleNamespace(data=[{"id": "1"}] if found else [])
+        airports = [{"iataCode": "CDG"}] if params.get("keyword") == "PAR" else []
+        return SimpleNamespace(data=airports)
+
+
+def test_serial_search_walks_the_fallback_one_pair_at_a_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    monkeypatch.setattr(cache, "MEM_CACHE", MemoryCache())
+    client = _RouteClient()
+    monkeypatch.setattr(amadeus_api, "get_client", lambda: client)
+    app = FastAPI()
+    app.include_router(amadeus_api.router, prefix="/api/amadeus")
+    resp = TestClient(app).get("/api/amadeus/flight-offers-by-cities", params={
+        "originCity": "PAR", "destinationCity": "ATH", "departure": "2026-01-15",
+        "includeMeta": True, "parallel": False,
+    })
+    assert resp.json()["meta"] == {"origin": "PAR", "dest": "ATH", "date": "2026-01-16",
+                                   "fallback": True}
+    # The second pair's suggested dates are never asked for
+    assert client.calls == [
+        ("offers", "PAR", "ATH", "2026-01-15"),
+        ("offers", "CDG", "ATH", "2026-01-15"),
+        ("dates", "PAR", "ATH"),
+        ("offers", "PAR", "ATH", "2026-01-16"),
+    ]
@@ -0,0 +1,91 @@
+import json
+import math
+import mmap
+
+from backend.app.utils import geo_dataset
+from backend.app.utils.geo_dataset import GeoDataset, compile_dataset
+
+CSV_HEADER = ("﻿Geoname ID;Name;ASCII Name;Alternate Names;Country Code;Country name EN;"
+              "Population;Timezone;Coordinates\n")
+
+
+def _sources(tmp_path):
+    src = tmp_path / "doc"
+    src.mkdir()
+    (src / "africa.csv").write_text(
+        CSV_HEADER
+        + "178922;Turbo;Turbo;;KE;Kenya;2559;Africa/Nairobi;0.63367, 35.04815\n"
+        + "179949;Sondu;Sondu;Sondu,Sondo;KE;Kenya;6869;Africa/Nairobi;-0.3906, 35.01266\n",
+        encoding="utf-8",
+    )
+    (src / "artic.csv").write_text(
+        CSV_HEADER + "7535941;Olonkinbyen;Olonkinbyen;Olonkin City;SJ;;14;Arctic/Longyearbyen;\n"
+    )
+    (src / "africa.json").write_text(json.dumps([
+        # Same place as in the CSV export: kept once
+        {"geoname_id": "178922", "name": "Turbo", "cou_name_en": "Kenya", "country_code": "KE",
+         "population": 2559, "timezone": "Africa/Nairobi",
+         "coordinates": {"lat": 0.63367, "lon": 35.04815}},
+        {"geoname_id": "2332459", "name": "Lagos", "ascii_name": "Lagos",
+         "alternate_names": ["Eko", "Лагос"], "cou_name_en": "Nigeria", "country_code": "NG",
+         "population": 9000000, "timezone": "Africa/Lagos",
+         "coordinates": {"lat": 6.45407, "lon": 3.39467}},
+    ]))
+    return src
+
+
+def test_compiled_dataset_round_trips_and_interns_strings(tmp_path):
+    out = tmp_path / "geonames.bin"
+    result = compile_dataset(_sources(tmp_path), out)
+    assert result["rows"] == 4
+    ds = GeoDataset.open(out)
+    try:
+        by_name = {ds.value("name", i): ds.row(i) for i in range(len(ds))}
+        assert set(by_name) == {"Turbo", "Sondu", "Olonkinbyen", "Lagos"}
+        assert by_name["Lagos"] == {
+            "geoname_id": 2332459, "name": "Lagos", "country": "Nigeria", "country_code": "NG",
+            "region": "Africa", "timezone": "Africa/Lagos", "ascii_name": "Lagos",
+            "alt_names": "Eko\x1fЛагос",
+            "population": 9000000, "lat": 6.45407, "lon": 3.39467}
+        assert ds.alternate_names(1) == ["Sondu", "Sondo"]
+        # Misspelled export maps to its region; missing country and coordinates have defaults
+        assert by_name["Olonkinbyen"]["region"] == "Arctic"
+        assert by_name["Olonkinbyen"]["country"] == "Arctic"
+        assert math.isnan(by_name["Olonkinbyen"]["lat"])
+        # "Kenya", "KE", "Africa/Nairobi" and "Africa" are each stored once
+        assert ds.columns["country"][0] == ds.columns["country"][1]
+        assert len(ds.columns["str_offsets"]) - 1 == result["strings"]
+        # Columns are views over the mapping, not copies
+        assert isinstance(ds.columns["lat"].obj, mmap.mmap)
+        rows = [r[:3] for r in ds.iter_seed_rows(["Africa"])][:2]
+        assert rows == [("Africa", "Kenya", "Turbo"), ("Africa", "Kenya", "Sondu")]
+    finally:
+        ds.close()
+
+
+def test_dataset_is_recompiled_when_sources_change(tmp_path, monkeypatch):
+    src = _sources(tmp_path)
+    out = tmp_path / "data" / "geonames.bin"
+    monkeypatch.setattr(geo_dataset, "GEO_SOURCE_DIR", src)
+    monkeypatch.setattr(geo_dataset, "GEO_DATASET_PATH", out)
+    geo_dataset.reset_geo_dataset()
+    try:
+        assert len(geo_dataset.get_geo_dataset()) == 4
+        geo_dataset.reset_geo_dataset()
+        with open(src / "africa.csv", "a", encoding="utf-8") as f:
+            f.write("184745;Nairobi;Nairobi;KE;Kenya;2750547;Africa/Nairobi;-1.28333, 36.81667\n")
+        assert len(geo_dataset.get_geo_dataset()) == 5
+    finally:
+        geo_dataset.reset_geo_dataset()
+
+
+def test_source_digest_is_cached_by_size_and_mtime(tmp_path, monkeypatch):
+    src = _sources(tmp_path)
+    cache_path = tmp_path / "geonames.sources.json"
+    digest = geo_dataset.source_digest(src, cache_path)
+    reads = []
+    monkeypatch.setattr(geo_dataset.Path, "read_bytes", lambda p: reads.append(p) or b"")
+    assert geo_dataset.source_digest(src, cache_path) == digest and reads == []
+    monkeypatch.undo()
+    (src / "artic.csv").write_text(CSV_HEADER)
+    assert geo_dataset.source_digest(src, cache_path) != digest
@@ -0,0 +1,100 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import StaticPool
+
+from backend.app import db
+from backend.app.routes import geo
+from backend.app.utils import geo_dump
+from backend.app.utils.geo_dump import decode_cursor, encode_cursor, iter_dump
+from backend.tests.test_geo_loader import SCHEMA
+
+
+def _engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool,
+                           connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        for stmt in SCHEMA:
+            conn.execute(text(stmt))
+        conn.execute(text("INSERT INTO regions (id, name) VALUES (1, 'Africa'), (2, 'Asia')"))
+        conn.execute(text("INSERT INTO countries (id, region_id, name)"
+                          " VALUES (1, 1, 'Kenya'), (2, 2, 'Japan')"))
+        insert_city = text("INSERT INTO cities (country_id, name, is_capital)"
+                           " VALUES (:c, :n, :cap)")
+        conn.execute(insert_city, [
+            {"c": 1, "n": "Nairobi", "cap": 1}, {"c": 1, "n": "Mombasa", "cap": 0},
+            {"c": 1, "n": "Kisumu", "cap": 0},
+            {"c": 2, "n": "Tokyo", "cap": 1}, {"c": 2, "n": "Osaka", "cap": 0},
+        ])
+    return engine
+
+
+def _dump(engine, **kwargs):
+    return b"".join(iter_dump(engine, **kwargs))
+
+
+def test_default_dump_keeps_its_shape():
+    data = json.loads(_dump(_engine()))
+    assert list(data) == ["regions", "countries", "cities"]
+    assert data["regions"] == [{"id": 1, "name": "Africa"}, {"id": 2, "name": "Asia"}]
+    assert data["countries"][0] == {"id": 2, "region_id": 2, "name": "Japan"}
+    assert [c["name"] for c in data["cities"]] == ["Kisumu", "Mombasa", "Nairobi", "Osaka", "Tokyo"]
+    assert data["cities"][2] == {"id": 1, "country_id": 1, "name": "Nairobi", "is_capital": 1}
+
+
+def test_keyset_pages_cover_every_city_once(monkeypatch):
+    engine = _engine()
+    monkeypatch.setattr(geo_dump, "GEO_DUMP_CHUNK", 1)
+    seen, after, pages = [], None, []
+    while True:
+        page = json.loads(_dump(engine, after=after, limit=2))
+        pages.append(page)
+        seen += [c["name"] for c in page["cities"]]
+        if page["next"] is None:
+            break
+        after = decode_cursor(page["next"])
+    assert seen == ["Kisumu", "Mombasa", "Nairobi", "Osaka", "Tokyo"]
+    assert len(pages) == 3
+    # Regions and countries only come with the first page
+    assert len(pages[0]["countries"]) == 2 and pages[1]["countries"] == []
+
+
+def test_filters_and_ndjson():
+    engine = _engine()
+    data = json.loads(_dump(engine, region_id=2))
+    assert [r["name"] for r in data["regions"]] == ["Asia"]
+    assert [c["name"] for c in data["cities"]] == ["Osaka", "Tokyo"]
+    body = _dump(engine, country_id=1, limit=2, ndjson=True)
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert [(line["type"], line.get("name")) for line in lines] == [
+        ("region", "Africa"), ("country", "Kenya"), ("city", "Kisumu"), ("city", "Mombasa"),
+        ("page", None)]
+    assert decode_cursor(lines[-1]["next"]) == ("Mombasa", 2)
+    assert decode_cursor(encode_cursor("São Tomé", 7)) == ("São Tomé", 7)
+
+
+def test_repeat_loads_get_304_without_a_query(monkeypatch):
+    engine = _engine()
+    monkeypatch.setattr(db, "_engine", engine)
+    geo_dump.invalidate_geo_version()
+    app = FastAPI()
+    app.include_router(geo.router, prefix="/api/geo")
+    client = TestClient(app)
+
+    first = client.get("/api/geo/dump")
+    assert first.status_code == 200 and len(first.json()["cities"]) == 5
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    again = client.get("/api/geo/dump", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304 and statements == []
+    assert client.get("/api/geo/dump?after=nope").status_code == 400
+
+    # A new seed changes the version
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO cities (country_id, name) VALUES (2, 'Kyoto')"))
+    geo_dump.invalidate_geo_version()
+    changed = client.get("/api/geo/dump", headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200 and changed.headers["etag"] != first.headers["etag"]
+    geo_dump.invalidate_geo_version()
@@ -0,0 +1,48 @@
+import random
+import pathlib
+
+import pytest
+
+from backend.app.utils.geo_dataset import GeoDataset, iter_source_rows
+from backend.app.utils.geo_index import GeoGridIndex, haversine_km
+
+DOC_DIR = pathlib.Path(__file__).resolve().parents[2] / "doc"
+
+
+@pytest.fixture(scope="module")
+def index():
+    return GeoGridIndex(GeoDataset.from_buffer(GeoDataset.build(iter_source_rows(DOC_DIR))))
+
+
+def _brute_nearest(index, lat, lon, k):
+    rows = [i for i in range(len(index.ds)) if index.lat[i] == index.lat[i]]
+    return sorted((haversine_km(lat, lon, index.lat[i], index.lon[i]), i) for i in rows)[:k]
+
+
+def test_nearest_matches_brute_force(index):
+    rng = random.Random(7)
+    points = [(rng.uniform(-60, 60), rng.uniform(-180, 180)) for _ in range(30)]
+    points += [(89.5, 10.0), (-1.28, 36.81), (-17.7, 179.9)]  # polar, dense, antimeridian
+    for lat, lon in points:
+        got = index.nearest(lat, lon, k=5)
+        expected = _brute_nearest(index, lat, lon, 5)
+        assert [round(d, 6) for d, _ in got] == [round(d, 6) for d, _ in expected]
+
+
+def test_nearest_returns_places_with_distance(index):
+    (d, row), = index.nearest(-1.28, 36.81, k=1)
+    place = index.place(row, distance_km=d)
+    assert place["name"] == "Nairobi" and place["country"] == "Kenya"
+    assert place["distance_km"] < 2
+
+
+def test_within_box_and_antimeridian(index):
+    rows = index.within(north=-1.0, west=36.0, south=-2.0, east=37.0, limit=1000)
+    assert rows and all(-2.0 <= index.lat[r] <= -1.0 and 36.0 <= index.lon[r] <= 37.0 for r in rows)
+    populations = [index.ds.columns["population"][r] for r in rows]
+    assert populations == sorted(populations, reverse=True)
+    # Fiji straddles 180°: west > east selects both sides
+    fiji = index.within(north=-15.0, west=177.0, south=-20.0, east=-178.0, limit=1000)
+    lons = [index.lon[r] for r in fiji]
+    assert any(x > 177 for x in lons) and all(x >= 177 or x <= -178 for x in lons)
+    assert index.within(north=-2.0, west=36.0, south=-1.0, east=37.0) == []
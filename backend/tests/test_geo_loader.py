@@ -0,0 +1,65 @@
+import pathlib
+
+from sqlalchemy import create_engine, event, text
+
+from backend.app.utils.geo_loader import GeoLoader, iter_csv_rows
+
+DOC_DIR = pathlib.Path(__file__).resolve().parents[2] / "doc"
+
+# 002_geo_reset.sql + 003_city_coordinates.sql in SQLite syntax
+SCHEMA = [
+    "CREATE TABLE regions (id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " name VARCHAR(128) UNIQUE NOT NULL)",
+    "CREATE TABLE countries (id INTEGER PRIMARY KEY AUTOINCREMENT, region_id INT NOT NULL,"
+    " name VARCHAR(255) NOT NULL, UNIQUE (region_id, name))",
+    "CREATE TABLE cities (id INTEGER PRIMARY KEY AUTOINCREMENT, country_id INT NOT NULL,"
+    " name VARCHAR(255) NOT NULL, is_capital TINYINT(1) DEFAULT 0, geoname_id INT,"
+    " latitude DOUBLE, longitude DOUBLE, population INT, UNIQUE (country_id, name))",
+]
+
+
+def _engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for stmt in SCHEMA:
+            conn.execute(text(stmt))
+    return engine
+
+
+def test_csv_rows_are_streamed_for_known_regions_only():
+    rows = list(iter_csv_rows(str(DOC_DIR), ["Africa"]))
+    assert len(rows) > 10_000
+    assert {r[0] for r in rows} == {"Africa"}
+    # The BOM on the header must not hide the first column
+    assert rows[0] == ("Africa", "Kenya", "Turbo", 0.63367, 35.04815, 2559, 178922)
+
+
+def test_loader_batches_cities_and_resolves_countries_in_memory():
+    engine = _engine()
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    reports = []
+    with engine.begin() as conn:
+        loader = GeoLoader(conn, batch_size=2000, progress=reports.append, progress_every=5000)
+        loader.reset(["Africa", "Pacific"])
+        stats = loader.load(iter_csv_rows(str(DOC_DIR), ["Africa", "Pacific"]))
+
+    with engine.connect() as conn:
+        cities = conn.execute(text("SELECT COUNT(*) FROM cities")).scalar()
+        countries = conn.execute(text("SELECT COUNT(*) FROM countries")).scalar()
+    assert stats["cities"] == cities > 10_000
+    assert stats["countries"] == countries
+    with engine.connect() as conn:
+        turbo = conn.execute(text(
+            "SELECT latitude, longitude, population, geoname_id FROM cities WHERE name = 'Turbo'"
+        )).one()
+    assert tuple(turbo) == (0.63367, 35.04815, 2559, 178922)
+    assert stats["rows_per_sec"] > 0 and len(reports) == stats["rows"] // 5000
+    # A handful of statements per batch rather than several per row
+    city_inserts = [s for s in statements if "INTO cities" in s]
+    assert len(city_inserts) == stats["batches"]
+    assert len(statements) < 4 * stats["batches"] + 10
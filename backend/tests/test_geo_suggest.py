@@ -0,0 +1,63 @@
+from backend.app.utils.geo_dataset import GeoDataset
+from backend.app.utils.geo_suggest import SuggestIndex, fold
+
+
+def _row(gid, name, country, code, population, alt=""):
+    return {"geoname_id": gid, "name": name, "country": country, "country_code": code,
+            "region": "Africa", "timezone": "", "ascii_name": fold(name), "alt_names": alt,
+            "population": population, "lat": 0.0, "lon": 0.0}
+
+
+ROWS = [
+    _row(184745, "Nairobi", "Kenya", "KE", 2750547),
+    _row(184622, "Naivasha", "Kenya", "KE", 181966),
+    _row(178922, "Turbo", "Kenya", "KE", 2559),
+    _row(2332459, "Lagos", "Nigeria", "NG", 9000000, "Eko\x1fЛагос"),
+    _row(2335204, "Kenyatta", "Nigeria", "NG", 50),
+    _row(3448439, "São Tomé", "Sao Tome and Principe", "ST", 71868),
+    _row(2255414, "Ekoumdouma", "Nigeria", "NG", 900),
+]
+
+
+def _index():
+    return SuggestIndex(GeoDataset.from_buffer(GeoDataset.build(ROWS)))
+
+
+def _names(index, q, limit=10):
+    hits, fuzzy = index.suggest(q, limit)
+    return [index.describe(e)["name"] for e in hits], fuzzy
+
+
+def test_fold_ignores_case_and_accents():
+    assert fold("São Tomé") == "sao tome"
+    assert fold("ÅLESUND ") == "alesund"
+
+
+def test_prefix_matches_rank_by_population():
+    index = _index()
+    assert _names(index, "na") == (["Nairobi", "Naivasha"], False)
+    assert _names(index, "SAO t") == (["São Tomé", "Sao Tome and Principe"], False)
+    # The country adds up its cities and outranks the small town sharing its prefix
+    hits, _ = index.suggest("keny", 10)
+    kenya = index.describe(hits[0])
+    assert kenya == {"type": "country", "name": "Kenya", "country_code": "KE", "region": "Africa",
+                     "population": 2750547 + 181966 + 2559}
+    assert index.describe(hits[1])["name"] == "Kenyatta"
+
+
+def test_alternate_names_match_after_primary_names():
+    index = _index()
+    assert _names(index, "лаг") == (["Lagos"], False)
+    # Lagos is far bigger, but only Ekoumdouma is actually called "Eko…"
+    assert _names(index, "eko") == (["Ekoumdouma", "Lagos"], False)
+
+
+def test_typos_fall_back_to_one_edit():
+    index = _index()
+    assert _names(index, "nairbi") == (["Nairobi"], True)
+    assert _names(index, "nariobi") == (["Nairobi"], True)
+    assert _names(index, "lagso") == (["Lagos"], True)
+    assert _names(index, "naxirobi") == (["Nairobi"], True)
+    assert _names(index, "zzzz") == ([], True)
+    # Too short to guess from
+    assert _names(index, "zz") == ([], False)
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from backend.app import db
+from backend.app.routes import geo
+from backend.app.utils import cache, geo_tree
+from backend.app.utils.cache_backends import SQLiteBackend
+from backend.tests.test_geo_dump import _engine
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = _engine()
+    monkeypatch.setattr(db, "_engine", engine)
+    monkeypatch.setattr(cache, "_backend", SQLiteBackend(tmp_path / "cache.sqlite3"))
+    generation = cache.SharedGeneration("geo:generation", check_interval=0)
+    monkeypatch.setattr(geo_tree, "GEO_GENERATION", generation)
+    monkeypatch.setattr(geo_tree, "_tree", None)
+    app = FastAPI()
+    app.include_router(geo.router, prefix="/api/geo")
+    return TestClient(app), engine
+
+
+def _cascade(http):
+    return [http.get("/api/geo/regions").json(),
+            http.get("/api/geo/countries?region_id=1").json(),
+            http.get("/api/geo/cities?country_id=1").json(),
+            http.get("/api/geo/cities?country_id=99").json()]
+
+
+def test_cached_tree_serves_the_same_bodies(client, monkeypatch):
+    http, engine = client
+    cached = _cascade(http)
+    monkeypatch.setattr(geo_tree, "GEO_TREE_CACHE", False)
+    assert _cascade(http) == cached
+    assert cached[2] == [{"id": 1, "name": "Nairobi", "is_capital": 1},
+                         {"id": 3, "name": "Kisumu", "is_capital": 0},
+                         {"id": 2, "name": "Mombasa", "is_capital": 0}]
+    assert cached[3] == []
+
+
+def test_tree_is_served_from_memory_until_the_generation_moves(client):
+    http, engine = client
+    _cascade(http)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    _cascade(http)
+    assert statements == []
+
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO cities (country_id, name) VALUES (1, 'Eldoret')"))
+    # Another worker reseeded: the bump reaches this one through the shared backend
+    other_worker = cache.SharedGeneration("geo:generation")
+    other_worker.bump()
+    names = [c["name"] for c in http.get("/api/geo/cities?country_id=1").json()]
+    assert "Eldoret" in names
+    assert len([s for s in statements if s.startswith("SELECT")]) == 3  # one reload of the tree
+    assert json.loads(geo_tree._tree.cities[1]) == http.get("/api/geo/cities?country_id=1").json()
@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.utils import cache, iata_resolver
+from backend.app.utils.amadeus_gateway import GatewayResponse, ResponseError
+from backend.app.utils.cache import MemoryCache, set_cache
+from backend.app.utils.cache_backends import FileBackend
+from backend.app.utils.geo_dataset import ALT_SEP, GeoDataset
+from backend.app.utils.iata_resolver import IataResolver, build_geonames_codes, normalize
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    monkeypatch.setattr(cache, "MEM_CACHE", MemoryCache())
+    monkeypatch.setattr(iata_resolver, "_geonames_codes", {})
+
+
+class FakeClient:
+    """Answers lookups from `places` (keyword → (city code, airport codes)), counting calls."""
+
+    def __init__(self, places, fail=False):
+        self.places = places
+        self.fail = fail
+        self.calls = []
+
+    async def get(self, path, **params):
+        self.calls.append((path, params["keyword"]))
+        if self.fail:
+            raise ResponseError(GatewayResponse(500, body="down"))
+        city, airports = self.places.get(params["keyword"], (None, []))
+        if params.get("subType") == "AIRPORT":
+            return SimpleNamespace(data=[{"iataCode": a} for a in airports])
+        data = [{"name": params["keyword"].upper(), "iataCode": city}] if city else []
+        return SimpleNamespace(data=data)
+
+
+def _resolve(client, *names):
+    async def run():
+        resolver = IataResolver(client)
+        return [await resolver.resolve(n) for n in names], resolver
+
+    return asyncio.run(run())
+
+
+def test_names_are_folded_and_aliased():
+    assert normalize("São-Paulo") == normalize(" sao  paulo ") == "sao paulo"
+    assert normalize("St. Petersburg") == "saint petersburg"
+    assert normalize("Athína") == normalize("ATHENS") == "athens"
+
+
+def test_warm_names_take_no_upstream_call():
+    client = FakeClient({"lisbon": ("LIS", ["LIS"])})
+    (first,), _ = _resolve(client, "Lisbon")
+    (again, aliased), resolver = _resolve(client, "lisbon", "Lisboa")
+    assert first == again == aliased == ("LIS", ["LIS"])
+    assert len(client.calls) == 2
+    assert resolver.stats()["warm"] == 1 and resolver.stats()["reused"] == 1
+
+
+def test_metro_code_wins_and_leads_the_airports():
+    client = FakeClient({"paris": ("PRS", ["ORY", "PAR", "CDG"])})
+    (resolved,), _ = _resolve(client, "Paris")
+    assert resolved == ("PAR", ["PAR", "ORY", "CDG"])
+    assert client.calls == [("/v1/reference-data/locations", "paris")]
+
+
+def test_cached_location_responses_warm_the_index():
+    set_cache("locations_Porto_CITY", [{"name": "PORTO", "iataCode": "OPO"}])
+    set_cache("locations_Porto_AIRPORT", [{"iataCode": "OPO"}])
+    client = FakeClient({})
+    (resolved,), _ = _resolve(client, "Porto")
+    assert resolved == ("OPO", ["OPO"]) and client.calls == []
+
+
+def test_unknown_names_are_cached_but_failures_are_not():
+    client = FakeClient({})
+    _resolve(client, "Atlantis")
+    (resolved,), _ = _resolve(client, "Atlantis")
+    assert resolved == (None, []) and len(client.calls) == 2
+
+    failing = FakeClient({}, fail=True)
+    _resolve(failing, "Lemuria")
+    _resolve(failing, "Lemuria")
+    assert len(failing.calls) == 4
+
+
+def test_geonames_alternate_names_give_city_codes():
+    rows = [
+        {"name": "Beijing", "ascii_name": "Beijing",
+         "alt_names": ALT_SEP.join(["BJS", "Peking", "Pékin"]), "population": 100},
+        {"name": "Pékin", "ascii_name": "Pekin", "alt_names": "", "population": 5},
+        {"name": "Two Codes", "ascii_name": "Two Codes", "alt_names": ALT_SEP.join(["AAA", "BBB"]),
+         "population": 9},
+    ]
+    codes = build_geonames_codes(GeoDataset.from_buffer(GeoDataset.build(rows)))
+    assert codes["beijing"] == codes["pekin"] == "BJS"
+    assert "two codes" not in codes
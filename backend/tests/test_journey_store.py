@@ -0,0 +1,98 @@
+import pathlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+
+from backend.app.routes import journeys as journeys_routes
+from backend.app.utils.journey_store import CHILD_TABLES, insert_journey, insert_journeys
+
+SCHEMA = pathlib.Path(__file__).resolve().parents[1] / "migrations" / "001_init.sql"
+
+
+def _engine():
+    # The journey tables from 001_init.sql, minus MySQL-only clauses
+    engine = create_engine("sqlite://")
+    sql = SCHEMA.read_text()
+    with engine.begin() as conn:
+        for table in ("journeys",) + tuple(CHILD_TABLES):
+            start = sql.index(f"CREATE TABLE IF NOT EXISTS {table} (")
+            stmt = sql[start:sql.index(");", start) + 1]
+            stmt = stmt.replace("INT AUTO_INCREMENT PRIMARY KEY",
+                                "INTEGER PRIMARY KEY AUTOINCREMENT")
+            conn.execute(text(stmt))
+    return engine
+
+
+def _count_statements(engine):
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement.split()[2], executemany))
+
+    return statements
+
+
+def _journey(i, flights=3):
+    return {
+        "user_id": 1,
+        "destination_country": "Greece",
+        "destination_city": f"City {i}",
+        "budget": 1000.0 + i,
+        "flights": [{"airline": "BA", "origin_city": "MAD", "destination_city": "ATH",
+                     "departure_date": "2026-01-15", "arrival_date": "2026-01-15",
+                     "price": 99.0 + n}
+                    for n in range(flights)],
+        "places_to_visit": [{"place_name": "Acropolis", "category": "activity",
+                             "description": None}],
+    }
+
+
+def test_one_statement_per_child_table():
+    engine = _engine()
+    statements = _count_statements(engine)
+    with engine.begin() as conn:
+        journey_id = insert_journey(conn, _journey(0, flights=10))
+    # journeys + flights + places_to_visit + the three default child tables
+    assert [t for t, _ in statements] == [
+        "journeys", "flights", "transportation", "food_choices", "shopping_choices",
+        "places_to_visit"]
+    with engine.connect() as conn:
+        count = text("SELECT COUNT(*) FROM flights WHERE journey_id = :j")
+        assert conn.execute(count, {"j": journey_id}).scalar() == 10
+        assert conn.execute(text("SELECT description FROM places_to_visit")).scalar() is None
+
+
+def test_bulk_insert_batches_children_across_journeys():
+    engine = _engine()
+    statements = _count_statements(engine)
+    journeys = [_journey(i) for i in range(25)]
+    with engine.begin() as conn:
+        ids = insert_journeys(conn, journeys, with_defaults=False)
+    assert len(ids) == len(set(ids)) == 25
+    child_statements = [s for s in statements if s[0] != "journeys"]
+    assert child_statements == [("flights", True), ("places_to_visit", True)]
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT journey_id, COUNT(*) FROM flights GROUP BY journey_id")
+        ).all()
+    assert sorted(rows) == [(j, 3) for j in sorted(ids)]
+
+
+def test_missing_child_fields_are_rejected():
+    journey = _journey(0)
+    del journey["flights"][1]["price"]
+    engine = _engine()
+    with pytest.raises(ValueError, match=r"flights\[1\]\.price"):
+        with engine.begin() as conn:
+            insert_journey(conn, journey)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM journeys")).scalar() == 0
+
+    app = FastAPI()
+    app.include_router(journeys_routes.router, prefix="/api/journeys")
+    resp = TestClient(app).post("/api/journeys/seed/bulk", json=[_journey(1), journey])
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "journeys[1]: Missing field: flights[1].price"
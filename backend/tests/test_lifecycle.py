@@ -0,0 +1,137 @@
+import asyncio
+import unicodedata
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+
+from backend.app.main import app
+from backend.app.utils import cache, lifecycle
+from backend.app.utils.cache_backends import FileBackend
+from backend.app.utils.geo_seed import seed_geo, stored_digest
+from backend.app.utils.lifecycle import Lifecycle
+from backend.tests.test_geo_loader import SCHEMA
+
+ROWS = [("Africa", "Kenya", "Nairobi", -1.28333, 36.81667, 2750547, 184745),
+        ("Africa", "Kenya", "Turbo", 0.63367, 35.04815, 2559, 178922)]
+
+
+def test_readiness_waits_for_required_components_only():
+    async def run():
+        lc = Lifecycle()
+        assert not lc.ready()
+        gate = asyncio.Event()
+
+        async def slow():
+            await gate.wait()
+            return {"status": "ok"}
+
+        async def broken():
+            raise RuntimeError("no dataset")
+
+        lc.start("database", slow)
+        lc.start("geo_seed", broken, required=False)
+        await asyncio.sleep(0)
+        assert not lc.ready() and lc.components["database"]["state"] == "running"
+        gate.set()
+        await lc.wait("database")
+        await asyncio.sleep(0)
+        report = lc.report()
+        assert report["ready"] and report["live"]
+        assert report["components"]["geo_seed"]["state"] == "failed"
+        assert "no dataset" in report["components"]["geo_seed"]["error"]
+        await lc.shutdown()
+
+    asyncio.run(run())
+
+
+def test_probe_endpoints_split_liveness_and_readiness(monkeypatch):
+    monkeypatch.setattr(lifecycle.LIFECYCLE, "components", {})
+    client = TestClient(app)  # no startup hooks: nothing has run yet
+    assert client.get("/health/live").json() == {"status": "alive"}
+    assert client.get("/health/ready").status_code == 503
+    lifecycle.LIFECYCLE.components["database"] = {"state": "ready", "required": True}
+    lifecycle.LIFECYCLE.components["geo_seed"] = {"state": "running", "required": False}
+    assert client.get("/health/ready").status_code == 200
+    assert client.get("/health").json()["components"]["geo_seed"]["state"] == "running"
+
+
+def test_seed_is_skipped_when_the_checksum_is_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for stmt in SCHEMA:
+            conn.execute(text(stmt))
+        conn.execute(text(
+            "CREATE TABLE geo_seed_state (id TINYINT PRIMARY KEY,"
+            " source_digest VARCHAR(64) NOT NULL, cities INT NOT NULL, seeded_at DOUBLE NOT NULL)"
+        ))
+
+    first = seed_geo(engine, ["Africa"], rows=ROWS, digest="abc")
+    assert first["status"] == "seeded" and first["cities"] == 2
+    again = seed_geo(engine, ["Africa"], rows=ROWS, digest="abc")
+    assert again == {"status": "skipped", "reason": "unchanged", "digest": "abc"}
+    forced = seed_geo(engine, ["Africa"], rows=ROWS[:1], digest="abc", force=True)
+    assert forced["status"] == "seeded" and forced["generation"] == first["generation"] + 1
+    with engine.connect() as conn:
+        assert stored_digest(conn) == "abc"
+        assert conn.execute(text("SELECT COUNT(*) FROM cities")).scalar() == 1
+
+
+def test_emptied_tables_are_reseeded_despite_the_checksum(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for stmt in SCHEMA:
+            conn.execute(text(stmt))
+        conn.execute(text(
+            "CREATE TABLE geo_seed_state (id TINYINT PRIMARY KEY,"
+            " source_digest VARCHAR(64) NOT NULL, cities INT NOT NULL, seeded_at DOUBLE NOT NULL)"
+        ))
+    assert seed_geo(engine, ["Africa"], rows=ROWS, digest="abc")["status"] == "seeded"
+    # What re-running 002_geo_reset.sql leaves: empty geo tables, checksum still recorded
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM cities"))
+    assert seed_geo(engine, ["Africa"], rows=ROWS, digest="abc")["status"] == "seeded"
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM cities")).scalar() == 2
+
+
+def test_seed_works_without_the_state_table(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for stmt in SCHEMA:
+            conn.execute(text(stmt))
+    assert seed_geo(engine, ["Africa"], rows=ROWS, digest="abc")["status"] == "seeded"
+    with engine.connect() as conn:
+        assert stored_digest(conn) is None
+        assert conn.execute(text("SELECT COUNT(*) FROM cities")).scalar() == 2
+
+
+def test_names_the_collation_folds_together_do_not_defeat_the_checksum(tmp_path, monkeypatch):
+    # MySQL's utf8mb4_0900_ai_ci folds accents and case, so INSERT IGNORE drops Bépleu after Bepleu
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def _fold(dbapi_conn, _):
+        def key(s):
+            return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode().lower()
+
+        dbapi_conn.create_collation("ai_ci", lambda a, b: (key(a) > key(b)) - (key(a) < key(b)))
+
+    with engine.begin() as conn:
+        for stmt in SCHEMA:
+            conn.execute(text(stmt.replace("name VARCHAR(255) NOT NULL, is_capital",
+                                           "name VARCHAR(255) COLLATE ai_ci NOT NULL, is_capital")))
+        conn.execute(text(
+            "CREATE TABLE geo_seed_state (id TINYINT PRIMARY KEY,"
+            " source_digest VARCHAR(64) NOT NULL, cities INT NOT NULL, seeded_at DOUBLE NOT NULL)"
+        ))
+    rows = ROWS + [("Africa", "Kenya", "Bepleu", None, None, None, None),
+                   ("Africa", "Kenya", "Bépleu", None, None, None, None)]
+
+    first = seed_geo(engine, ["Africa"], rows=rows, digest="abc")
+    assert first["status"] == "seeded" and first["cities"] == 3
+    again = seed_geo(engine, ["Africa"], rows=rows, digest="abc")
+    assert again == {"status": "skipped", "reason": "unchanged", "digest": "abc"}
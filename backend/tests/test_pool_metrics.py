@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, text
+
+from backend.app import db
+from backend.app.routes import admin
+from backend.app.utils.pool_metrics import InstrumentedQueuePool
+
+
+def _engine(tmp_path, pool_size=1, max_overflow=1, pool_timeout=0.2):
+    return create_engine(
+        f"sqlite:///{tmp_path / 'pool.sqlite3'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        connect_args={"check_same_thread": False},
+    )
+
+
+def test_pool_counts_checkouts_overflow_and_timeouts(tmp_path):
+    engine = _engine(tmp_path)
+    first = engine.connect()
+    second = engine.connect()  # beyond pool_size: an overflow connection
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    stats = engine.pool.stats()
+    assert stats["pool_size"] == 1 and stats["max_overflow"] == 1
+    assert stats["in_use"] == 2 and stats["peak_in_use"] == 2 and stats["overflow"] == 1
+    assert stats["connects"] == 2 and stats["overflow_connects"] == 1
+    assert stats["timeouts"] == 1 and stats["checkouts"] == 2
+    second.close()
+    first.close()
+    assert engine.pool.stats()["in_use"] == 0
+
+
+def test_pool_times_the_wait_for_a_free_connection(tmp_path):
+    engine = _engine(tmp_path, max_overflow=0, pool_timeout=5)
+    held = engine.connect()
+    threading.Timer(0.1, held.close).start()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    wait = engine.pool.stats()["wait_ms"]
+    assert wait["max"] >= 80 and wait["p99"] >= 80
+    assert engine.pool.stats()["timeouts"] == 0
+
+
+def test_metrics_endpoint_reports_the_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "_engine", None)
+    monkeypatch.setattr(db, "_async_engine", None)
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+    http = TestClient(app)
+    # No engine yet: reporting must not create one
+    assert http.get("/api/admin/metrics").json() == {"db_pool": {"created": False},
+                                                     "db_pool_async": {"created": False}}
+
+    engine = _engine(tmp_path, pool_size=3)
+    monkeypatch.setattr(db, "_engine", engine)
+    with engine.connect():
+        pool = http.get("/api/admin/metrics").json()["db_pool"]
+    assert pool["created"] is True and pool["pool_class"] == "InstrumentedQueuePool"
+    assert pool["pool_size"] == 3 and pool["in_use"] == 1 and pool["checkouts"] == 1
@@ -0,0 +1,181 @@
+import sys
+import json
+import asyncio
+import threading
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.routes import amadeus_api
+from backend.app.utils import cache, prefetch
+from backend.app.utils.amadeus_gateway import AmadeusGateway
+from backend.app.utils.cache import MemoryCache, set_cache
+from backend.app.utils.cache_backends import FileBackend
+from backend.app.utils.prefetch import (
+    ENDPOINTS, HotKeys, Prefetcher, load_seeds, published_hot_keys,
+)
+from backend.app.utils.rate_limit import RateLimits
+from backend.app.utils.resilience import Breakers
+from scripts.amadeus_stub import app as stub_app
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    monkeypatch.setattr(cache, "MEM_CACHE", MemoryCache())
+    stub_app.state.stats = {"token_requests": 0, "api_requests": 0, "by_path": {}}
+
+
+def _gateway():
+    transport = httpx.ASGITransport(app=stub_app)
+    return AmadeusGateway("id", "secret", "http://stub", transport=transport)
+
+
+def _backdate(key, seconds):
+    cache.MEM_CACHE._data[key].ts -= seconds
+
+
+def test_hot_keys_rank_per_kind_and_cool_down():
+    hot = HotKeys(half_life=3600)
+    hot._decayed_at = 1_000_000.0
+    for _ in range(3):
+        hot.record("flight_dates_CDG_MUC", hit=True, endpoint="flight_dates",
+                   params={"origin": "CDG", "destination": "MUC"})
+    hot.record("flight_dates_CDG_ATH", hit=False, endpoint="flight_dates",
+               params={"origin": "CDG", "destination": "ATH"})
+    hot.record("locations_Athens_CITY", hit=False, endpoint="locations",
+               params={"keyword": "Athens", "subType": "CITY"})
+    top = hot.top(1)
+    assert top["routes"] == [("flight_dates_CDG_MUC", 3.0)]
+    assert top["cities"] == [("locations_Athens_CITY", 1.0)]
+
+    # Two half-lives later the single requests are gone and the hot one has cooled to 0.75
+    hot._decay(1_000_000.0 + 2 * 3600)
+    assert hot.counts == {"flight_dates_CDG_MUC": 0.75}
+    assert set(hot.specs) == {"flight_dates_CDG_MUC"}
+
+
+def test_publish_in_a_thread_while_requests_are_recorded():
+    # The prefetch loop publishes via asyncio.to_thread while the event loop keeps recording;
+    # switching threads often makes a publish overlap a record or a prune
+    old_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    hot = HotKeys(max_keys=2_000)
+    errors = []
+    done = threading.Event()
+
+    def publish():
+        while not done.is_set():
+            try:
+                hot.publish()
+            except Exception as e:  # noqa: BLE001 - surfaced by the assertion below
+                errors.append(e)
+                return
+
+    publisher = threading.Thread(target=publish)
+    publisher.start()
+    try:
+        for i in range(20_000):
+            hot.record(f"flight_dates_CDG_{i}", hit=False, endpoint="flight_dates",
+                       params={"origin": "CDG", "destination": str(i)})
+    finally:
+        done.set()
+        publisher.join()
+        sys.setswitchinterval(old_interval)
+    assert errors == []
+    hot.publish()
+    assert published_hot_keys()
+
+
+def test_hit_ratio_is_reported_before_and_after_prefetch_starts():
+    hot = HotKeys()
+    for hit in (False, False, True, False):
+        hot.record("k", hit)
+    hot.mark_baseline()
+    for hit in (True, True, True, False):
+        hot.record("k", hit)
+    stats = hot.stats()
+    assert stats["hit_ratio_before_prefetch"] == 0.25 and stats["hit_ratio_since_prefetch"] == 0.75
+
+
+def test_seed_list(tmp_path):
+    assert all(name in ENDPOINTS for name, _ in load_seeds())
+    bad = tmp_path / "seeds.json"
+    bad.write_text(json.dumps([{"endpoint": "flight_dates", "params": {"origin": "CDG"}}]))
+    with pytest.raises(ValueError):
+        load_seeds(bad)
+    assert load_seeds(tmp_path / "missing.json") == []
+
+
+def test_pass_refreshes_only_keys_close_to_expiry():
+    seeds = [("flight_dates", {"origin": "CDG", "destination": "MUC"}),  # not cached yet
+             ("flight_destinations", {"origin": "CDG"}),  # about to expire
+             ("flight_destinations", {"origin": "MAD"})]  # fresh for a while
+    for origin in ("CDG", "MAD"):
+        set_cache(f"flight_destinations_{origin}", [], ttl=300)
+    _backdate("flight_destinations_CDG", 290)
+
+    async def run():
+        gateway = _gateway()
+        report = await Prefetcher(gateway, seeds=seeds, rate=0).run_once()
+        await gateway.aclose()
+        return report
+
+    report = asyncio.run(run())
+    assert report["due"] == 2 and report["refreshed"] == 2
+    assert report["coverage_before"] == round(2 / 3, 4) and report["coverage_after"] == 1.0
+    by_path = stub_app.state.stats["by_path"]
+    assert by_path == {"/v1/shopping/flight-dates": 1, "/v1/shopping/flight-destinations": 1}
+
+
+def test_open_breaker_and_spent_quota_are_skipped(monkeypatch):
+    breakers = Breakers(window=1, min_calls=1, cooldown=60)
+    breakers.for_path("/v1/shopping/flight-dates").record(False)
+    monkeypatch.setattr(prefetch, "get_breakers", lambda: breakers)
+    # 10 reference-data calls left this month, under the reserve kept for user requests
+    limits = RateLimits({}, quotas={"reference-data": 10})
+    monkeypatch.setattr(prefetch, "get_rate_limits", lambda: limits)
+    seeds = [("flight_dates", {"origin": "CDG", "destination": "MUC"}),
+             ("locations", {"keyword": "Athens", "subType": "CITY"}),
+             ("flight_destinations", {"origin": "CDG"})]
+
+    async def run():
+        gateway = _gateway()
+        report = await Prefetcher(gateway, seeds=seeds, rate=0, quota_reserve=100).run_once()
+        await gateway.aclose()
+        return report
+
+    report = asyncio.run(run())
+    assert report["skipped_budget"] == 2 and report["refreshed"] == 1
+    assert stub_app.state.stats["by_path"] == {"/v1/shopping/flight-destinations": 1}
+
+
+def test_requests_feed_the_hot_keys_a_cli_prefetcher_reads(monkeypatch):
+    hot = HotKeys()
+    gateway = _gateway()
+    monkeypatch.setattr(amadeus_api, "HOT_KEYS", hot)
+    monkeypatch.setattr(amadeus_api, "get_client", lambda: gateway)
+    app = FastAPI()
+    app.include_router(amadeus_api.router, prefix="/api/amadeus")
+    with TestClient(app) as client:
+        for _ in range(3):
+            resp = client.get("/api/amadeus/flight-dates?origin=CDG&destination=ATH")
+            assert resp.status_code == 200
+    assert hot.hits == 2 and hot.misses == 1
+
+    hot.publish()
+    spec = ("flight_dates", {"origin": "CDG", "destination": "ATH"})
+    assert published_hot_keys() == [("flight_dates_CDG_ATH", spec, 3.0)]
+    _backdate("flight_dates_CDG_ATH", 400)
+
+    async def run():
+        fresh_gateway = _gateway()
+        report = await Prefetcher(fresh_gateway, rate=0).run_once()
+        await fresh_gateway.aclose()
+        return report
+
+    report = asyncio.run(run())
+    assert report["candidates"] == 1 and report["refreshed"] == 1
+    assert report["coverage_after"] == 1.0
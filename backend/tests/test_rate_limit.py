@@ -0,0 +1,156 @@
+import time
+import asyncio
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from backend.app.utils.amadeus_gateway import AmadeusGateway, ResponseError
+from backend.app.utils.rate_limit import (
+    RateLimits, SharedWindow, TokenBucket, family_for, retry_after_seconds,
+)
+from scripts.resp_stub import RespServer
+
+
+def test_paths_map_to_api_families():
+    assert family_for("/v2/shopping/flight-offers") == "shopping"
+    assert family_for("/v1/reference-data/locations/cities") == "reference-data"
+    assert family_for("/v1/travel/analytics/air-traffic/booked") == "analytics"
+    assert family_for("/v1/airport/direct-destinations") == "other"
+
+
+def test_retry_after_as_seconds_or_date():
+    assert retry_after_seconds("3") == 3.0
+    assert retry_after_seconds(None) is None and retry_after_seconds("soon") is None
+    assert 8 <= retry_after_seconds(formatdate(time.time() + 10, usegmt=True)) <= 10
+
+
+def test_pause_holds_back_the_bucket():
+    async def run():
+        bucket = TokenBucket(rate=1000, burst=5)
+        bucket.pause(0.1)
+        started = time.perf_counter()
+        await bucket.acquire()
+        return time.perf_counter() - started, bucket.stats()
+
+    waited, stats = asyncio.run(run())
+    assert waited >= 0.09 and stats["acquired"] == 1 and stats["waits"] == 1
+
+
+def _throttling_gateway(limits, responses):
+    """Gateway whose upstream answers API calls with `responses` in turn (status, headers)."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/oauth2/token"):
+            return httpx.Response(200, json={"access_token": "t", "expires_in": 1799})
+        calls.append(request.url.path)
+        status, headers = responses[min(len(calls), len(responses)) - 1]
+        body = {"data": [{"id": 1}]} if status == 200 else {}
+        return httpx.Response(status, headers=headers, json=body)
+
+    gateway = AmadeusGateway("id", "secret", "http://stub", transport=httpx.MockTransport(handler),
+                             limits=limits)
+    return gateway, calls
+
+
+def test_429_waits_for_retry_after_and_pauses_the_family():
+    async def run():
+        limits = RateLimits({"shopping": 100})
+        gateway, calls = _throttling_gateway(limits, [(429, {"Retry-After": "0.2"}), (200, {})])
+        started = time.perf_counter()
+        resp = await gateway.get("/v2/shopping/flight-offers", originLocationCode="PAR")
+        waited = time.perf_counter() - started
+        await gateway.aclose()
+        return limits, resp, calls, waited
+
+    limits, resp, calls, waited = asyncio.run(run())
+    assert resp.status_code == 200 and len(calls) == 2 and waited >= 0.19
+    shopping = limits.stats()["families"]["shopping"]
+    assert shopping["throttled_429"] == 1 and shopping["last_retry_after"] == 0.2
+    assert shopping["month_used"] == 2 and shopping["calls_last_minute"] == 2
+
+
+def test_long_retry_after_is_not_waited_out():
+    limits = RateLimits({})
+
+    async def run():
+        gateway, calls = _throttling_gateway(limits, [(429, {"Retry-After": "3600"})])
+        try:
+            with pytest.raises(ResponseError) as err:
+                await gateway.get("/v1/reference-data/airlines", airlineCodes="BA")
+        finally:
+            await gateway.aclose()
+        return err.value, calls
+
+    err, calls = asyncio.run(run())
+    assert err.response.status_code == 429 and len(calls) == 1
+    # Not retried, but still counted and the family held back
+    family = limits.stats()["families"]["reference-data"]
+    assert family["throttled_429"] == 1 and family["paused_for"] > 3500
+
+
+def test_last_429_after_the_retries_is_counted():
+    limits = RateLimits({})
+
+    async def run():
+        gateway, calls = _throttling_gateway(limits, [(429, {"Retry-After": "0"})])
+        try:
+            with pytest.raises(ResponseError):
+                await gateway.get("/v2/shopping/flight-offers", originLocationCode="PAR")
+        finally:
+            await gateway.aclose()
+        return calls
+
+    calls = asyncio.run(run())
+    assert len(calls) == 3 and limits.stats()["families"]["shopping"]["throttled_429"] == 3
+
+
+def test_quota_is_reported_per_family():
+    async def run():
+        limits = RateLimits({"reference-data": 0}, quotas={"reference-data": 3})
+        for _ in range(2):
+            await limits.acquire("/v1/reference-data/locations")
+        return limits.stats()["families"]
+
+    families = asyncio.run(run())
+    assert families["reference-data"]["month_used"] == 2
+    assert families["reference-data"]["month_remaining"] == 1
+    assert families["shopping"]["month_quota"] is None
+
+
+def test_quota_warning_fires_once_when_crossed(caplog):
+    async def run():
+        limits = RateLimits({"shopping": 0}, quotas={"shopping": 10})
+        # Another worker stepped over 9 (90%) between two of ours
+        limits.used["shopping"] = 8
+        for _ in range(4):
+            await limits.acquire("/v2/shopping/flight-offers")
+
+    with caplog.at_level("WARNING", logger="amadeus_logger"):
+        asyncio.run(run())
+    assert [r.getMessage() for r in caplog.records] == [
+        "Amadeus shopping calls this month: 9 of 10",
+        "Amadeus shopping calls this month: 10 of 10",
+    ]
+
+
+def test_shared_window_does_not_count_denied_attempts():
+    import redis
+
+    server = RespServer().start()
+    try:
+        client = redis.Redis.from_url(server.url, protocol=2)
+        window = SharedWindow(client)
+
+        async def run():
+            return [await window.delay("shopping", 2) for _ in range(4)]
+
+        delays = asyncio.run(run())
+        counts = [int(value) for key, (value, _) in server.store.data.items()
+                  if key.startswith(b"eoex:rate:shopping:")]
+    finally:
+        server.shutdown()
+        server.server_close()
+    # Only granted attempts stay counted, however the calls fell across second boundaries
+    assert delays.count(0.0) >= 2 and sum(counts) == delays.count(0.0) and max(counts) <= 2
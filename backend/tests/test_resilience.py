@@ -0,0 +1,107 @@
+import time
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.routes import amadeus_api
+from backend.app.utils.amadeus_gateway import (
+    AmadeusGateway, CircuitOpen, GatewayResponse, ResponseError, is_retriable,
+)
+from backend.app.utils.resilience import Breakers, CircuitBreaker, full_jitter, retry, set_deadline
+
+
+def test_breaker_opens_on_error_rate_and_probes_after_cooldown():
+    breaker = CircuitBreaker("/v1/x", window=4, min_calls=4, error_rate=0.5, cooldown=0.05)
+    for ok in (True, False, True):
+        breaker.record(ok)
+    assert breaker.state == "closed"
+    breaker.record(False)
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    # One probe at a time while half open; its success closes the breaker
+    assert breaker.allow() and not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.stats()["rejected"] == 2
+
+
+def test_full_jitter_stays_under_the_cap():
+    delays = [full_jitter(attempt, base=0.5, cap=2.0) for attempt in range(8) for _ in range(50)]
+    assert min(delays) >= 0 and max(delays) <= 2.0
+
+
+def test_retry_does_not_sleep_past_the_deadline():
+    calls = []
+
+    async def failing():
+        calls.append(time.perf_counter())
+        raise RuntimeError("upstream down")
+
+    async def run():
+        set_deadline(0.01)
+        started = time.perf_counter()
+        with pytest.raises(RuntimeError):
+            await retry(failing, lambda err: True, max_retries=5, base=10, cap=10)
+        return time.perf_counter() - started
+
+    assert asyncio.run(run()) < 0.05 and len(calls) == 1
+
+
+def _app(monkeypatch, handler, breakers=None):
+    gateway = AmadeusGateway("id", "secret", "http://stub", transport=httpx.MockTransport(handler),
+                             breakers=breakers)
+    monkeypatch.setattr(amadeus_api, "get_client", lambda: gateway)
+    monkeypatch.setattr(amadeus_api, "get_breakers", lambda: breakers or Breakers())
+    app = FastAPI()
+    app.include_router(amadeus_api.router, prefix="/api/amadeus")
+    return app, gateway
+
+
+def _token_or(response):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/oauth2/token"):
+            return httpx.Response(200, json={"access_token": "t", "expires_in": 1799})
+        return await response(request)
+    return handler
+
+
+def test_open_breaker_fails_fast_and_is_reported(monkeypatch):
+    upstream = []
+
+    async def down(request):
+        upstream.append(request.url.path)
+        return httpx.Response(500, json={"errors": [{"status": 500}]})
+
+    breakers = Breakers(window=2, min_calls=2, cooldown=60)
+    app, _ = _app(monkeypatch, _token_or(down), breakers)
+    with TestClient(app) as client:
+        # Two failed attempts open the breaker; the third is refused without calling upstream
+        assert client.get("/api/amadeus/airlines").status_code == 503
+        assert client.get("/api/amadeus/airlines").status_code == 503
+        health = client.get("/api/amadeus/health").json()
+    assert len(upstream) == 2
+    assert health["status"] == "degraded"
+    assert health["breakers"]["/v1/reference-data/airlines"]["state"] == "open"
+
+
+def test_request_deadline_cuts_a_slow_upstream(monkeypatch):
+    async def slow(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={"data": []})
+
+    monkeypatch.setattr(amadeus_api, "REQUEST_DEADLINE", 0.1)
+    app, _ = _app(monkeypatch, _token_or(slow))
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        resp = client.get("/api/amadeus/airlines")
+    assert resp.status_code == 504 and time.perf_counter() - started < 0.5
+
+
+def test_refusals_are_not_retried():
+    refused = CircuitOpen(GatewayResponse(503, body="circuit open"))
+    assert not is_retriable(refused)
+    assert is_retriable(ResponseError(GatewayResponse(502)))
+    assert not is_retriable(ResponseError(GatewayResponse(404)))
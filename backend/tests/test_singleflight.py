@@ -0,0 +1,69 @@
+import asyncio
+import httpx
+import pytest
+
+from backend.app.main import app
+from backend.app.utils import cache
+from backend.app.utils.amadeus_gateway import AmadeusGateway, set_gateway
+from backend.app.utils.cache import MemoryCache
+from backend.app.utils.cache_backends import FileBackend
+from backend.app.utils.singleflight import SingleFlight
+from scripts.amadeus_stub import app as stub_app
+
+
+def test_concurrent_callers_share_result_and_error():
+    calls = 0
+
+    async def slow_ok():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return {"ok": True}
+
+    async def slow_fail():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        sf = SingleFlight()
+        results = await asyncio.gather(*(sf.do("k", slow_ok) for _ in range(10)))
+        errors = await asyncio.gather(*(sf.do("bad", slow_fail) for _ in range(5)),
+                                      return_exceptions=True)
+        return sf, results, errors
+
+    sf, results, errors = asyncio.run(run())
+    assert calls == 1
+    assert all(r == {"ok": True} for r in results)
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert sf.stats() == {"calls": 2, "coalesced": 13, "in_flight": 0}
+
+
+@pytest.fixture
+def cold_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    monkeypatch.setattr(cache, "MEM_CACHE", MemoryCache())
+    stub_app.state.latency_ms = 50
+    transport = httpx.ASGITransport(app=stub_app)
+    set_gateway(AmadeusGateway("id", "secret", "http://stub", transport=transport))
+    yield
+    set_gateway(None)
+    stub_app.state.latency_ms = 0
+
+
+def test_fifty_identical_requests_make_one_upstream_call(cold_cache):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            before = stub_app.state.stats["by_path"].get("/v2/shopping/flight-offers", 0)
+            responses = await asyncio.gather(*(
+                client.get("/api/amadeus/test", params={"origin": "CDG", "destination": "ATH",
+                                                        "departure": "2026-03-01"})
+                for _ in range(50)
+            ))
+            after = stub_app.state.stats["by_path"].get("/v2/shopping/flight-offers", 0)
+            return responses, after - before
+
+    responses, upstream_calls = asyncio.run(run())
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.content for r in responses}) == 1
+    assert upstream_calls == 1
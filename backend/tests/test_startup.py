@@ -0,0 +1,22 @@
+import sys
+import pathlib
+import subprocess
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+CHECK = """
+import sys
+import backend.app.main
+from backend.app import db
+from backend.app.utils import amadeus_gateway
+print(sorted(m for m in ("httpx", "pymysql", "sqlalchemy.orm", "dotenv") if m in sys.modules))
+print(db._engine is None, amadeus_gateway._gateway is None)
+"""
+
+
+def test_importing_the_app_defers_engine_client_and_drivers(tmp_path):
+    # A fresh interpreter: other tests have long since imported everything
+    out = subprocess.run([sys.executable, "-c", CHECK], cwd=REPO_ROOT,
+                         env={"PYTHONPATH": str(REPO_ROOT)}, capture_output=True, text=True,
+                         check=True).stdout.splitlines()
+    assert out == ["[]", "True True"]
@@ -0,0 +1,72 @@
+import time
+import asyncio
+import pytest
+
+from backend.app.utils import cache
+from backend.app.utils.cache import MemoryCache
+from backend.app.utils.cache_backends import FileBackend
+from backend.app.utils.jsoncodec import loads
+from backend.app.utils.swr import CachePolicy, swr_fetch
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_backend", FileBackend(tmp_path))
+    monkeypatch.setattr(cache, "MEM_CACHE", MemoryCache())
+
+
+def _age(key, seconds):
+    # Backdate the stored entry as if it had been written `seconds` ago
+    entry = cache.MEM_CACHE._data[key]
+    entry.ts = time.time() - seconds
+
+
+def test_stale_payload_served_while_refreshing():
+    policy = CachePolicy(ttl=10, stale_while_revalidate=60)
+    upstream = {"version": 1}
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return dict(upstream)
+
+    async def run():
+        first = await swr_fetch("flight_dates_CDG_MUC", fetch, policy)
+        _age("flight_dates_CDG_MUC", 30)
+        upstream["version"] = 2
+        stale = await swr_fetch("flight_dates_CDG_MUC", fetch, policy)
+        await asyncio.sleep(0.05)  # let the background refresh land
+        fresh = await swr_fetch("flight_dates_CDG_MUC", fetch, policy)
+        return loads(first), loads(stale), loads(fresh)
+
+    first, stale, fresh = asyncio.run(run())
+    assert first == {"version": 1}
+    assert stale == {"version": 1}
+    assert fresh == {"version": 2}
+
+
+def test_stale_payload_served_when_upstream_fails():
+    policy = CachePolicy(ttl=10, stale_while_revalidate=0, stale_if_error=600)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            raise RuntimeError("503 from upstream")
+        return ["cached"]
+
+    async def run():
+        await swr_fetch("locations_Athens_CITY", fetch, policy)
+        _age("locations_Athens_CITY", 120)
+        return await swr_fetch("locations_Athens_CITY", fetch, policy)
+
+    assert loads(asyncio.run(run())) == ["cached"]
+    assert calls == 2
+
+
+def test_error_propagates_without_stale_copy():
+    async def fetch():
+        raise RuntimeError("503 from upstream")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(swr_fetch("hotel_offers_X_1", fetch, CachePolicy(ttl=10, stale_if_error=600)))
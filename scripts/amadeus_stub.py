@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Amadeus self-service API.
+
+Serves the OAuth token endpoint and canned payloads for the paths the backend uses, with
+optional artificial latency, so the gateway can be tested and benchmarked offline:
+
+    STUB_LATENCY_MS=40 uvicorn scripts.amadeus_stub:app --port 8089
+    AMADEUS_BASE_URL=http://127.0.0.1:8089 AMADEUS_CLIENT_ID=x AMADEUS_CLIENT_SECRET=y \
+        bash scripts/run.sh
+"""
+import os
+import asyncio
+import secrets
+from urllib.parse import parse_qs
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+
+LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "0"))
+TOKEN_TTL = int(os.getenv("STUB_TOKEN_TTL", "1799"))
+
+# Tokens are recognised by prefix so several stand-in workers can share them
+TOKEN_PREFIX = "stub-"
+
+app = FastAPI(title="Amadeus stand-in")
+app.state.stats = {"token_requests": 0, "api_requests": 0, "by_path": {}}
+app.state.latency_ms = LATENCY_MS
+
+
+def _flight_offer(i: int, origin: str, dest: str, date: str) -> dict:
+    return {
+        "type": "flight-offer",
+        "id": str(i + 1),
+        "source": "GDS",
+        "itineraries": [{
+            "duration": "PT3H10M",
+            "segments": [{
+                "departure": {"iataCode": origin, "at": f"{date}T08:{i % 60:02d}:00"},
+                "arrival": {"iataCode": dest, "at": f"{date}T11:{i % 60:02d}:00"},
+                "carrierCode": ["AF", "A3", "BA", "IB", "LH"][i % 5],
+                "number": str(1000 + i),
+                "aircraft": {"code": "320"},
+                "duration": "PT3H10M",
+                "numberOfStops": 0,
+            }],
+        }],
+        "price": {"currency": "EUR", "total": f"{120 + i * 7.5:.2f}",
+                  "base": f"{90 + i * 7.5:.2f}"},
+        "travelerPricings": [{"travelerId": "1", "fareOption": "STANDARD",
+                              "travelerType": "ADULT"}],
+    }
+
+
+def _location(keyword: str, sub_type: str) -> dict:
+    code = (keyword or "XXX")[:3].upper()
+    return {
+        "type": "location",
+        "subType": sub_type,
+        "name": (keyword or "").upper(),
+        "iataCode": code,
+        "address": {"cityName": (keyword or "").upper(), "cityCode": code},
+        "geoCode": {"latitude": 37.9838, "longitude": 23.7275},
+    }
+
+
+def payload_for(path: str, params: dict) -> list | dict:
+    if path == "/v2/shopping/flight-offers":
+        origin = params.get("originLocationCode", "CDG")
+        dest = params.get("destinationLocationCode", "ATH")
+        date = params.get("departureDate", "2026-01-15")
+        return [_flight_offer(i, origin, dest, date) for i in range(int(params.get("max", 20)))]
+    if path == "/v1/shopping/flight-dates":
+        return [
+            {"type": "flight-date", "origin": params.get("origin"),
+             "destination": params.get("destination"), "departureDate": f"2026-01-{d:02d}",
+             "price": {"total": "99.00"}}
+            for d in (14, 16, 20)
+        ]
+    if path == "/v1/shopping/flight-destinations":
+        return [
+            {"type": "flight-destination", "origin": params.get("origin"), "destination": d,
+             "price": {"total": "150.00"}}
+            for d in ("ATH", "MAD", "MUC", "ROM", "LON")
+        ]
+    if path == "/v1/reference-data/locations":
+        return [_location(params.get("keyword", ""), params.get("subType", "CITY"))]
+    if path == "/v1/reference-data/locations/cities":
+        return [_location(params.get("keyword", ""), "city")]
+    if path == "/v1/reference-data/locations/airports":
+        return [_location("LHR", "AIRPORT")]
+    if path == "/v2/reference-data/urls/checkin-links":
+        code = params.get("airlineCode", "BA")
+        return [{"type": "checkin-link", "id": f"{code}EN-GBAll",
+                 "href": f"https://example.com/{code}", "channel": "All"}]
+    if path == "/v1/reference-data/airlines":
+        return [{"type": "airline", "iataCode": params.get("airlineCodes", "BA"),
+                 "businessName": "STAND-IN AIRWAYS"}]
+    if path == "/v3/shopping/hotel-offers":
+        return [{
+            "type": "hotel-offers",
+            "hotel": {"hotelId": params.get("hotelIds", "ADPAR001"), "name": "Stand-in Hotel",
+                      "address": {"lines": ["1 Main St"]}},
+            "offers": [{"id": "OFFER1", "price": {"currency": "EUR", "total": "140.00"}}],
+        }]
+    if path in ("/v1/shopping/activities", "/v1/shopping/activities/by-square"):
+        return [
+            {"type": "activity", "id": str(i), "name": f"Activity {i}",
+             "shortDescription": "Stand-in activity",
+             "price": {"amount": "25.00", "currencyCode": "EUR"}}
+            for i in range(10)
+        ]
+    if path.startswith("/v1/travel/analytics/air-traffic/"):
+        return [{"type": "air-traffic", "destination": "PAR",
+                 "analytics": {"flights": {"score": 71}}}]
+    return []
+
+
+@app.post("/v1/security/oauth2/token")
+async def token(request: Request):
+    form = parse_qs((await request.body()).decode("utf-8"))
+    if form.get("grant_type") != ["client_credentials"] or not form.get("client_id"):
+        return JSONResponse({"error": "invalid_request"}, status_code=400)
+    app.state.stats["token_requests"] += 1
+    tok = TOKEN_PREFIX + secrets.token_hex(16)
+    return {"type": "amadeusOAuth2Token", "access_token": tok, "token_type": "Bearer",
+            "expires_in": TOKEN_TTL}
+
+
+@app.get("/_stats")
+async def stats():
+    return app.state.stats
+
+
+@app.post("/_reset")
+async def reset():
+    app.state.stats = {"token_requests": 0, "api_requests": 0, "by_path": {}}
+    return {"status": "reset"}
+
+
+@app.get("/{path:path}")
+async def api(path: str, request: Request, authorization: str = Header("")):
+    full_path = "/" + path
+    if not authorization.removeprefix("Bearer ").startswith(TOKEN_PREFIX):
+        error = {"status": 401, "code": 38191, "title": "Invalid access token"}
+        return JSONResponse({"errors": [error]}, status_code=401)
+    stats = app.state.stats
+    stats["api_requests"] += 1
+    stats["by_path"][full_path] = stats["by_path"].get(full_path, 0) + 1
+    if app.state.latency_ms:
+        await asyncio.sleep(app.state.latency_ms / 1000.0)
+    return {"meta": {"count": 0}, "data": payload_for(full_path, dict(request.query_params))}
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Throughput of the read routes with the sync (threadpool + PyMySQL) and the async (aiomysql)
+database path.
+
+Starts one uvicorn worker per mode against the MySQL configured in the environment
+(GEO_TREE_CACHE=0 so the geo dropdowns query MySQL too) and drives the same request mix with
+many concurrent clients, well past Starlette's 40 threadpool slots:
+
+    python scripts/bench_async_db.py --clients 256 --requests 5000
+    python scripts/bench_async_db.py --modes async --clients 512 --paths /api/journeys
+
+Both modes share the pool settings (MYSQL_POOL_SIZE / MYSQL_MAX_OVERFLOW); raise them together
+with --clients to see where each mode stops scaling.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.bench_cold_start import free_port  # noqa: E402
+from scripts.load_test_db import percentiles  # noqa: E402
+
+DEFAULT_PATHS = [
+    "/api/journeys",
+    "/api/admin/dashboard",
+    "/api/admin/dashboard?destination=Paris",
+    "/api/geo/regions",
+    "/api/geo/countries?region_id=1",
+    "/api/geo/cities?country_id=1",
+]
+
+
+def start_app(port: int, mode: str) -> subprocess.Popen:
+    env = dict(os.environ, DB_ASYNC="1" if mode == "async" else "0", GEO_TREE_CACHE="0",
+               GEO_SEED_ON_STARTUP="0")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            break
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health/ready", timeout=1).status_code == 200:
+                return proc
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{mode} app did not become ready (is MySQL up?)")
+
+
+async def drive(base_url: str, paths: list[str], total: int, clients: int) -> dict:
+    latencies: list[float] = []
+    errors: dict = {}
+    sem = asyncio.Semaphore(clients)
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        # Warm up connections and the pool before measuring
+        await asyncio.gather(*(client.get(p) for p in paths))
+
+        async def one(i: int) -> None:
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(paths[i % len(paths)])
+                    if r.status_code != 200:
+                        errors[str(r.status_code)] = errors.get(str(r.status_code), 0) + 1
+                        return
+                except httpx.HTTPError as e:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                    return
+                latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        wall = time.perf_counter() - t0
+        metrics = (await client.get("/api/admin/metrics")).json()
+    pool = metrics["db_pool_async"]
+    if not pool.get("created"):
+        pool = metrics["db_pool"]
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 1),
+        "latency_ms": percentiles(latencies),
+        "pool_wait_ms": pool.get("wait_ms"),
+        "pool_peak_in_use": pool.get("peak_in_use"),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default="sync,async")
+    parser.add_argument("--clients", type=int, default=256)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--paths", default=",".join(DEFAULT_PATHS))
+    args = parser.parse_args()
+
+    paths = args.paths.split(",")
+    results = {}
+    for mode in args.modes.split(","):
+        port = free_port()
+        proc = start_app(port, mode)
+        try:
+            results[mode] = asyncio.run(drive(f"http://127.0.0.1:{port}", paths, args.requests,
+                                              args.clients))
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+    if "sync" in results and "async" in results and results["sync"]["rps"]:
+        results["async_vs_sync_rps"] = round(results["async"]["rps"] / results["sync"]["rps"], 2)
+    print(json.dumps({"clients": args.clients, "requests": args.requests, **results}, indent=2))
+    return 1 if any(r.get("errors") for r in results.values() if isinstance(r, dict)) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Cache-hit latency benchmark: decoded payloads re-serialized per request vs pre-encoded bytes.
+
+Before, a hit returned the decoded payload and FastAPI ran it through jsonable_encoder and
+JSONResponse on every request (plus json.loads when the hit came from the shared backend).
+Now the cache holds the encoded bytes and the route sends them as is. Payloads are real-sized:
+the warmed Athens activities response in backend/app/cache and a 250-offer flight search
+built by the Amadeus stand-in.
+
+    python scripts/bench_cache_hit.py --iterations 200
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, Response  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from backend.app.utils import jsoncodec  # noqa: E402
+from scripts.amadeus_stub import payload_for  # noqa: E402
+
+ACTIVITIES_FILE = REPO_ROOT / "backend" / "app" / "cache" / "activities_geo_37.9838_23.7275.json"
+
+
+def load_payloads() -> dict:
+    offers = payload_for("/v2/shopping/flight-offers", {"max": 250})
+    payloads = {"flight_offers_250": offers}
+    if ACTIVITIES_FILE.exists():
+        payloads["activities_athens"] = json.loads(ACTIVITIES_FILE.read_text())["payload"]
+    return payloads
+
+
+def timed(fn, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def summarize(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+    }
+
+
+def bench_handler(payload, raw: bytes, iterations: int) -> dict:
+    stdlib_raw = json.dumps(payload).encode("utf-8")
+    return {
+        # memory-tier hit, decoded object re-serialized by FastAPI
+        "before_memory_hit": summarize(timed(
+            lambda: JSONResponse(jsonable_encoder(payload)), iterations)),
+        # backend hit: decode, then the same serialization
+        "before_backend_hit": summarize(timed(
+            lambda: JSONResponse(jsonable_encoder(json.loads(stdlib_raw))), iterations)),
+        "after_hit": summarize(timed(
+            lambda: Response(content=raw, media_type="application/json"), iterations)),
+    }
+
+
+def bench_http(payload, raw: bytes, iterations: int) -> dict:
+    app = FastAPI()
+
+    @app.get("/before")
+    async def before():
+        return payload
+
+    @app.get("/after")
+    async def after():
+        return Response(content=raw, media_type="application/json")
+
+    async def run(path: str) -> list:
+        samples = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.get(path)
+            for _ in range(iterations):
+                t0 = time.perf_counter()
+                r = await client.get(path)
+                r.raise_for_status()
+                samples.append((time.perf_counter() - t0) * 1000)
+        return samples
+
+    return {
+        "before": summarize(asyncio.run(run("/before"))),
+        "after": summarize(asyncio.run(run("/after"))),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    report = {"codec": jsoncodec.CODEC, "payloads": {}}
+    for name, payload in load_payloads().items():
+        raw = jsoncodec.dumps(payload)
+        report["payloads"][name] = {
+            "bytes": len(raw),
+            "handler": bench_handler(payload, raw, args.iterations),
+            "http": bench_http(payload, raw, args.iterations),
+        }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
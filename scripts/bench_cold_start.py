@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Cold-start time of `uvicorn backend.app.main:app`, tracked across runs.
+
+Starts a fresh uvicorn process per run and polls /health/live and /health/ready: "live" is how
+long until the worker answers at all, "ready" until its required startup components (database,
+geo index) are done. Each run's numbers are appended as one JSON line (with the git commit)
+to the history file, and the median is compared with the previous commit's. The run fails
+when the median time to the first answered request exceeds --first-request-budget:
+
+    python scripts/bench_cold_start.py --runs 5 --first-request-budget 1.5
+    GEO_SEED_ON_STARTUP=0 python scripts/bench_cold_start.py --ready-timeout 0   # liveness only
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_HISTORY = REPO_ROOT / ".bench" / "cold_start.jsonl"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def wait_for(url: str, started: float, timeout: float, proc: subprocess.Popen) -> float | None:
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            return None
+        try:
+            if httpx.get(url, timeout=0.5).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def one_run(live_timeout: float, ready_timeout: float) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        live = wait_for(f"{base}/health/live", started, live_timeout, proc)
+        ready = None
+        if live and ready_timeout:
+            ready = wait_for(f"{base}/health/ready", started, ready_timeout, proc)
+        components = {}
+        if live is not None:
+            report = httpx.get(f"{base}/health", timeout=2).json()
+            components = {name: {k: c.get(k) for k in ("state", "seconds")}
+                          for name, c in report["components"].items()}
+        return {"live_s": round(live, 3) if live else None,
+                "ready_s": round(ready, 3) if ready else None,
+                "components": components}
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--live-timeout", type=float, default=30)
+    parser.add_argument("--ready-timeout", type=float, default=60, help="0 measures liveness only")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument("--first-request-budget", type=float, default=2.5,
+                        help="seconds from process start to the first answered request (median)")
+    args = parser.parse_args()
+
+    runs = [one_run(args.live_timeout, args.ready_timeout) for _ in range(args.runs)]
+    lives = [r["live_s"] for r in runs if r["live_s"] is not None]
+    readies = [r["ready_s"] for r in runs if r["ready_s"] is not None]
+    entry = {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "geo_seed_on_startup": os.getenv("GEO_SEED_ON_STARTUP", "1"),
+        "live_median_s": round(statistics.median(lives), 3) if lives else None,
+        "ready_median_s": round(statistics.median(readies), 3) if readies else None,
+        "runs": runs,
+    }
+
+    previous = None
+    if args.history.exists():
+        for line in args.history.read_text().splitlines():
+            record = json.loads(line)
+            if record.get("commit") != entry["commit"]:
+                previous = record
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+    if previous and previous.get("live_median_s") and entry["live_median_s"]:
+        change = round(entry["live_median_s"] - previous["live_median_s"], 3)
+        entry["live_change_vs"] = {previous["commit"]: change}
+    print(json.dumps(entry, indent=2))
+    if not lives:
+        print("the app never answered /health/live", file=sys.stderr)
+        return 1
+    if entry["live_median_s"] > args.first_request_budget:
+        print(f"time to first request {entry['live_median_s']}s is over the "
+              f"{args.first_request_budget}s budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""EXPLAIN plans and latency of the admin dashboard query on a synthetic journeys table.
+
+Builds `<MYSQL_DB>_bench` next to the app database (never touching it) with `--journeys`
+synthetic rows (1M by default; reused on later runs when the count matches), then for each
+filter combination times:
+
+- legacy: the old `(:x IS NULL OR ...)` query with LIMIT 100, without the 006 indexes
+- dynamic: the new dynamic query without the indexes
+- indexed: the new query with 006_journeys_dashboard_indexes.sql applied, first page and a
+  page deep into the keyset
+
+and prints each plan's access type, key, estimated rows and Extra. It fails when an indexed
+plan still scans the whole table or sorts it (Using filesort outside the UNION merge):
+
+    python scripts/bench_dashboard.py
+    python scripts/bench_dashboard.py --journeys 200000 --repeat 50 --json
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from backend.app import db  # noqa: E402
+from backend.app.utils.dashboard import dashboard_query, decode_dashboard_cursor, page  # noqa: E402
+
+MIGRATION = REPO_ROOT / "backend" / "migrations" / "006_journeys_dashboard_indexes.sql"
+INDEXES = ["idx_journeys_created", "idx_journeys_user_created", "idx_journeys_city_created",
+           "idx_journeys_country_created"]
+DESTINATIONS = [
+    ("France", "Paris"), ("France", "Lyon"), ("Japan", "Tokyo"), ("Japan", "Osaka"),
+    ("Greece", "Athens"), ("Spain", "Madrid"), ("Spain", "Barcelona"), ("Italy", "Rome"),
+] + [(f"Country {i}", f"City {i}") for i in range(200)]
+LEGACY_SQL = text("""
+    SELECT j.id, u.username, j.destination_country, j.destination_city, j.budget, j.created_at
+    FROM journeys j
+    JOIN users u ON u.id = j.user_id
+    WHERE ( :user IS NULL OR u.username = :user )
+      AND ( :destination IS NULL OR j.destination_city = :destination
+            OR j.destination_country = :destination )
+      AND ( :budget IS NULL OR j.budget <= :budget )
+    ORDER BY j.created_at DESC
+    LIMIT 100
+""")
+CASES = {
+    "none": {},
+    "user": {"user": "traveler-42"},
+    "destination_city": {"destination": "Paris"},
+    "destination_country": {"destination": "Japan"},
+    "budget": {"budget": 800},
+    "user+budget": {"user": "traveler-42", "budget": 3000},
+    "destination+budget": {"destination": "Tokyo", "budget": 1500},
+    "all": {"user": "traveler-7", "destination": "France", "budget": 4000},
+}
+
+
+def bench_db(journeys: int, users: int):
+    name = f"{db.MYSQL_DB}_bench"
+    server = create_engine(db.DATABASE_URL.rsplit("/", 1)[0])
+    with server.begin() as conn:
+        conn.execute(text(f"CREATE DATABASE IF NOT EXISTS `{name}`"))
+    engine = create_engine(f"{db.DATABASE_URL.rsplit('/', 1)[0]}/{name}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS users (id INT AUTO_INCREMENT PRIMARY KEY,"
+                          " username VARCHAR(100) UNIQUE)"))
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS journeys (id INT AUTO_INCREMENT PRIMARY KEY,"
+            " user_id INT NOT NULL, destination_country VARCHAR(100),"
+            " destination_city VARCHAR(100), budget DECIMAL(12,2),"
+            " created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, KEY user_id (user_id))"
+        ))
+        have = conn.execute(text("SELECT COUNT(*) FROM journeys")).scalar()
+    if have == journeys:
+        return engine
+    print(f"generating {journeys} journeys in {name}...", file=sys.stderr)
+    drop_indexes(engine)
+    rng = random.Random(1)
+    start = 1_700_000_000
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM journeys"))
+        conn.execute(text("DELETE FROM users"))
+        conn.execute(text("INSERT INTO users (id, username) VALUES (:id, :name)"),
+                     [{"id": i, "name": f"traveler-{i}"} for i in range(1, users + 1)])
+        for lo in range(0, journeys, 10_000):
+            batch = []
+            for _ in range(lo, min(journeys, lo + 10_000)):
+                # Skewed destinations: a few popular ones and a long tail
+                rank = min(int(rng.paretovariate(1.2)) - 1, len(DESTINATIONS) - 1)
+                country, city = DESTINATIONS[rank]
+                created = time.gmtime(start + rng.randint(0, 60_000_000))
+                batch.append({"u": rng.randint(1, users), "country": country, "city": city,
+                              "budget": round(rng.uniform(200, 10_000), 2),
+                              "ts": time.strftime("%Y-%m-%d %H:%M:%S", created)})
+            conn.execute(text(
+                "INSERT INTO journeys (user_id, destination_country, destination_city,"
+                " budget, created_at) VALUES (:u, :country, :city, :budget, :ts)"
+            ), batch)
+    return engine
+
+
+def drop_indexes(engine) -> None:
+    with engine.begin() as conn:
+        existing = {r[2] for r in conn.execute(text("SHOW INDEX FROM journeys"))}
+        if "user_id" not in existing:
+            conn.execute(text("ALTER TABLE journeys ADD KEY user_id (user_id)"))
+        for name in INDEXES:
+            if name in existing:
+                conn.execute(text(f"ALTER TABLE journeys DROP KEY {name}"))
+
+
+def add_indexes(engine) -> None:
+    drop_indexes(engine)
+    lines = MIGRATION.read_text().splitlines()
+    sql = "\n".join(line for line in lines if not line.startswith("--"))
+    with engine.begin() as conn:
+        # One statement per call: the driver does not take multi-statement strings
+        for statement in filter(None, (s.strip() for s in sql.split(";"))):
+            conn.execute(text(statement))
+        # What MySQL does to the foreign key's own index once idx_journeys_user_created can serve it
+        conn.execute(text("ALTER TABLE journeys DROP KEY user_id"))
+        conn.execute(text("ANALYZE TABLE journeys, users"))
+
+
+def explain(conn, statement, params) -> list:
+    rows = conn.execute(text(f"EXPLAIN {statement.text}"), params).mappings().all()
+    return [{k: r.get(k) for k in ("table", "type", "key", "rows", "Extra")} for r in rows]
+
+
+def timed(conn, statement, params, repeat: int) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        conn.execute(statement, params).fetchall()
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return {"p50_ms": round(statistics.median(latencies) * 1000, 2),
+            "p99_ms": round(p99 * 1000, 2)}
+
+
+def bad_plan(plan: list) -> str | None:
+    for step in plan:
+        extra = step["Extra"] or ""
+        if step["table"] == "j" and step["type"] == "ALL":
+            return "full scan of journeys"
+        if "Using filesort" in extra and not (step["table"] or "").startswith("<union"):
+            return f"filesort on {step['table']}"
+    return None
+
+
+def run_case(conn, mode: str, filters: dict, repeat: int, deep_pages: int) -> dict:
+    if mode == "legacy":
+        statement = LEGACY_SQL
+        params = {"user": None, "destination": None, "budget": None, **filters}
+        return {"plan": explain(conn, statement, params), **timed(conn, statement, params, repeat)}
+    statement, params = dashboard_query(**filters)
+    out = {"plan": explain(conn, statement, params), **timed(conn, statement, params, repeat)}
+    if mode == "indexed":
+        # Walk the keyset and time a page deep into the result
+        cursor = None
+        for _ in range(deep_pages):
+            result = conn.execute(*dashboard_query(**filters, after=cursor))
+            rows = [dict(r) for r in result.mappings()]
+            rows, nxt = page(rows, 100)
+            if nxt is None:
+                break
+            cursor = decode_dashboard_cursor(nxt)
+        statement, params = dashboard_query(**filters, after=cursor)
+        out["deep_page"] = {"plan": explain(conn, statement, params),
+                            **timed(conn, statement, params, repeat)}
+        out["problem"] = bad_plan(out["plan"]) or bad_plan(out["deep_page"]["plan"])
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--journeys", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--deep-pages", type=int, default=50)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    engine = bench_db(args.journeys, args.users)
+    report: dict = {"journeys": args.journeys, "cases": {name: {} for name in CASES}}
+    for mode in ("legacy", "dynamic", "indexed"):
+        if mode == "indexed":
+            add_indexes(engine)
+        else:
+            drop_indexes(engine)
+        with engine.connect() as conn:
+            for name, filters in CASES.items():
+                report["cases"][name][mode] = run_case(conn, mode, filters, args.repeat,
+                                                       args.deep_pages)
+
+    problems = {name: c["indexed"]["problem"] for name, c in report["cases"].items()
+                if c["indexed"]["problem"]}
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print(f"{'case':<20} {'legacy p50':>11} {'dynamic p50':>12} {'indexed p50':>12} "
+              f"{'deep p50':>9}  plan (indexed)")
+        for name, c in report["cases"].items():
+            plan = "; ".join(f"{s['table']}:{s['type']}/{s['key']}" for s in c["indexed"]["plan"])
+            print(f"{name:<20} {c['legacy']['p50_ms']:>9.2f}ms {c['dynamic']['p50_ms']:>10.2f}ms "
+                  f"{c['indexed']['p50_ms']:>10.2f}ms "
+                  f"{c['indexed']['deep_page']['p50_ms']:>7.2f}ms  {plan}")
+    for name, problem in problems.items():
+        print(f"{name}: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Latency/throughput benchmark: per-request amadeus SDK client vs the pooled async gateway.
+
+Starts the Amadeus stand-in (scripts/amadeus_stub.py) in a separate uvicorn process and
+drives the same flight-offers request through both paths with N concurrent callers:
+
+    python scripts/bench_gateway.py --requests 400 --concurrency 32 --latency-ms 20
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from amadeus import Client  # noqa: E402
+
+PARAMS = dict(originLocationCode="CDG", destinationLocationCode="ATH",
+              departureDate="2026-01-15", adults=1)
+
+
+def start_stub(port: int, latency_ms: float, workers: int = 4) -> subprocess.Popen:
+    env = dict(os.environ, STUB_LATENCY_MS=str(latency_ms))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "scripts.amadeus_stub:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=str(REPO_ROOT), env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stats", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("Amadeus stand-in did not start")
+
+
+def report(name: str, latencies: list[float], wall: float) -> None:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000
+    print(f"{name:<12} n={len(latencies):<5} p50={p50:7.2f}ms p99={p99:7.2f}ms "
+          f"rps={len(latencies) / wall:8.1f}")
+
+
+async def bench_sdk(port: int, total: int, concurrency: int) -> None:
+    # Old path: a fresh SDK client (and token exchange) per request, blocking calls in a threadpool
+    def one() -> float:
+        t0 = time.perf_counter()
+        client = Client(client_id="bench", client_secret="bench", host="127.0.0.1", port=port,
+                        ssl=False)
+        client.shopping.flight_offers_search.get(**PARAMS)
+        return time.perf_counter() - t0
+
+    # Same number of in-flight requests as the gateway run (Starlette's threadpool defaults to 40)
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        t0 = time.perf_counter()
+        latencies = await asyncio.gather(*(loop.run_in_executor(pool, one) for _ in range(total)))
+    report("sdk", list(latencies), time.perf_counter() - t0)
+
+
+async def bench_gateway(port: int, total: int, concurrency: int) -> None:
+    from backend.app.utils.amadeus_gateway import AmadeusGateway
+    gateway = AmadeusGateway("bench", "bench", f"http://127.0.0.1:{port}", pool_size=concurrency)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one() -> float:
+        async with sem:
+            t0 = time.perf_counter()
+            await gateway.get("/v2/shopping/flight-offers", **PARAMS)
+            return time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(total)))
+    report("gateway", list(latencies), time.perf_counter() - t0)
+    print(f"{'':<12} token fetches={gateway.token_fetches}")
+    await gateway.aclose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--stub-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    stub = start_stub(args.port, args.latency_ms, args.stub_workers)
+    try:
+        asyncio.run(bench_sdk(args.port, args.requests, args.concurrency))
+        asyncio.run(bench_gateway(args.port, args.requests, args.concurrency))
+    finally:
+        stub.terminate()
+        stub.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Load time and memory: compiled geo dataset vs parsing the GeoNames exports.
+
+Each mode runs in a fresh interpreter and reports the time to load every place and read its
+name, country and coordinates, plus the resident-set growth over the bare interpreter:
+
+- json: json.loads of every doc/*.json export
+- csv: csv.DictReader over every doc/*.csv export, rows kept in a list
+- dataset: GeoDataset.open (mmap) of the compiled file
+
+    python scripts/bench_geo_dataset.py --repeat 5
+"""
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+MODES = ("json", "csv", "dataset")
+
+
+def rss_kb() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def run_mode(mode: str) -> dict:
+    from backend.app.utils.geo_dataset import GEO_DATASET_PATH, GEO_SOURCE_DIR, GeoDataset
+
+    import csv  # noqa: F401  imported before measuring so module loading is not counted
+
+    before = rss_kb()
+    started = time.perf_counter()
+    touched = 0
+    if mode == "json":
+        keep = []
+        for p in sorted(GEO_SOURCE_DIR.glob("*.json")):
+            keep.append(json.loads(p.read_text(encoding="utf-8")))
+        for data in keep:
+            for row in data:
+                touched += (bool(row.get("name")) + bool(row.get("cou_name_en"))
+                            + bool(row.get("coordinates")))
+    elif mode == "csv":
+        keep = []
+        for p in sorted(GEO_SOURCE_DIR.glob("*.csv")):
+            with open(p, encoding="utf-8-sig", newline="") as f:
+                keep.extend(csv.DictReader(f, delimiter=";"))
+        for row in keep:
+            touched += (bool(row.get("Name")) + bool(row.get("Country name EN"))
+                        + bool(row.get("Coordinates")))
+    else:
+        keep = GeoDataset.open(GEO_DATASET_PATH)
+        name, country, lat = keep.columns["name"], keep.columns["country"], keep.columns["lat"]
+        for i in range(len(keep)):
+            touched += (bool(keep.string(name[i])) + bool(keep.string(country[i]))
+                        + (lat[i] == lat[i]))
+    elapsed = time.perf_counter() - started
+    return {"mode": mode, "seconds": elapsed, "rss_kb": rss_kb() - before, "values": touched}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        print(json.dumps(run_mode(args.mode)))
+        return 0
+
+    from backend.app.utils.geo_dataset import GEO_DATASET_PATH, GEO_SOURCE_DIR, compile_dataset
+
+    if not GEO_DATASET_PATH.exists():
+        compile_dataset(GEO_SOURCE_DIR, GEO_DATASET_PATH)
+    sizes = {
+        "json_bytes": sum(p.stat().st_size for p in GEO_SOURCE_DIR.glob("*.json")),
+        "csv_bytes": sum(p.stat().st_size for p in GEO_SOURCE_DIR.glob("*.csv")),
+        "dataset_bytes": GEO_DATASET_PATH.stat().st_size,
+    }
+    report = {"files": sizes, "modes": {}}
+    for mode in MODES:
+        runs = []
+        for _ in range(args.repeat):
+            out = subprocess.run([sys.executable, __file__, "--mode", mode],
+                                 capture_output=True, text=True, check=True)
+            runs.append(json.loads(out.stdout))
+        report["modes"][mode] = {
+            "load_ms_p50": round(statistics.median(r["seconds"] for r in runs) * 1000, 2),
+            "rss_kb_p50": statistics.median(r["rss_kb"] for r in runs),
+            "values": runs[0]["values"],
+        }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Peak memory of the /api/geo/dump body as the cities table grows.
+
+Fills an SQLite database with synthetic cities and compares the Python heap peak (tracemalloc)
+of building the whole dump in memory, as the endpoint used to, with streaming it through
+iter_dump in JSON and NDJSON:
+
+    python scripts/bench_geo_dump.py --cities 20000 100000
+"""
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from backend.app.utils.geo_dump import iter_dump  # noqa: E402
+from backend.app.utils.jsoncodec import dumps  # noqa: E402
+from backend.tests.test_geo_loader import SCHEMA  # noqa: E402
+
+
+def build_db(path: Path, cities: int):
+    path.unlink(missing_ok=True)
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        for stmt in SCHEMA:
+            conn.execute(text(stmt))
+        conn.execute(text("INSERT INTO regions (name) VALUES ('Africa')"))
+        conn.execute(text("INSERT INTO countries (region_id, name) VALUES (:r, :n)"),
+                     [{"r": 1, "n": f"Country {i}"} for i in range(200)])
+        conn.execute(text("INSERT INTO cities (country_id, name) VALUES (:c, :n)"),
+                     [{"c": 1 + i % 200, "n": f"City {i:07d}"} for i in range(cities)])
+    return engine
+
+
+def in_memory(engine) -> int:
+    with engine.connect() as conn:
+        regions = conn.execute(text("SELECT id, name FROM regions ORDER BY name")).mappings().all()
+        countries = conn.execute(
+            text("SELECT id, region_id, name FROM countries ORDER BY name")
+        ).mappings().all()
+        cities = conn.execute(
+            text("SELECT id, country_id, name, is_capital FROM cities ORDER BY name")
+        ).mappings().all()
+        body = dumps({
+            "regions": [{"id": r["id"], "name": r["name"]} for r in regions],
+            "countries": [{"id": c["id"], "region_id": c["region_id"], "name": c["name"]}
+                          for c in countries],
+            "cities": [{"id": c["id"], "country_id": c["country_id"], "name": c["name"],
+                        "is_capital": int(c["is_capital"])} for c in cities],
+        })
+    return len(body)
+
+
+def streamed(engine, ndjson: bool) -> int:
+    return sum(len(chunk) for chunk in iter_dump(engine, ndjson=ndjson))
+
+
+def measure(fn, *args) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn(*args)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"bytes": size, "peak_mb": round(peak / 2**20, 2), "seconds": round(seconds, 3)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--db", default="/tmp/bench_geo_dump.sqlite")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.cities:
+        engine = build_db(Path(args.db), n)
+        results.append({
+            "cities": n,
+            "in_memory": measure(in_memory, engine),
+            "stream_json": measure(streamed, engine, False),
+            "stream_ndjson": measure(streamed, engine, True),
+        })
+        engine.dispose()
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Latency of the in-memory spatial index behind /api/geo/nearest and /api/geo/within.
+
+Builds the grid index over the compiled geo dataset and times k-nearest and bounding-box
+queries at random points around the places in it (index calls only, no HTTP):
+
+    python scripts/bench_geo_index.py --queries 5000 --k 10
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from backend.app.utils.geo_index import GEO_GRID_DEG, GeoGridIndex  # noqa: E402
+from backend.app.utils.geo_dataset import get_geo_dataset  # noqa: E402
+
+
+def percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_us": round(statistics.median(samples), 1),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--box-deg", type=float, default=0.5)
+    parser.add_argument("--cell-deg", type=float, default=GEO_GRID_DEG)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = GeoGridIndex(get_geo_dataset(), cell_deg=args.cell_deg)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(1)
+    rows = [r for cell in index.cells.values() for r in cell]
+    points = []
+    for _ in range(args.queries):
+        r = rng.choice(rows)
+        points.append((index.lat[r] + rng.uniform(-1, 1), index.lon[r] + rng.uniform(-1, 1)))
+
+    nearest, within = [], []
+    for lat, lon in points:
+        t0 = time.perf_counter()
+        index.nearest(max(-90, min(90, lat)), lon, args.k)
+        nearest.append((time.perf_counter() - t0) * 1e6)
+        h = args.box_deg / 2
+        t0 = time.perf_counter()
+        index.within(lat + h, lon - h, lat - h, lon + h)
+        within.append((time.perf_counter() - t0) * 1e6)
+
+    print(json.dumps({
+        "places": index.size,
+        "cells": len(index.cells),
+        "build_ms": round(build_ms, 1),
+        "nearest": percentiles(nearest),
+        "within": percentiles(within),
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
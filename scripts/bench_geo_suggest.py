@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Latency of the autocomplete index behind /api/geo/suggest.
+
+Builds the suggest index over the compiled geo dataset and times keystroke-style prefix
+queries and misspelled names (one random edit) sampled from it (index calls only, no HTTP).
+Exits non-zero when a p99 goes over the budget:
+
+    python scripts/bench_geo_suggest.py --queries 5000 --budget-ms 1
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from backend.app.utils.geo_suggest import SuggestIndex, fold  # noqa: E402
+from backend.app.utils.geo_dataset import get_geo_dataset  # noqa: E402
+
+
+def percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_us": round(statistics.median(samples), 1),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 1),
+    }
+
+
+def typo(rng: random.Random, word: str) -> str:
+    i = rng.randrange(1, len(word))
+    kind = rng.choice(("delete", "swap", "replace", "insert"))
+    if kind == "delete":
+        return word[:i] + word[i + 1:]
+    if kind == "swap" and i + 1 < len(word):
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    c = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return word[:i] + c + (word[i + 1:] if kind == "replace" else word[i:])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    ds = get_geo_dataset()
+    started = time.perf_counter()
+    index = SuggestIndex(ds)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(1)
+    names = [fold(ds.value("name", i)) for i in range(len(ds))]
+    names = [n for n in names if len(n) >= 4]
+    prefixes = []
+    for _ in range(args.queries):
+        name = rng.choice(names)
+        prefixes.append(name[:rng.randint(1, len(name))])
+    typos = [typo(rng, rng.choice(names)) for _ in range(args.queries)]
+
+    results = {}
+    for label, queries in (("prefix", prefixes), ("typo", typos)):
+        samples, empty, fuzzy = [], 0, 0
+        for q in queries:
+            t0 = time.perf_counter()
+            hits, used_fuzzy = index.suggest(q, args.limit)
+            samples.append((time.perf_counter() - t0) * 1e6)
+            empty += not hits
+            fuzzy += used_fuzzy
+        results[label] = {**percentiles(samples), "empty": empty, "fuzzy": fuzzy}
+
+    print(json.dumps({
+        "places": len(ds),
+        "keys": len(index.keys),
+        "precomputed_prefixes": len(index.top),
+        "build_ms": round(build_ms, 1),
+        **results,
+    }, indent=2))
+    over = [k for k in ("prefix", "typo") if results[k]["p99_us"] > args.budget_ms * 1000]
+    if over:
+        print(f"p99 over {args.budget_ms} ms budget: {', '.join(over)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Latency of the cascading region → country → city dropdowns with the geo tree cache off and on.
+
+Seeds an SQLite database from the compiled geo dataset (or uses the app's MySQL with --app-db,
+which must already be seeded) and replays dropdown cascades against /api/geo/regions,
+/countries and /cities through the ASGI app in-process:
+
+    python scripts/bench_geo_tree.py --cascades 500
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from backend.app import db  # noqa: E402
+from backend.app.routes import geo  # noqa: E402
+from backend.app.utils import geo_tree  # noqa: E402
+from backend.app.utils.geo_dataset import get_geo_dataset  # noqa: E402
+from backend.app.utils.geo_loader import GeoLoader  # noqa: E402
+from backend.tests.test_geo_loader import SCHEMA  # noqa: E402
+
+
+def percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+    }
+
+
+def sqlite_engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool,
+                           connect_args={"check_same_thread": False})
+    regions = geo._region_names()
+    with engine.begin() as conn:
+        for stmt in SCHEMA:
+            conn.execute(text(stmt))
+        loader = GeoLoader(conn, progress_every=0)
+        loader.reset(regions)
+        loader.load(get_geo_dataset().iter_seed_rows(regions))
+    return engine
+
+
+def run(http: TestClient, cascades: int, rng: random.Random) -> dict:
+    samples = {"regions": [], "countries": [], "cities": []}
+
+    def timed(name, url):
+        t0 = time.perf_counter()
+        body = http.get(url).json()
+        samples[name].append((time.perf_counter() - t0) * 1000)
+        return body
+
+    for _ in range(cascades):
+        regions = timed("regions", "/api/geo/regions")
+        countries = timed("countries", f"/api/geo/countries?region_id={rng.choice(regions)['id']}")
+        if countries:
+            timed("cities", f"/api/geo/cities?country_id={rng.choice(countries)['id']}")
+    return {name: percentiles(s) for name, s in samples.items() if s}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cascades", type=int, default=500)
+    parser.add_argument("--app-db", action="store_true", help="use the app's configured MySQL")
+    args = parser.parse_args()
+
+    if not args.app_db:
+        db.set_engine(sqlite_engine())
+    app = FastAPI()
+    app.include_router(geo.router, prefix="/api/geo")
+    http = TestClient(app)
+
+    results = {}
+    for label, enabled in (("cache_off", False), ("cache_on", True)):
+        geo_tree.GEO_TREE_CACHE = enabled
+        http.get("/api/geo/regions")  # loads the tree when enabled
+        results[label] = run(http, args.cascades, random.Random(1))
+    tree = geo_tree.get_geo_tree(db.get_engine())
+    results["tree"] = tree.stats() if tree else None
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
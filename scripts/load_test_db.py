@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Load test for the MySQL-backed endpoints, for sizing the connection pool.
+
+Drives /api/journeys and /api/admin/dashboard (with rotating filters) concurrently against a
+running app, one step per concurrency level, and reads the worker's pool metrics from
+/api/admin/metrics after each step. Raise MYSQL_POOL_SIZE while checkout waits (wait_ms p99)
+dominate latency and the database is not yet the bottleneck; raise MYSQL_MAX_OVERFLOW if bursts
+hit `timeouts`:
+
+    uvicorn backend.app.main:app --port 2000 &
+    python scripts/load_test_db.py --concurrency 8,32,64 --requests 2000
+    python scripts/load_test_db.py --base-url http://127.0.0.1:2000 --dashboard-share 0.5 --json
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+DASHBOARD_FILTERS = [
+    {},
+    {"destination": "Paris"},
+    {"destination": "France"},
+    {"budget": 1500},
+    {"destination": "Tokyo", "budget": 3000},
+    {"user": "demo"},
+]
+
+
+def percentiles(values: list[float]) -> dict:
+    values = sorted(values)
+    if not values:
+        return {"p50": None, "p99": None}
+    return {
+        "p50": round(statistics.median(values) * 1000, 2),
+        "p99": round(values[min(len(values) - 1, int(len(values) * 0.99))] * 1000, 2),
+    }
+
+
+async def step(client: httpx.AsyncClient, total: int, concurrency: int,
+               dashboard_share: float) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: dict = {"journeys": [], "dashboard": []}
+    errors: dict = {}
+    rng = random.Random(concurrency)
+
+    async def one() -> None:
+        if rng.random() < dashboard_share:
+            name, url, params = "dashboard", "/api/admin/dashboard", rng.choice(DASHBOARD_FILTERS)
+        else:
+            name, url, params = "journeys", "/api/journeys", {}
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                r = await client.get(url, params=params)
+                if r.status_code != 200:
+                    errors[str(r.status_code)] = errors.get(str(r.status_code), 0) + 1
+                    return
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                return
+            latencies[name].append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    wall = time.perf_counter() - t0
+    pool = (await client.get("/api/admin/metrics")).json()["db_pool"]
+    done = sum(map(len, latencies.values()))
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": done,
+        "errors": errors,
+        "rps": round(done / wall, 1),
+        "latency_ms": {name: percentiles(v) for name, v in latencies.items()},
+        "pool": {k: pool.get(k) for k in ("pool_size", "max_overflow", "in_use", "peak_in_use",
+                                          "overflow", "overflow_connects", "timeouts", "wait_ms")},
+    }
+
+
+async def run(args) -> list[dict]:
+    limits = httpx.Limits(max_connections=max(args.concurrency),
+                          max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout,
+                                 limits=limits) as client:
+        before = (await client.get("/api/admin/metrics")).json()["db_pool"]
+        if not args.json:
+            print(f"pool before: {json.dumps(before)}")
+        results = []
+        for concurrency in args.concurrency:
+            result = await step(client, args.requests, concurrency, args.dashboard_share)
+            results.append(result)
+            if not args.json:
+                lat = result["latency_ms"]
+                pool = result["pool"]
+                print(f"c={concurrency:<4} rps={result['rps']:8.1f} "
+                      f"journeys p50/p99={lat['journeys']['p50']}/{lat['journeys']['p99']}ms "
+                      f"dashboard p50/p99={lat['dashboard']['p50']}/{lat['dashboard']['p99']}ms "
+                      f"wait p99={pool['wait_ms']['p99'] if pool.get('wait_ms') else None}ms "
+                      f"peak_in_use={pool.get('peak_in_use')} timeouts={pool.get('timeouts')} "
+                      f"errors={result['errors'] or 0}")
+        return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:2000")
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")],
+                        default=[8, 32, 64])
+    parser.add_argument("--requests", type=int, default=1000, help="requests per concurrency step")
+    parser.add_argument("--dashboard-share", type=float, default=0.3)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        results = asyncio.run(run(args))
+    except httpx.TransportError as e:
+        print(f"cannot reach {args.base_url}: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
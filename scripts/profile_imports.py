@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Import-time report for the app, from `python -X importtime`.
+
+Imports the module in fresh interpreters (bytecode already compiled), keeps each module's best
+time over the runs to cut noise, and prints the total, the self time summed per top-level
+package (so a heavy dependency shows under its own name, not under whichever app module
+happened to import it first) and the modules with the most self time:
+
+    python scripts/profile_imports.py
+    python scripts/profile_imports.py --module backend.app.routes.geo --runs 5 --top 15 --json
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$")
+
+
+def importtime(module: str) -> dict:
+    """{name: (self_us, cumulative_us)} for one fresh interpreter."""
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT)}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True)
+    out = {}
+    for line in proc.stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            out[m.group(3)] = (int(m.group(1)), int(m.group(2)))
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="backend.app.main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    importtime(args.module)  # compile bytecode first
+    best: dict = {}
+    for _ in range(args.runs):
+        for name, (self_us, cum_us) in importtime(args.module).items():
+            prev = best.get(name)
+            best[name] = ((min(self_us, prev[0]), min(cum_us, prev[1])) if prev
+                          else (self_us, cum_us))
+
+    total = best.get(args.module, (0, 0))[1]
+    packages: dict = {}
+    for name, (self_us, _) in best.items():
+        top = ".".join(name.split(".")[:3]) if name.startswith("backend.") else name.split(".")[0]
+        packages[top] = packages.get(top, 0) + self_us
+    report = {
+        "module": args.module,
+        "total_ms": round(total / 1000, 1),
+        "modules": len(best),
+        "by_package_ms": {n: round(s / 1000, 1)
+                          for n, s in sorted(packages.items(), key=lambda x: -x[1])[:args.top]},
+        "top_self_ms": {n: round(s / 1000, 1)
+                        for n, (s, _) in sorted(best.items(), key=lambda x: -x[1][0])[:args.top]},
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"{report['module']}: {report['total_ms']} ms, {report['modules']} modules "
+          f"(best of {args.runs})")
+    for title, key in (("package", "by_package_ms"), ("module", "top_self_ms")):
+        print(f"\nself time by {title}:")
+        for name, ms in report[key].items():
+            print(f"  {ms:8.1f} ms  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
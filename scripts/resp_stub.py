@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Minimal in-memory server speaking the Redis protocol (RESP2).
+
+Backs CACHE_BACKEND=redis in tests and local runs without a real Redis. Implements the
+handful of commands the backend uses (GET/SET with PX|EX/DEL/INCR[BY]/DECR[BY]/EXPIRE/
+EXISTS/PING/FLUSHDB/DBSIZE):
+
+    python scripts/resp_stub.py --port 6390
+    CACHE_BACKEND=redis CACHE_REDIS_URL=redis://127.0.0.1:6390/0 bash scripts/run.sh
+"""
+import sys
+import time
+import argparse
+import threading
+import socketserver
+
+
+class RespStore:
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def _live(self, key):
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and time.time() >= expires_at:
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, args):
+        cmd = args[0].upper() if args else b""
+        with self.lock:
+            if cmd == b"PING":
+                return b"+PONG\r\n"
+            if cmd == b"GET":
+                return _bulk(self._live(args[1]))
+            if cmd == b"SET":
+                expires_at = None
+                opts = [a.upper() for a in args[3:]]
+                for i, opt in enumerate(opts):
+                    if opt == b"PX":
+                        expires_at = time.time() + int(args[3 + i + 1]) / 1000.0
+                    elif opt == b"EX":
+                        expires_at = time.time() + int(args[3 + i + 1])
+                if b"NX" in opts and self._live(args[1]) is not None:
+                    return b"$-1\r\n"
+                self.data[args[1]] = (args[2], expires_at)
+                return b"+OK\r\n"
+            if cmd == b"DEL":
+                removed = sum(1 for k in args[1:] if self.data.pop(k, None) is not None)
+                return b":%d\r\n" % removed
+            if cmd == b"EXISTS":
+                return b":%d\r\n" % sum(1 for k in args[1:] if self._live(k) is not None)
+            if cmd in (b"INCR", b"DECR", b"INCRBY", b"DECRBY"):
+                step = int(args[2]) if cmd.endswith(b"BY") else 1
+                value = int(self._live(args[1]) or 0) + (step if cmd.startswith(b"INCR") else -step)
+                expires_at = self.data.get(args[1], (None, None))[1]
+                self.data[args[1]] = (str(value).encode(), expires_at)
+                return b":%d\r\n" % value
+            if cmd == b"EXPIRE":
+                if self._live(args[1]) is None:
+                    return b":0\r\n"
+                self.data[args[1]] = (self.data[args[1]][0], time.time() + int(args[2]))
+                return b":1\r\n"
+            if cmd == b"FLUSHDB":
+                self.data.clear()
+                return b"+OK\r\n"
+            if cmd == b"DBSIZE":
+                return b":%d\r\n" % len(self.data)
+        # CLIENT SETINFO, SELECT and friends are accepted and ignored (MULTI/EXEC are not
+        # supported: use non-transactional pipelines)
+        return b"+OK\r\n"
+
+
+def _bulk(value):
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if not line.startswith(b"*"):
+                # Inline command
+                args = line.strip().split()
+            else:
+                args = []
+                for _ in range(int(line[1:])):
+                    size = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(size + 2)[:-2])
+            self.wfile.write(self.server.store.execute(args))
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.store = RespStore()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> "RespServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    server = RespServer(args.host, args.port)
+    print(f"RESP stand-in listening on {server.url}")
+    server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())